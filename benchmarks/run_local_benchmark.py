@@ -0,0 +1,137 @@
+"""Local extraction benchmark on synthetic WorldWideImporters data.
+
+Generates the source tables at each scale factor into a local H2 database, runs every
+registered table through the ExtractionEngine on Spark local mode (a full load, then an
+incremental load after 1% of the rows were edited) and records wall time, rows/sec and source
+reads per table and engine stage.
+
+    pip install pyspark==3.4.1 delta-spark==2.4.0
+    python benchmarks/run_local_benchmark.py --scales 1 10 --output bench.json
+    python benchmarks/run_local_benchmark.py --scales 1 10 --baseline bench.json
+
+With `--baseline`, stages that got slower than the tolerance allows or read the source more
+often than in the baseline are reported and the script exits with status 1.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from datalab_etl import BRONZE_TABLES, ExtractionResult  # noqa: E402
+from datalab_etl.local import H2Source, LocalExtractionEngine, local_spark, local_spec  # noqa: E402
+from datalab_etl.synthetic import generate_wwi  # noqa: E402
+
+EDIT_FRACTION = 0.01
+
+
+def result_rows(scale: float, phase: str, result: ExtractionResult) -> List[Dict[str, Any]]:
+    """One row per engine stage plus a `total` row for a table's extraction."""
+    rows = []
+    total_seconds = sum(result.stage_seconds.values())
+    stages = dict(result.stage_seconds, total=total_seconds)
+    for stage, seconds in stages.items():
+        reads = sum(result.stage_source_reads.values()) if stage == "total" else result.stage_source_reads.get(stage, 0)
+        rows.append({
+            "scale": scale,
+            "phase": phase,
+            "table": result.table_name,
+            "stage": stage,
+            "seconds": round(seconds, 3),
+            "records": result.records,
+            "rows_per_sec": round(result.records / seconds, 1) if seconds else None,
+            "source_reads": reads,
+        })
+    return rows
+
+
+def run_scale(spark, workdir: str, scale: float) -> List[Dict[str, Any]]:
+    source = H2Source(spark, os.path.join(workdir, f"wwi_x{scale:g}"))
+    schema_name = f"bronze_x{str(scale).replace('.', '_')}"
+    specs = [local_spec(spec) for spec in BRONZE_TABLES.values()]
+
+    start = time.perf_counter()
+    source.load(generate_wwi(spark, scale))
+    print(f"Generated scale {scale:g} source data in {time.perf_counter() - start:.1f}s")
+
+    rows = []
+    engine = LocalExtractionEngine(spark, source, schema_name=schema_name, load_mode="full")
+    engine.setup()
+    for spec in specs:
+        rows += result_rows(scale, "full", engine.run(spec))
+    engine.drop_snapshots()
+
+    # Edit a share of the LastEditedWhen-tracked rows; temporal tables need FOR SYSTEM_TIME,
+    # which the local source doesn't have, so they are only loaded in full
+    source.load({
+        source_table: df
+        for source_table, df in generate_wwi(spark, scale, EDIT_FRACTION, datetime.datetime.now()).items()
+        if any(spec.source_table == source_table and not spec.temporal for spec in specs)
+    })
+    engine = LocalExtractionEngine(spark, source, schema_name=schema_name, load_mode="incremental", watermark_overlap_minutes=0)
+    for spec in specs:
+        if not spec.temporal:
+            rows += result_rows(scale, "incremental", engine.run(spec))
+    engine.drop_snapshots()
+    return rows
+
+
+def regressions(rows: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float, min_seconds: float) -> List[str]:
+    """Stages that are slower than `tolerance` allows (ignoring differences under `min_seconds`) or read the source more often."""
+    previous = {(row["scale"], row["phase"], row["table"], row["stage"]): row for row in baseline}
+    found = []
+    for row in rows:
+        before = previous.get((row["scale"], row["phase"], row["table"], row["stage"]))
+        if before is None:
+            continue
+        name = f"x{row['scale']:g} {row['phase']} {row['table']}.{row['stage']}"
+        if row["seconds"] > before["seconds"] * (1 + tolerance) and row["seconds"] - before["seconds"] > min_seconds:
+            found.append(f"{name}: {before['seconds']}s -> {row['seconds']}s")
+        if row["source_reads"] > before["source_reads"]:
+            found.append(f"{name}: {before['source_reads']} -> {row['source_reads']} source reads")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0], help="Scale factors relative to the sample database (1 to 100)")
+    parser.add_argument("--workdir", default=os.path.join(os.getcwd(), ".benchmark"), help="Directory for the H2 databases and the Delta warehouse")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against the JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown per stage before it counts as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    spark = local_spark(os.path.join(args.workdir, "warehouse"), app_name="datalab-local-benchmark")
+    rows = []
+    for scale in args.scales:
+        rows += run_scale(spark, args.workdir, scale)
+
+    print(f"{'scale':>6} {'phase':<12} {'table':<24} {'stage':<10} {'seconds':>9} {'rows/s':>12} {'reads':>6}")
+    for row in rows:
+        rows_per_sec = f"{row['rows_per_sec']:,.0f}" if row["rows_per_sec"] is not None else "-"
+        print(f"{row['scale']:>6g} {row['phase']:<12} {row['table']:<24} {row['stage']:<10} {row['seconds']:>9.3f} {rows_per_sec:>12} {row['source_reads']:>6}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(rows, json.load(f), args.tolerance, args.min_seconds)
+        for regression in found:
+            print(f"REGRESSION: {regression}")
+        if found:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
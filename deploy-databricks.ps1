@@ -124,25 +124,30 @@ function Invoke-BundleDeployment {
 function Install-InitScripts {
     Write-ColorOutput "📁 Uploading initialization scripts..." $Blue
     
-    $initScriptPath = "resources/init-scripts/install-sql-driver.sh"
-    $targetPath = "/databricks/init-scripts/install-sql-driver.sh"
-    
-    if (Test-Path $initScriptPath) {
-        try {
-            & databricks workspace upload $initScriptPath $targetPath --overwrite
-            if ($LASTEXITCODE -ne 0) {
-                throw "Failed to upload init script"
+    # The init script reads the pinned artifact manifest from next to itself
+    $initScriptFiles = @("install-sql-driver.sh", "artifacts.manifest")
+    
+    foreach ($fileName in $initScriptFiles) {
+        $initScriptPath = "resources/init-scripts/$fileName"
+        $targetPath = "/databricks/init-scripts/$fileName"
+        
+        if (Test-Path $initScriptPath) {
+            try {
+                & databricks workspace upload $initScriptPath $targetPath --overwrite
+                if ($LASTEXITCODE -ne 0) {
+                    throw "Failed to upload $fileName"
+                }
+                Write-ColorOutput "✅ $fileName uploaded successfully" $Green
+            }
+            catch {
+                Write-ColorOutput "❌ Failed to upload $fileName`: $($_.Exception.Message)" $Red
+                exit 1
             }
-            Write-ColorOutput "✅ Init script uploaded successfully" $Green
         }
-        catch {
-            Write-ColorOutput "❌ Failed to upload init script: $($_.Exception.Message)" $Red
-            exit 1
+        else {
+            Write-ColorOutput "⚠️  $fileName not found at $initScriptPath" $Yellow
         }
     }
-    else {
-        Write-ColorOutput "⚠️  Init script not found at $initScriptPath" $Yellow
-    }
 }
 
 function Test-Deployment {
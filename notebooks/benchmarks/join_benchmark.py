@@ -0,0 +1,101 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Order Line Join Benchmark
+# MAGIC 
+# MAGIC This notebook runs typical order analyses twice: as the normalized join of bronze `orders`, `order_lines` and
+# MAGIC `stock_items`, and against the pre-joined `order_line_facts` table (see `src/datalab_etl/facts.py`). It reports
+# MAGIC the best time of each query and the bytes it shuffled. `order_line_facts` is refreshed by
+# MAGIC `notebooks/bronze/extract_orders.py` with `order_line_facts: true`.
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `catalog_name`: Unity Catalog name
+# MAGIC - `schema_name`: Schema holding the bronze tables and `order_line_facts`
+# MAGIC - `runs`: Runs per query; the best time is reported
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import ORDER_LINE_FACTS, OPEN_VALID_TO, benchmark_queries
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+dbutils.widgets.text("catalog_name", "don_datalab_catalog", "Catalog Name")
+dbutils.widgets.text("schema_name", "bronze", "Schema Name")
+dbutils.widgets.text("runs", "3", "Runs per Query")
+
+catalog_name = dbutils.widgets.get("catalog_name")
+schema_name = dbutils.widgets.get("schema_name")
+runs = int(dbutils.widgets.get("runs"))
+
+orders_table = f"{catalog_name}.{schema_name}.orders"
+order_lines_table = f"{catalog_name}.{schema_name}.order_lines"
+stock_items_table = f"{catalog_name}.{schema_name}.stock_items"
+facts_table = f"{catalog_name}.{schema_name}.{ORDER_LINE_FACTS}"
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Benchmark Queries
+# MAGIC 
+# MAGIC Each analysis is written once against the normalized tables and once against the fact table, with the same
+# MAGIC result: revenue by month and brand over all orders, and the lines of the most active customer's orders.
+
+# COMMAND ----------
+
+customer_id = spark.sql(f"""
+    SELECT CustomerID FROM {orders_table} GROUP BY CustomerID ORDER BY COUNT(*) DESC LIMIT 1
+""").collect()[0]["CustomerID"]
+
+print(f"Probe: CustomerID={customer_id}")
+
+normalized_lines = f"""
+    {order_lines_table} ol
+    JOIN {orders_table} o ON o.OrderID = ol.OrderID
+    LEFT JOIN (SELECT * FROM {stock_items_table} WHERE ValidTo >= '{OPEN_VALID_TO[:10]}') si ON si.StockItemID = ol.StockItemID
+"""
+
+queries = {
+    "revenue_by_month_brand_joined": f"""
+        SELECT TRUNC(o.OrderDate, 'MM') AS OrderMonth, si.Brand, SUM(ol.Quantity * ol.UnitPrice) AS Revenue
+        FROM {normalized_lines}
+        GROUP BY TRUNC(o.OrderDate, 'MM'), si.Brand
+    """,
+    "revenue_by_month_brand_facts": f"""
+        SELECT OrderMonth, Brand, SUM(Quantity * UnitPrice) AS Revenue
+        FROM {facts_table}
+        GROUP BY OrderMonth, Brand
+    """,
+    "customer_lines_joined": f"""
+        SELECT o.OrderID, o.OrderDate, ol.OrderLineID, si.StockItemName, ol.Quantity, ol.UnitPrice
+        FROM {normalized_lines}
+        WHERE o.CustomerID = {customer_id}
+    """,
+    "customer_lines_facts": f"""
+        SELECT OrderID, OrderDate, OrderLineID, StockItemName, Quantity, UnitPrice
+        FROM {facts_table}
+        WHERE CustomerID = {customer_id}
+    """,
+}
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Run Benchmarks
+# MAGIC 
+# MAGIC Shuffle bytes come from the Spark UI REST API and are empty where it can't be reached.
+
+# COMMAND ----------
+
+results = benchmark_queries(spark, queries, runs=runs)
+display(spark.createDataFrame(results, "query STRING, best_s DOUBLE, shuffle_read_bytes BIGINT, shuffle_write_bytes BIGINT, num_tasks BIGINT"))
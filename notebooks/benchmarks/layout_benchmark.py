@@ -0,0 +1,107 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Bronze Layout Benchmark
+# MAGIC 
+# MAGIC This notebook copies the bronze `orders` and `order_lines` tables into one scratch table per candidate layout
+# MAGIC (see `src/datalab_etl/layout.py`) and compares file counts and scan times of typical point and range queries.
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `catalog_name`: Unity Catalog name
+# MAGIC - `schema_name`: Schema holding the bronze tables; scratch tables are created and dropped here
+# MAGIC - `orders_layouts`: Comma-separated `ORDERS_LAYOUTS` to compare
+# MAGIC - `order_lines_layouts`: Comma-separated `ORDER_LINES_LAYOUTS` to compare
+# MAGIC - `runs`: Runs per query; the best time is reported
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import ORDER_LINES_LAYOUTS, ORDERS_LAYOUTS, benchmark_layouts
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+dbutils.widgets.text("catalog_name", "don_datalab_catalog", "Catalog Name")
+dbutils.widgets.text("schema_name", "bronze", "Schema Name")
+dbutils.widgets.text("orders_layouts", ",".join(ORDERS_LAYOUTS), "Orders Layouts")
+dbutils.widgets.text("order_lines_layouts", ",".join(ORDER_LINES_LAYOUTS), "Order Lines Layouts")
+dbutils.widgets.text("runs", "3", "Runs per Query")
+
+catalog_name = dbutils.widgets.get("catalog_name")
+schema_name = dbutils.widgets.get("schema_name")
+orders_layouts = {name.strip(): ORDERS_LAYOUTS[name.strip()] for name in dbutils.widgets.get("orders_layouts").split(",") if name.strip()}
+order_lines_layouts = {name.strip(): ORDER_LINES_LAYOUTS[name.strip()] for name in dbutils.widgets.get("order_lines_layouts").split(",") if name.strip()}
+runs = int(dbutils.widgets.get("runs"))
+
+orders_table = f"{catalog_name}.{schema_name}.orders"
+order_lines_table = f"{catalog_name}.{schema_name}.order_lines"
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Benchmark Queries
+# MAGIC 
+# MAGIC Probe values are taken from the data so every query matches rows: the median order and its customer and
+# MAGIC stock item for point lookups, and the most recent full month for the range scan.
+
+# COMMAND ----------
+
+probe = spark.sql(f"""
+    SELECT o.OrderID, o.CustomerID, ol.StockItemID,
+           (SELECT ADD_MONTHS(TRUNC(MAX(OrderDate), 'MM'), -1) FROM {orders_table}) AS RangeStart
+    FROM {orders_table} o
+    JOIN {order_lines_table} ol ON ol.OrderID = o.OrderID
+    WHERE o.OrderID = (SELECT PERCENTILE_DISC(0.5) WITHIN GROUP (ORDER BY OrderID) FROM {orders_table})
+    LIMIT 1
+""").collect()[0]
+
+print(f"Probe: OrderID={probe['OrderID']}, CustomerID={probe['CustomerID']}, StockItemID={probe['StockItemID']}, month from {probe['RangeStart']}")
+
+orders_queries = {
+    "order_point": f"OrderID = {probe['OrderID']}",
+    "customer_point": f"CustomerID = {probe['CustomerID']}",
+    "month_range": f"OrderDate >= '{probe['RangeStart']}' AND OrderDate < ADD_MONTHS('{probe['RangeStart']}', 1)",
+}
+order_lines_queries = {
+    "order_point": f"OrderID = {probe['OrderID']}",
+    "stock_item_point": f"StockItemID = {probe['StockItemID']}",
+    "order_range": f"OrderID BETWEEN {probe['OrderID']} AND {probe['OrderID'] + 10000}",
+}
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Run Benchmarks
+
+# COMMAND ----------
+
+orders_results = benchmark_layouts(
+    spark,
+    orders_table,
+    orders_layouts,
+    target_prefix=f"{catalog_name}.{schema_name}._bench_orders",
+    queries=orders_queries,
+    runs=runs
+)
+display(spark.createDataFrame(orders_results))
+
+# COMMAND ----------
+
+order_lines_results = benchmark_layouts(
+    spark,
+    order_lines_table,
+    order_lines_layouts,
+    target_prefix=f"{catalog_name}.{schema_name}._bench_order_lines",
+    queries=order_lines_queries,
+    runs=runs
+)
+display(spark.createDataFrame(order_lines_results))
@@ -0,0 +1,97 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # ID Lookup Benchmark
+# MAGIC 
+# MAGIC This notebook generates synthetic `orders` and `order_lines` at several multiples of the sample database size
+# MAGIC (`src/datalab_etl/synthetic.py`), writes them with each candidate layout (see `src/datalab_etl/layout.py`) and
+# MAGIC looks up single orders, customers and stock items. For every lookup it reports the files read out of the
+# MAGIC table's files, the share of files skipped and the best latency, so layouts with Bloom filter indexes
+# MAGIC (`*_bloom`) can be compared with Z-ordering alone as the data grows.
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `catalog_name`: Unity Catalog name
+# MAGIC - `schema_name`: Schema where scratch tables are created and dropped
+# MAGIC - `scales`: Comma-separated multiples of the sample database size
+# MAGIC - `orders_layouts`: Comma-separated `ORDERS_LAYOUTS` to compare
+# MAGIC - `order_lines_layouts`: Comma-separated `ORDER_LINES_LAYOUTS` to compare
+# MAGIC - `runs`: Runs per lookup; the best time is reported
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import ORDER_LINES_LAYOUTS, ORDERS_LAYOUTS, benchmark_lookups
+from datalab_etl.synthetic import generate_wwi, scaled_rows
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+dbutils.widgets.text("catalog_name", "don_datalab_catalog", "Catalog Name")
+dbutils.widgets.text("schema_name", "bronze", "Schema Name")
+dbutils.widgets.text("scales", "10,100", "Scales")
+dbutils.widgets.text("orders_layouts", "monthly_zorder,monthly_zorder_bloom", "Orders Layouts")
+dbutils.widgets.text("order_lines_layouts", "zorder,zorder_bloom", "Order Lines Layouts")
+dbutils.widgets.text("runs", "3", "Runs per Lookup")
+
+catalog_name = dbutils.widgets.get("catalog_name")
+schema_name = dbutils.widgets.get("schema_name")
+scales = [float(scale) for scale in dbutils.widgets.get("scales").split(",") if scale.strip()]
+orders_layouts = {name.strip(): ORDERS_LAYOUTS[name.strip()] for name in dbutils.widgets.get("orders_layouts").split(",") if name.strip()}
+order_lines_layouts = {name.strip(): ORDER_LINES_LAYOUTS[name.strip()] for name in dbutils.widgets.get("order_lines_layouts").split(",") if name.strip()}
+runs = int(dbutils.widgets.get("runs"))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Run Benchmarks
+# MAGIC 
+# MAGIC Probe values are taken from the generated data so every lookup matches rows: the median order and its customer
+# MAGIC and first stock item. Files read come from the scan's SQL metrics and are empty where the Spark UI REST API
+# MAGIC can't be reached.
+
+# COMMAND ----------
+
+results = []
+for scale in scales:
+    source = generate_wwi(spark, scale)
+    orders, order_lines = source["Sales.Orders"], source["Sales.OrderLines"]
+    order_id = scaled_rows("Sales.Orders", scale) // 2
+    customer_id = orders.where(f"OrderID = {order_id}").first()["CustomerID"]
+    stock_item_id = order_lines.where(f"OrderID = {order_id}").first()["StockItemID"]
+    print(f"Scale {scale:g}: OrderID={order_id}, CustomerID={customer_id}, StockItemID={stock_item_id}")
+
+    suffix = f"x{scale:g}".replace(".", "_")
+    for table_name, df, layouts, lookups in [
+        ("orders", orders, orders_layouts, {
+            "order_id": f"OrderID = {order_id}",
+            "customer_id": f"CustomerID = {customer_id}",
+        }),
+        ("order_lines", order_lines, order_lines_layouts, {
+            "order_id": f"OrderID = {order_id}",
+            "stock_item_id": f"StockItemID = {stock_item_id}",
+        }),
+    ]:
+        rows = benchmark_lookups(
+            spark,
+            df,
+            layouts,
+            target_prefix=f"{catalog_name}.{schema_name}._bench_lookup_{table_name}_{suffix}",
+            lookups=lookups,
+            runs=runs
+        )
+        results += [{"scale": scale, "table": table_name, **row} for row in rows]
+
+display(spark.createDataFrame(
+    results,
+    "scale DOUBLE, table STRING, layout STRING, lookup STRING, rows BIGINT, num_files BIGINT, "
+    "files_read BIGINT, files_skipped_pct DOUBLE, files_pruned BIGINT, best_s DOUBLE"
+))
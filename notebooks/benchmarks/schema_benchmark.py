@@ -0,0 +1,77 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Bronze Column Type Benchmark
+# MAGIC 
+# MAGIC This notebook reads each registered table from SQL Server twice, with Spark's default JDBC type mapping and with
+# MAGIC the narrowed column types declared in `src/datalab_etl/registry.py`, writes both copies with the table's layout
+# MAGIC and compares their size and the time of an aggregation over the declared columns.
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `catalog_name`: Unity Catalog name
+# MAGIC - `schema_name`: Schema where scratch tables are created and dropped
+# MAGIC - `sql_server_host`: SQL Server hostname
+# MAGIC - `sql_database_name`: SQL Database name
+# MAGIC - `sql_username`: SQL Server username
+# MAGIC - `sql_password`: SQL Server password
+# MAGIC - `tables`: Comma-separated registry tables to compare (every table is read from SQL Server twice)
+# MAGIC - `runs`: Runs per aggregation; the best time is reported
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import BRONZE_TABLES, ExtractionEngine, SqlServerSource, benchmark_schemas, get_table
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+dbutils.widgets.text("catalog_name", "don_datalab_catalog", "Catalog Name")
+dbutils.widgets.text("schema_name", "bronze", "Schema Name")
+dbutils.widgets.text("sql_server_host", "", "SQL Server Host")
+dbutils.widgets.text("sql_database_name", "WorldWideImporters", "SQL Database Name")
+dbutils.widgets.text("sql_username", "", "SQL Username")
+dbutils.widgets.text("sql_password", "", "SQL Password")
+dbutils.widgets.text("tables", ",".join(name for name, spec in BRONZE_TABLES.items() if spec.column_types), "Tables")
+dbutils.widgets.text("runs", "3", "Runs per Query")
+
+catalog_name = dbutils.widgets.get("catalog_name")
+schema_name = dbutils.widgets.get("schema_name")
+specs = [get_table(name.strip()) for name in dbutils.widgets.get("tables").split(",") if name.strip()]
+runs = int(dbutils.widgets.get("runs"))
+
+source = SqlServerSource(
+    spark,
+    host=dbutils.widgets.get("sql_server_host"),
+    database=dbutils.widgets.get("sql_database_name"),
+    user=dbutils.widgets.get("sql_username"),
+    password=dbutils.widgets.get("sql_password")
+)
+
+engine = ExtractionEngine(spark, source, catalog_name=catalog_name, schema_name=schema_name)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Run Benchmarks
+# MAGIC 
+# MAGIC Declared types are checked against `INFORMATION_SCHEMA.COLUMNS` first; columns whose source type they can't
+# MAGIC hold are reported and keep the default mapping in both copies.
+
+# COMMAND ----------
+
+results = benchmark_schemas(
+    engine,
+    specs,
+    target_prefix=f"{catalog_name}.{schema_name}._bench_types",
+    runs=runs
+)
+display(spark.createDataFrame(results))
@@ -3,6 +3,7 @@
 # MAGIC # Extract Orders Data to Bronze Layer
 # MAGIC 
 # MAGIC This notebook extracts orders and order lines data from the WorldWideImporters SQL Server database and loads it into the Unity Catalog bronze layer.
+# MAGIC The tables are declared in `src/datalab_etl/registry.py` and loaded by the shared `ExtractionEngine`.
 # MAGIC 
 # MAGIC ## Tables Extracted:
 # MAGIC - Sales.Orders
@@ -10,19 +11,40 @@
 # MAGIC 
 # MAGIC ## Parameters:
 # MAGIC - `catalog_name`: Unity Catalog name
-# MAGIC - `schema_name`: Schema name (bronze)  
+# MAGIC - `schema_name`: Schema name (bronze)
 # MAGIC - `sql_server_host`: SQL Server hostname
 # MAGIC - `sql_database_name`: SQL Database name
 # MAGIC - `sql_username`: SQL Server username
 # MAGIC - `sql_password`: SQL Server password
+# MAGIC - `orders_num_partitions`: Parallel JDBC reads for Sales.Orders (1 = single read)
+# MAGIC - `order_lines_num_partitions`: Parallel JDBC reads for Sales.OrderLines (1 = single read)
+# MAGIC - `partition_planning`: How key ranges are planned: `histogram` (SQL Server statistics, falls back to NTILE) or `ntile`
+# MAGIC - `load_mode`: `full` reloads and overwrites each table, `incremental` pulls rows changed since the last watermark and MERGEs them, `window` re-extracts the orders of the last `window_days` days (and their order lines) and replaces just that slice of bronze
+# MAGIC - `window_days`: Size of the rolling window in `window` mode
+# MAGIC - `watermark_overlap_minutes`: Safety overlap subtracted from the stored watermark in incremental mode
+# MAGIC - `jdbc_tuning`: `off` uses driver defaults, `auto` uses the fetch size and read partitions stored in `_etl_jdbc_tuning` (tuning tables that have none or regressed), `tune` re-measures every table
+# MAGIC - `vertical_split`: `true` writes wide and BLOB columns to side tables keyed by the primary key (`Comments`, `DeliveryInstructions` and `InternalComments` go to `orders_notes`)
+# MAGIC - `max_source_connections`: Cap on concurrent JDBC connections while both tables are extracted in parallel
+# MAGIC - `orders_layout`: Physical layout of bronze.orders from `ORDERS_LAYOUTS` (applied on the next full load)
+# MAGIC - `order_lines_layout`: Physical layout of bronze.order_lines from `ORDER_LINES_LAYOUTS`; `*_bloom` layouts add Bloom filter indexes on the ID columns for point lookups
+# MAGIC - `reconcile`: `true` compares each table with SQL Server after the load by per-bucket checksums over the key range and re-extracts only the buckets that differ
+# MAGIC - `reconcile_buckets`: Number of key-range buckets compared per table when reconciling
+# MAGIC - `order_line_facts`: `true` refreshes `order_line_facts`, order lines pre-joined with their order and current stock item, after the load
+# MAGIC - `run_id`: Job run ID (`{{job.run_id}}`); a retry or repair of the same run skips the tables it already loaded and the key ranges it already staged. Empty runs without checkpoints
 
 # COMMAND ----------
 
 # Import required libraries
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import *
-from pyspark.sql.types import *
+import os
+import sys
 import datetime
+from dataclasses import replace
+from pyspark.sql.functions import *
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import BRONZE_TABLES, ORDER_LINES_LAYOUTS, ORDERS_LAYOUTS, RECONCILE_BUCKETS, ExtractionEngine, ExtractionScheduler, OrderLineFacts, SqlServerSource, percent
 
 # COMMAND ----------
 
@@ -38,6 +60,21 @@ dbutils.widgets.text("sql_server_host", "", "SQL Server Host")
 dbutils.widgets.text("sql_database_name", "WorldWideImporters", "SQL Database Name")
 dbutils.widgets.text("sql_username", "", "SQL Username")
 dbutils.widgets.text("sql_password", "", "SQL Password")
+dbutils.widgets.text("orders_num_partitions", str(BRONZE_TABLES["orders"].num_partitions), "Orders Read Partitions")
+dbutils.widgets.text("order_lines_num_partitions", str(BRONZE_TABLES["order_lines"].num_partitions), "Order Lines Read Partitions")
+dbutils.widgets.dropdown("partition_planning", "histogram", ["histogram", "ntile"], "Partition Planning")
+dbutils.widgets.dropdown("load_mode", "full", ["full", "incremental", "window"], "Load Mode")
+dbutils.widgets.text("window_days", "30", "Rolling Window (days)")
+dbutils.widgets.text("watermark_overlap_minutes", "15", "Watermark Overlap (minutes)")
+dbutils.widgets.dropdown("jdbc_tuning", "off", ["off", "auto", "tune"], "JDBC Tuning")
+dbutils.widgets.dropdown("vertical_split", "false", ["true", "false"], "Vertical Split")
+dbutils.widgets.text("max_source_connections", "8", "Max Source Connections")
+dbutils.widgets.dropdown("orders_layout", "monthly_zorder", list(ORDERS_LAYOUTS), "Orders Layout")
+dbutils.widgets.dropdown("order_lines_layout", "zorder", list(ORDER_LINES_LAYOUTS), "Order Lines Layout")
+dbutils.widgets.dropdown("reconcile", "false", ["true", "false"], "Reconcile")
+dbutils.widgets.text("reconcile_buckets", str(RECONCILE_BUCKETS), "Reconcile Buckets")
+dbutils.widgets.dropdown("order_line_facts", "false", ["true", "false"], "Order Line Facts")
+dbutils.widgets.text("run_id", "", "Job Run ID")
 
 # Get parameter values
 catalog_name = dbutils.widgets.get("catalog_name")
@@ -46,195 +83,134 @@ sql_server_host = dbutils.widgets.get("sql_server_host")
 sql_database_name = dbutils.widgets.get("sql_database_name")
 sql_username = dbutils.widgets.get("sql_username")
 sql_password = dbutils.widgets.get("sql_password")
+orders_num_partitions = int(dbutils.widgets.get("orders_num_partitions"))
+order_lines_num_partitions = int(dbutils.widgets.get("order_lines_num_partitions"))
+partition_planning = dbutils.widgets.get("partition_planning")
+load_mode = dbutils.widgets.get("load_mode")
+window_days = int(dbutils.widgets.get("window_days"))
+watermark_overlap_minutes = int(dbutils.widgets.get("watermark_overlap_minutes"))
+jdbc_tuning = dbutils.widgets.get("jdbc_tuning")
+vertical_split = dbutils.widgets.get("vertical_split") == "true"
+max_source_connections = int(dbutils.widgets.get("max_source_connections"))
+orders_layout = dbutils.widgets.get("orders_layout")
+order_lines_layout = dbutils.widgets.get("order_lines_layout")
+reconcile = dbutils.widgets.get("reconcile") == "true"
+reconcile_buckets = int(dbutils.widgets.get("reconcile_buckets"))
+order_line_facts = dbutils.widgets.get("order_line_facts") == "true"
+run_id = dbutils.widgets.get("run_id")
 
 print(f"Target: {catalog_name}.{schema_name}")
 print(f"Source: {sql_server_host}/{sql_database_name}")
+print(f"Read partitions: orders={orders_num_partitions}, order_lines={order_lines_num_partitions} ({partition_planning})")
+print(f"Load mode: {load_mode} (watermark overlap: {watermark_overlap_minutes} min, window: {window_days} days)")
+print(f"Vertical split: {vertical_split}")
+print(f"Run ID: {run_id or 'none (no checkpoints)'}")
+print(f"Layouts: orders={orders_layout}, order_lines={order_lines_layout}")
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Database Connection Configuration
+# MAGIC ## Extraction Engine Setup
 
 # COMMAND ----------
 
-# SQL Server connection properties
-jdbc_url = f"jdbc:sqlserver://{sql_server_host}:1433;database={sql_database_name};encrypt=true;trustServerCertificate=true"
-
-connection_properties = {
-    "user": sql_username,
-    "password": sql_password,
-    "driver": "com.microsoft.sqlserver.jdbc.SQLServerDriver",
-    "encrypt": "true",
-    "trustServerCertificate": "true"
-}
-
-print(f"JDBC URL: {jdbc_url}")
+source = SqlServerSource(
+    spark,
+    host=sql_server_host,
+    database=sql_database_name,
+    user=sql_username,
+    password=sql_password,
+    partition_planning=partition_planning
+)
+
+engine = ExtractionEngine(
+    spark,
+    source,
+    catalog_name=catalog_name,
+    schema_name=schema_name,
+    load_mode=load_mode,
+    watermark_overlap_minutes=watermark_overlap_minutes,
+    window_days=window_days,
+    vertical_split=vertical_split,
+    jdbc_tuning=jdbc_tuning,
+    run_id=run_id
+)
+
+# Create catalog, schema and control tables if they don't exist
+engine.setup()
+
+print(f"JDBC URL: {source.jdbc_url}")
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Create Schema if Not Exists
+# MAGIC ## Extract Orders and Order Lines Data
+# MAGIC 
+# MAGIC Both tables are extracted concurrently, each in its own FAIR scheduler pool, with at most
+# MAGIC `max_source_connections` JDBC connections open against SQL Server across both.
+# MAGIC 
+# MAGIC In `window` mode only orders whose `OrderDate` is in the last `window_days` days are read, and
+# MAGIC the matching rows of bronze.orders are replaced atomically with a Delta `replaceWhere`, so
+# MAGIC older monthly partitions are not rewritten. Order lines follow the window through `OrderID`.
+# MAGIC 
+# MAGIC Orders are partitioned by month rather than by day and Z-ordered on `OrderID`/`CustomerID`;
+# MAGIC order lines are Z-ordered on `OrderID`/`StockItemID`. The `*_bloom` layouts also keep a Bloom filter index
+# MAGIC on these ID columns in every file written, by full loads and MERGEs alike. Compare layouts with
+# MAGIC `notebooks/benchmarks/layout_benchmark.py` and ID lookups with `notebooks/benchmarks/lookup_benchmark.py`.
 
 # COMMAND ----------
 
-# Create catalog and schema if they don't exist
-spark.sql(f"CREATE CATALOG IF NOT EXISTS {catalog_name}")
-spark.sql(f"USE CATALOG {catalog_name}")
-spark.sql(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
-spark.sql(f"USE SCHEMA {schema_name}")
+scheduler = ExtractionScheduler(engine, max_source_connections=max_source_connections)
 
-print(f"Using catalog: {catalog_name}, schema: {schema_name}")
+orders_spec = replace(BRONZE_TABLES["orders"], layout=ORDERS_LAYOUTS[orders_layout])
+order_lines_spec = replace(BRONZE_TABLES["order_lines"], layout=ORDER_LINES_LAYOUTS[order_lines_layout])
+
+orders_results = scheduler.run(
+    [orders_spec, order_lines_spec],
+    num_partitions={"orders": orders_num_partitions, "order_lines": order_lines_num_partitions}
+)
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Extract Orders Data
+# MAGIC ## Reconcile With the Source
+# MAGIC 
+# MAGIC With `reconcile: true`, each table's key range is split into `reconcile_buckets` buckets and a
+# MAGIC checksum over every row's key and version is computed per bucket on SQL Server and over the
+# MAGIC bronze table. Only buckets whose row count or checksum differ are read from the source again
+# MAGIC and replaced in bronze, so verifying a table costs one aggregate query on SQL Server instead of a
+# MAGIC full copy.
 
 # COMMAND ----------
 
-try:
-    # Extract Orders data with enhanced error handling and logging
-    print("Starting Orders extraction...")
-    
-    orders_query = """
-    SELECT 
-        OrderID,
-        CustomerID,
-        SalespersonPersonID,
-        PickedByPersonID,
-        ContactPersonID,
-        BackorderOrderID,
-        OrderDate,
-        ExpectedDeliveryDate,
-        CustomerPurchaseOrderNumber,
-        IsUndersupplyBackordered,
-        Comments,
-        DeliveryInstructions,
-        InternalComments,
-        PickingCompletedWhen,
-        LastEditedBy,
-        LastEditedWhen
-    FROM Sales.Orders
-    """
-    
-    orders_df = spark.read \
-        .format("jdbc") \
-        .option("url", jdbc_url) \
-        .option("query", orders_query) \
-        .option("user", sql_username) \
-        .option("password", sql_password) \
-        .option("driver", "com.microsoft.sqlserver.jdbc.SQLServerDriver") \
-        .load()
-    
-    # Add metadata columns for data lineage and quality tracking
-    orders_df = orders_df \
-        .withColumn("_extract_timestamp", current_timestamp()) \
-        .withColumn("_source_system", lit("WorldWideImporters_SQL")) \
-        .withColumn("_batch_id", lit(f"orders_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
-    
-    print(f"Orders extracted: {orders_df.count()} records")
-    
-    # Data quality checks
-    null_order_ids = orders_df.filter(col("OrderID").isNull()).count()
-    if null_order_ids > 0:
-        print(f"WARNING: Found {null_order_ids} records with null OrderID")
-    
-    # Write to Unity Catalog bronze layer with proper partitioning
-    table_name = f"{catalog_name}.{schema_name}.orders"
-    print(f"Writing to table: {table_name}")
-    
-    orders_df.write \
-        .mode("overwrite") \
-        .option("mergeSchema", "true") \
-        .partitionBy("OrderDate") \
-        .saveAsTable(table_name)
-    
-    print(f"✅ Orders data successfully written to {table_name}")
-    
-except Exception as e:
-    print(f"❌ Error extracting Orders data: {str(e)}")
-    raise
+if reconcile:
+    for spec in [orders_spec, order_lines_spec]:
+        engine.reconcile(spec, num_buckets=reconcile_buckets)
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Extract Order Lines Data
+# MAGIC ## Refresh the Order Line Fact Table
+# MAGIC 
+# MAGIC Delta tables can't be bucketed, so joining orders, order lines and stock items shuffles both
+# MAGIC sides on every query. With `order_line_facts: true` the join is materialized once per load in
+# MAGIC `order_line_facts`, monthly partitioned and Z-ordered on `OrderID`/`StockItemID`. Only the orders
+# MAGIC touched since the last refresh are rebuilt, found through the Change Data Feed of the three
+# MAGIC bronze tables. Stock item changes loaded after this task are picked up by the next run. Compare
+# MAGIC query costs with `notebooks/benchmarks/join_benchmark.py`.
 
 # COMMAND ----------
 
-try:
-    # Extract OrderLines data
-    print("Starting OrderLines extraction...")
-    
-    order_lines_query = """
-    SELECT 
-        OrderLineID,
-        OrderID,
-        StockItemID,
-        Description,
-        PackageTypeID,
-        Quantity,
-        UnitPrice,
-        TaxRate,
-        PickedQuantity,
-        PickingCompletedWhen,
-        LastEditedBy,
-        LastEditedWhen
-    FROM Sales.OrderLines
-    """
-    
-    order_lines_df = spark.read \
-        .format("jdbc") \
-        .option("url", jdbc_url) \
-        .option("query", order_lines_query) \
-        .option("user", sql_username) \
-        .option("password", sql_password) \
-        .option("driver", "com.microsoft.sqlserver.jdbc.SQLServerDriver") \
-        .load()
-    
-    # Add metadata columns
-    order_lines_df = order_lines_df \
-        .withColumn("_extract_timestamp", current_timestamp()) \
-        .withColumn("_source_system", lit("WorldWideImporters_SQL")) \
-        .withColumn("_batch_id", lit(f"order_lines_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
-    
-    print(f"OrderLines extracted: {order_lines_df.count()} records")
-    
-    # Data quality checks
-    null_order_line_ids = order_lines_df.filter(col("OrderLineID").isNull()).count()
-    null_order_ids = order_lines_df.filter(col("OrderID").isNull()).count()
-    
-    if null_order_line_ids > 0:
-        print(f"WARNING: Found {null_order_line_ids} records with null OrderLineID")
-    if null_order_ids > 0:
-        print(f"WARNING: Found {null_order_ids} records with null OrderID")
-    
-    # Calculate some basic statistics
-    total_quantity = order_lines_df.agg(sum("Quantity")).collect()[0][0]
-    avg_unit_price = order_lines_df.agg(avg("UnitPrice")).collect()[0][0]
-    
-    print(f"Total quantity across all order lines: {total_quantity}")
-    print(f"Average unit price: ${avg_unit_price:.2f}")
-    
-    # Write to Unity Catalog bronze layer
-    table_name = f"{catalog_name}.{schema_name}.order_lines"
-    print(f"Writing to table: {table_name}")
-    
-    order_lines_df.write \
-        .mode("overwrite") \
-        .option("mergeSchema", "true") \
-        .saveAsTable(table_name)
-    
-    print(f"✅ OrderLines data successfully written to {table_name}")
-    
-except Exception as e:
-    print(f"❌ Error extracting OrderLines data: {str(e)}")
-    raise
+if order_line_facts:
+    OrderLineFacts(engine).refresh()
 
 # COMMAND ----------
 
 # MAGIC %md
 # MAGIC ## Data Quality Summary Report
+# MAGIC 
+# MAGIC Row counts come from Delta metadata instead of `COUNT(*)` scans, and every other metric of
+# MAGIC a table is computed in one combined aggregation pass.
 
 # COMMAND ----------
 
@@ -245,58 +221,37 @@ try:
     print(f"Target catalog: {catalog_name}")
     print(f"Target schema: {schema_name}")
     print("")
-    
-    # Get record counts from Unity Catalog tables
-    orders_count = spark.sql(f"SELECT COUNT(*) as count FROM {catalog_name}.{schema_name}.orders").collect()[0]["count"]
-    order_lines_count = spark.sql(f"SELECT COUNT(*) as count FROM {catalog_name}.{schema_name}.order_lines").collect()[0]["count"]
-    
+
+    orders_report = engine.table_report("orders", {
+        "with_customer": count("CustomerID"),
+        "with_order_date": count("OrderDate")
+    })
+    order_lines_report = engine.table_report("order_lines", {
+        "with_stock_item": count("StockItemID"),
+        "with_quantity": count(when(col("Quantity") > 0, 1))
+    })
+    orders_count = orders_report["row_count"]
+    order_lines_count = order_lines_report["row_count"]
+
     print(f"📊 RECORD COUNTS:")
     print(f"  - Orders: {orders_count:,}")
     print(f"  - Order Lines: {order_lines_count:,}")
     print("")
-    
+
     # Data quality metrics
     print("🔍 DATA QUALITY METRICS:")
-    
-    # Orders metrics
-    orders_with_customer = spark.sql(f"""
-        SELECT COUNT(*) as count 
-        FROM {catalog_name}.{schema_name}.orders 
-        WHERE CustomerID IS NOT NULL
-    """).collect()[0]["count"]
-    
-    orders_with_dates = spark.sql(f"""
-        SELECT COUNT(*) as count 
-        FROM {catalog_name}.{schema_name}.orders 
-        WHERE OrderDate IS NOT NULL
-    """).collect()[0]["count"]
-    
-    print(f"  - Orders with CustomerID: {orders_with_customer:,} ({orders_with_customer/orders_count*100:.1f}%)")
-    print(f"  - Orders with OrderDate: {orders_with_dates:,} ({orders_with_dates/orders_count*100:.1f}%)")
-    
-    # Order lines metrics
-    order_lines_with_stock = spark.sql(f"""
-        SELECT COUNT(*) as count 
-        FROM {catalog_name}.{schema_name}.order_lines 
-        WHERE StockItemID IS NOT NULL
-    """).collect()[0]["count"]
-    
-    order_lines_with_quantity = spark.sql(f"""
-        SELECT COUNT(*) as count 
-        FROM {catalog_name}.{schema_name}.order_lines 
-        WHERE Quantity > 0
-    """).collect()[0]["count"]
-    
-    print(f"  - Order lines with StockItemID: {order_lines_with_stock:,} ({order_lines_with_stock/order_lines_count*100:.1f}%)")
-    print(f"  - Order lines with positive quantity: {order_lines_with_quantity:,} ({order_lines_with_quantity/order_lines_count*100:.1f}%)")
-    
+    print(f"  - Orders with CustomerID: {orders_report['with_customer']:,} ({percent(orders_report['with_customer'], orders_count)})")
+    print(f"  - Orders with OrderDate: {orders_report['with_order_date']:,} ({percent(orders_report['with_order_date'], orders_count)})")
+    print(f"  - Order lines with StockItemID: {order_lines_report['with_stock_item']:,} ({percent(order_lines_report['with_stock_item'], order_lines_count)})")
+    print(f"  - Order lines with positive quantity: {order_lines_report['with_quantity']:,} ({percent(order_lines_report['with_quantity'], order_lines_count)})")
+
     print("")
     print("✅ Orders extraction completed successfully!")
-    
+
 except Exception as e:
     print(f"❌ Error generating summary report: {str(e)}")
     # Don't raise here as the main extraction was successful
-    
+
 # COMMAND ----------
 
 # MAGIC %md
@@ -304,8 +259,11 @@ except Exception as e:
 
 # COMMAND ----------
 
+# Drop staged snapshots and confirm each table was read from SQL Server once
+engine.drop_snapshots()
+
 # Clear sensitive parameters from memory
 sql_password = None
-connection_properties = None
+source.clear_credentials()
 
 print("🧹 Cleanup completed - sensitive data cleared from memory")
@@ -3,11 +3,13 @@
 # MAGIC # Extract Stock Items Data to Bronze Layer
 # MAGIC 
 # MAGIC This notebook extracts stock items and related inventory data from the WorldWideImporters SQL Server database and loads it into the Unity Catalog bronze layer.
+# MAGIC The tables are declared in `src/datalab_etl/registry.py` and loaded by the shared `ExtractionEngine`.
 # MAGIC 
 # MAGIC ## Tables Extracted:
 # MAGIC - Warehouse.StockItems
 # MAGIC - Warehouse.StockItemHoldings
 # MAGIC - Warehouse.StockGroups
+# MAGIC - Warehouse.StockItemStockGroups
 # MAGIC 
 # MAGIC ## Parameters:
 # MAGIC - `catalog_name`: Unity Catalog name
@@ -16,14 +18,29 @@
 # MAGIC - `sql_database_name`: SQL Database name
 # MAGIC - `sql_username`: SQL Server username
 # MAGIC - `sql_password`: SQL Server password
+# MAGIC - `load_mode`: `full` reloads and overwrites each table, `incremental` captures new row versions of the temporal tables (StockItems, StockGroups) as SCD2 history and MERGEs rows changed since the last `LastEditedWhen` watermark for the others
+# MAGIC - `watermark_overlap_minutes`: Safety overlap subtracted from the stored watermark in incremental mode
+# MAGIC - `jdbc_tuning`: `off` uses driver defaults, `auto` uses the fetch size and read partitions stored in `_etl_jdbc_tuning` (tuning tables that have none or regressed), `tune` re-measures every table
+# MAGIC - `vertical_split`: `true` writes wide and BLOB columns to side tables keyed by the primary key (the comment, JSON and search columns go to `stock_items_details` and `Photo` to `stock_items_photos`, deduplicated by content hash)
+# MAGIC - `json_schema_evolution`: What to do when `CustomFields`/`Tags` contain keys the cached JSON schema doesn't know: `add` them, `freeze` the schema, or `fail`
+# MAGIC - `max_source_connections`: Cap on concurrent JDBC connections while the tables are extracted in parallel
+# MAGIC - `driver_fetch_max_rows`: Tables with at most this many rows (by SQL Server statistics) are fetched on the driver into Arrow instead of through Spark JDBC; `0` turns the fast path off
+# MAGIC - `reconcile`: `true` compares each table with SQL Server after the load by per-bucket checksums over the key range and re-extracts only the buckets that differ
+# MAGIC - `reconcile_buckets`: Number of key-range buckets compared per table when reconciling
+# MAGIC - `run_id`: Job run ID (`{{job.run_id}}`); a retry or repair of the same run skips the tables it already loaded and the key ranges it already staged. Empty runs without checkpoints
 
 # COMMAND ----------
 
 # Import required libraries
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import *
-from pyspark.sql.types import *
+import os
+import sys
 import datetime
+from pyspark.sql.functions import *
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import BRONZE_TABLES, RECONCILE_BUCKETS, STOCK_SUMMARIES, ExtractionEngine, ExtractionScheduler, SqlServerSource, SummaryRefresher, current_version, percent
 
 # COMMAND ----------
 
@@ -39,6 +56,16 @@ dbutils.widgets.text("sql_server_host", "", "SQL Server Host")
 dbutils.widgets.text("sql_database_name", "WorldWideImporters", "SQL Database Name")
 dbutils.widgets.text("sql_username", "", "SQL Username")
 dbutils.widgets.text("sql_password", "", "SQL Password")
+dbutils.widgets.dropdown("load_mode", "full", ["full", "incremental"], "Load Mode")
+dbutils.widgets.text("watermark_overlap_minutes", "15", "Watermark Overlap (minutes)")
+dbutils.widgets.dropdown("jdbc_tuning", "off", ["off", "auto", "tune"], "JDBC Tuning")
+dbutils.widgets.dropdown("vertical_split", "false", ["true", "false"], "Vertical Split")
+dbutils.widgets.dropdown("json_schema_evolution", "add", ["add", "freeze", "fail"], "JSON Schema Evolution")
+dbutils.widgets.text("max_source_connections", "8", "Max Source Connections")
+dbutils.widgets.text("driver_fetch_max_rows", "10000", "Driver Fetch Max Rows")
+dbutils.widgets.dropdown("reconcile", "false", ["true", "false"], "Reconcile")
+dbutils.widgets.text("reconcile_buckets", str(RECONCILE_BUCKETS), "Reconcile Buckets")
+dbutils.widgets.text("run_id", "", "Job Run ID")
 
 # Get parameter values
 catalog_name = dbutils.widgets.get("catalog_name")
@@ -47,331 +74,125 @@ sql_server_host = dbutils.widgets.get("sql_server_host")
 sql_database_name = dbutils.widgets.get("sql_database_name")
 sql_username = dbutils.widgets.get("sql_username")
 sql_password = dbutils.widgets.get("sql_password")
+load_mode = dbutils.widgets.get("load_mode")
+watermark_overlap_minutes = int(dbutils.widgets.get("watermark_overlap_minutes"))
+jdbc_tuning = dbutils.widgets.get("jdbc_tuning")
+vertical_split = dbutils.widgets.get("vertical_split") == "true"
+json_schema_evolution = dbutils.widgets.get("json_schema_evolution")
+max_source_connections = int(dbutils.widgets.get("max_source_connections"))
+driver_fetch_max_rows = int(dbutils.widgets.get("driver_fetch_max_rows"))
+reconcile = dbutils.widgets.get("reconcile") == "true"
+reconcile_buckets = int(dbutils.widgets.get("reconcile_buckets"))
+run_id = dbutils.widgets.get("run_id")
 
 print(f"Target: {catalog_name}.{schema_name}")
 print(f"Source: {sql_server_host}/{sql_database_name}")
+print(f"Load mode: {load_mode} (watermark overlap: {watermark_overlap_minutes} min)")
+print(f"Vertical split: {vertical_split}")
+print(f"Run ID: {run_id or 'none (no checkpoints)'}")
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Database Connection Configuration
-
-# COMMAND ----------
-
-# SQL Server connection properties
-jdbc_url = f"jdbc:sqlserver://{sql_server_host}:1433;database={sql_database_name};encrypt=true;trustServerCertificate=true"
-
-connection_properties = {
-    "user": sql_username,
-    "password": sql_password,
-    "driver": "com.microsoft.sqlserver.jdbc.SQLServerDriver",
-    "encrypt": "true",
-    "trustServerCertificate": "true"
-}
-
-print(f"JDBC URL: {jdbc_url}")
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC ## Create Schema if Not Exists
+# MAGIC ## Extraction Engine Setup
 
 # COMMAND ----------
 
-# Create catalog and schema if they don't exist
-spark.sql(f"CREATE CATALOG IF NOT EXISTS {catalog_name}")
-spark.sql(f"USE CATALOG {catalog_name}")
-spark.sql(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
-spark.sql(f"USE SCHEMA {schema_name}")
-
-print(f"Using catalog: {catalog_name}, schema: {schema_name}")
+source = SqlServerSource(
+    spark,
+    host=sql_server_host,
+    database=sql_database_name,
+    user=sql_username,
+    password=sql_password
+)
+
+engine = ExtractionEngine(
+    spark,
+    source,
+    catalog_name=catalog_name,
+    schema_name=schema_name,
+    load_mode=load_mode,
+    watermark_overlap_minutes=watermark_overlap_minutes,
+    vertical_split=vertical_split,
+    json_schema_evolution=json_schema_evolution,
+    jdbc_tuning=jdbc_tuning,
+    driver_fetch_max_rows=driver_fetch_max_rows,
+    run_id=run_id
+)
+
+# Create catalog, schema and control tables if they don't exist
+engine.setup()
+
+print(f"JDBC URL: {source.jdbc_url}")
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Extract Stock Items Data
-
-# COMMAND ----------
-
-try:
-    # Extract StockItems data with comprehensive fields
-    print("Starting StockItems extraction...")
-    
-    stock_items_query = """
-    SELECT 
-        StockItemID,
-        StockItemName,
-        SupplierID,
-        ColorID,
-        UnitPackageID,
-        OuterPackageID,
-        Brand,
-        Size,
-        LeadTimeDays,
-        QuantityPerOuter,
-        IsChillerStock,
-        Barcode,
-        TaxRate,
-        UnitPrice,
-        RecommendedRetailPrice,
-        TypicalWeightPerUnit,
-        MarketingComments,
-        InternalComments,
-        Photo,
-        CustomFields,
-        Tags,
-        SearchDetails,
-        LastEditedBy,
-        ValidFrom,
-        ValidTo
-    FROM Warehouse.StockItems
-    """
-    
-    stock_items_df = spark.read \
-        .format("jdbc") \
-        .option("url", jdbc_url) \
-        .option("query", stock_items_query) \
-        .option("user", sql_username) \
-        .option("password", sql_password) \
-        .option("driver", "com.microsoft.sqlserver.jdbc.SQLServerDriver") \
-        .load()
-    
-    # Add metadata columns for data lineage
-    stock_items_df = stock_items_df \
-        .withColumn("_extract_timestamp", current_timestamp()) \
-        .withColumn("_source_system", lit("WorldWideImporters_SQL")) \
-        .withColumn("_batch_id", lit(f"stock_items_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
-    
-    print(f"StockItems extracted: {stock_items_df.count()} records")
-    
-    # Data quality checks
-    null_stock_item_ids = stock_items_df.filter(col("StockItemID").isNull()).count()
-    null_names = stock_items_df.filter(col("StockItemName").isNull()).count()
-    zero_prices = stock_items_df.filter(col("UnitPrice") <= 0).count()
-    
-    if null_stock_item_ids > 0:
-        print(f"WARNING: Found {null_stock_item_ids} records with null StockItemID")
-    if null_names > 0:
-        print(f"WARNING: Found {null_names} records with null StockItemName")
-    if zero_prices > 0:
-        print(f"INFO: Found {zero_prices} records with zero or negative UnitPrice")
-    
-    # Calculate basic statistics
-    avg_unit_price = stock_items_df.agg(avg("UnitPrice")).collect()[0][0]
-    max_unit_price = stock_items_df.agg(max("UnitPrice")).collect()[0][0]
-    chiller_stock_count = stock_items_df.filter(col("IsChillerStock") == True).count()
-    
-    print(f"Average unit price: ${avg_unit_price:.2f}")
-    print(f"Maximum unit price: ${max_unit_price:.2f}")
-    print(f"Chiller stock items: {chiller_stock_count}")
-    
-    # Write to Unity Catalog bronze layer
-    table_name = f"{catalog_name}.{schema_name}.stock_items"
-    print(f"Writing to table: {table_name}")
-    
-    stock_items_df.write \
-        .mode("overwrite") \
-        .option("mergeSchema", "true") \
-        .saveAsTable(table_name)
-    
-    print(f"✅ StockItems data successfully written to {table_name}")
-    
-except Exception as e:
-    print(f"❌ Error extracting StockItems data: {str(e)}")
-    raise
+# MAGIC ## Extract Stock Data
+# MAGIC 
+# MAGIC The four tables are independent, so they are extracted concurrently from this driver: each in
+# MAGIC its own FAIR scheduler pool, largest table first, with at most `max_source_connections` JDBC
+# MAGIC connections open against SQL Server at once.
+# MAGIC 
+# MAGIC `Warehouse.StockItems` and `Warehouse.StockGroups` are system-versioned temporal tables. In
+# MAGIC incremental mode only row versions that started or were closed after the last captured system
+# MAGIC time are fetched with `FOR SYSTEM_TIME BETWEEN`, and bronze keeps them as SCD2 history. The
+# MAGIC current version of a row is the one whose `ValidTo` is `9999-12-31`.
+# MAGIC 
+# MAGIC The `CustomFields` and `Tags` JSON strings are parsed once at ingest into typed
+# MAGIC `CustomFieldsParsed` (struct) and `TagsParsed` (array) columns, using the schema cached in
+# MAGIC `_etl_json_schemas`.
 
 # COMMAND ----------
 
-# MAGIC %md
-# MAGIC ## Extract Stock Item Holdings Data
-
-# COMMAND ----------
+scheduler = ExtractionScheduler(engine, max_source_connections=max_source_connections)
 
-try:
-    # Extract StockItemHoldings data (current inventory levels)
-    print("Starting StockItemHoldings extraction...")
-    
-    stock_holdings_query = """
-    SELECT 
-        StockItemID,
-        QuantityOnHand,
-        BinLocation,
-        LastStocktakeQuantity,
-        LastCostPrice,
-        ReorderLevel,
-        TargetStockLevel,
-        LastEditedBy,
-        LastEditedWhen
-    FROM Warehouse.StockItemHoldings
-    """
-    
-    stock_holdings_df = spark.read \
-        .format("jdbc") \
-        .option("url", jdbc_url) \
-        .option("query", stock_holdings_query) \
-        .option("user", sql_username) \
-        .option("password", sql_password) \
-        .option("driver", "com.microsoft.sqlserver.jdbc.SQLServerDriver") \
-        .load()
-    
-    # Add metadata columns
-    stock_holdings_df = stock_holdings_df \
-        .withColumn("_extract_timestamp", current_timestamp()) \
-        .withColumn("_source_system", lit("WorldWideImporters_SQL")) \
-        .withColumn("_batch_id", lit(f"stock_holdings_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
-    
-    print(f"StockItemHoldings extracted: {stock_holdings_df.count()} records")
-    
-    # Data quality checks and insights
-    negative_stock = stock_holdings_df.filter(col("QuantityOnHand") < 0).count()
-    zero_stock = stock_holdings_df.filter(col("QuantityOnHand") == 0).count()
-    below_reorder = stock_holdings_df.filter(col("QuantityOnHand") < col("ReorderLevel")).count()
-    
-    total_inventory_value = stock_holdings_df.agg(
-        sum(col("QuantityOnHand") * col("LastCostPrice"))
-    ).collect()[0][0]
-    
-    print(f"Items with negative stock: {negative_stock}")
-    print(f"Items with zero stock: {zero_stock}")
-    print(f"Items below reorder level: {below_reorder}")
-    print(f"Total inventory value: ${total_inventory_value:.2f}")
-    
-    # Write to Unity Catalog bronze layer
-    table_name = f"{catalog_name}.{schema_name}.stock_item_holdings"
-    print(f"Writing to table: {table_name}")
-    
-    stock_holdings_df.write \
-        .mode("overwrite") \
-        .option("mergeSchema", "true") \
-        .saveAsTable(table_name)
-    
-    print(f"✅ StockItemHoldings data successfully written to {table_name}")
-    
-except Exception as e:
-    print(f"❌ Error extracting StockItemHoldings data: {str(e)}")
-    raise
+stock_results = scheduler.run([
+    BRONZE_TABLES["stock_items"],
+    BRONZE_TABLES["stock_item_holdings"],
+    BRONZE_TABLES["stock_groups"],
+    BRONZE_TABLES["stock_item_stock_groups"]
+])
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Extract Stock Groups Data
+# MAGIC ## Reconcile With the Source
+# MAGIC 
+# MAGIC With `reconcile: true`, each table's key range is split into `reconcile_buckets` buckets and a
+# MAGIC checksum over every row's key and version is computed per bucket on SQL Server and over the
+# MAGIC bronze table. Only buckets whose row count or checksum differ are read from the source again
+# MAGIC and replaced in bronze, so verifying a table costs one aggregate query on SQL Server instead of a
+# MAGIC full copy.
 
 # COMMAND ----------
 
-try:
-    # Extract StockGroups data (product categories)
-    print("Starting StockGroups extraction...")
-    
-    stock_groups_query = """
-    SELECT 
-        StockGroupID,
-        StockGroupName,
-        LastEditedBy,
-        ValidFrom,
-        ValidTo
-    FROM Warehouse.StockGroups
-    """
-    
-    stock_groups_df = spark.read \
-        .format("jdbc") \
-        .option("url", jdbc_url) \
-        .option("query", stock_groups_query) \
-        .option("user", sql_username) \
-        .option("password", sql_password) \
-        .option("driver", "com.microsoft.sqlserver.jdbc.SQLServerDriver") \
-        .load()
-    
-    # Add metadata columns
-    stock_groups_df = stock_groups_df \
-        .withColumn("_extract_timestamp", current_timestamp()) \
-        .withColumn("_source_system", lit("WorldWideImporters_SQL")) \
-        .withColumn("_batch_id", lit(f"stock_groups_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
-    
-    print(f"StockGroups extracted: {stock_groups_df.count()} records")
-    
-    # Show stock group names for reference
-    print("Stock Groups found:")
-    stock_groups_df.select("StockGroupName").distinct().show(truncate=False)
-    
-    # Write to Unity Catalog bronze layer
-    table_name = f"{catalog_name}.{schema_name}.stock_groups"
-    print(f"Writing to table: {table_name}")
-    
-    stock_groups_df.write \
-        .mode("overwrite") \
-        .option("mergeSchema", "true") \
-        .saveAsTable(table_name)
-    
-    print(f"✅ StockGroups data successfully written to {table_name}")
-    
-except Exception as e:
-    print(f"❌ Error extracting StockGroups data: {str(e)}")
-    raise
+if reconcile:
+    for table_name in stock_results:
+        engine.reconcile(BRONZE_TABLES[table_name], num_buckets=reconcile_buckets)
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Extract Stock Item Stock Groups (Many-to-Many Relationship)
+# MAGIC ## Refresh Summary Tables
+# MAGIC 
+# MAGIC `stock_inventory_summary`, `stock_price_distribution` and `stock_group_item_counts` hold the
+# MAGIC inventory, price and stock group numbers of the report below, for dashboards too. Each is
+# MAGIC updated from the rows this load changed, read from the Change Data Feed of its bronze table,
+# MAGIC and rebuilt only after a full reload of that table.
 
 # COMMAND ----------
 
-try:
-    # Extract StockItemStockGroups junction table
-    print("Starting StockItemStockGroups extraction...")
-    
-    stock_item_groups_query = """
-    SELECT 
-        StockItemStockGroupID,
-        StockItemID,
-        StockGroupID,
-        LastEditedBy,
-        LastEditedWhen
-    FROM Warehouse.StockItemStockGroups
-    """
-    
-    stock_item_groups_df = spark.read \
-        .format("jdbc") \
-        .option("url", jdbc_url) \
-        .option("query", stock_item_groups_query) \
-        .option("user", sql_username) \
-        .option("password", sql_password) \
-        .option("driver", "com.microsoft.sqlserver.jdbc.SQLServerDriver") \
-        .load()
-    
-    # Add metadata columns
-    stock_item_groups_df = stock_item_groups_df \
-        .withColumn("_extract_timestamp", current_timestamp()) \
-        .withColumn("_source_system", lit("WorldWideImporters_SQL")) \
-        .withColumn("_batch_id", lit(f"stock_item_groups_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"))
-    
-    print(f"StockItemStockGroups extracted: {stock_item_groups_df.count()} records")
-    
-    # Data insights
-    unique_stock_items = stock_item_groups_df.select("StockItemID").distinct().count()
-    unique_stock_groups = stock_item_groups_df.select("StockGroupID").distinct().count()
-    
-    print(f"Stock items with group assignments: {unique_stock_items}")
-    print(f"Stock groups with item assignments: {unique_stock_groups}")
-    
-    # Write to Unity Catalog bronze layer
-    table_name = f"{catalog_name}.{schema_name}.stock_item_stock_groups"
-    print(f"Writing to table: {table_name}")
-    
-    stock_item_groups_df.write \
-        .mode("overwrite") \
-        .option("mergeSchema", "true") \
-        .saveAsTable(table_name)
-    
-    print(f"✅ StockItemStockGroups data successfully written to {table_name}")
-    
-except Exception as e:
-    print(f"❌ Error extracting StockItemStockGroups data: {str(e)}")
-    raise
+SummaryRefresher(engine).refresh_all(STOCK_SUMMARIES.values())
 
 # COMMAND ----------
 
 # MAGIC %md
 # MAGIC ## Data Quality Summary Report
+# MAGIC 
+# MAGIC Row counts come from Delta metadata instead of `COUNT(*)` scans, and every other metric of
+# MAGIC a table is computed in one combined aggregation pass. Business insights are read from the
+# MAGIC summary tables instead of the bronze tables.
 
 # COMMAND ----------
 
@@ -382,90 +203,80 @@ try:
     print(f"Target catalog: {catalog_name}")
     print(f"Target schema: {schema_name}")
     print("")
-    
-    # Get record counts from Unity Catalog tables
-    stock_items_count = spark.sql(f"SELECT COUNT(*) as count FROM {catalog_name}.{schema_name}.stock_items").collect()[0]["count"]
-    stock_holdings_count = spark.sql(f"SELECT COUNT(*) as count FROM {catalog_name}.{schema_name}.stock_item_holdings").collect()[0]["count"]
-    stock_groups_count = spark.sql(f"SELECT COUNT(*) as count FROM {catalog_name}.{schema_name}.stock_groups").collect()[0]["count"]
-    stock_item_groups_count = spark.sql(f"SELECT COUNT(*) as count FROM {catalog_name}.{schema_name}.stock_item_stock_groups").collect()[0]["count"]
-    
+
+    # Temporal tables keep SCD2 history in incremental mode, so their metrics cover current versions only
+    priced = col("UnitPrice") > 0
+
+    stock_items_report = engine.table_report("stock_items", {
+        "current_items": count(lit(1)),
+        "items_with_name": count("StockItemName"),
+        "items_with_price": count(when(priced, 1)),
+        "items_with_brand": count("Brand"),
+        "items_with_size": count("Size"),
+        "items_with_country": count("CustomFieldsParsed.CountryOfManufacture")
+    }, where=current_version())
+    stock_holdings_report = engine.table_report("stock_item_holdings", {})
+    stock_groups_report = engine.table_report("stock_groups", {
+        "current_groups": count(lit(1))
+    }, where=current_version())
+    stock_item_groups_report = engine.table_report("stock_item_stock_groups", {})
+
     print(f"📊 RECORD COUNTS:")
-    print(f"  - Stock Items: {stock_items_count:,}")
-    print(f"  - Stock Holdings: {stock_holdings_count:,}")
-    print(f"  - Stock Groups: {stock_groups_count:,}")
-    print(f"  - Stock Item-Group Relationships: {stock_item_groups_count:,}")
+    print(f"  - Stock Items: {stock_items_report['current_items']:,}")
+    print(f"  - Stock Holdings: {stock_holdings_report['row_count']:,}")
+    print(f"  - Stock Groups: {stock_groups_report['current_groups']:,}")
+    print(f"  - Stock Item-Group Relationships: {stock_item_groups_report['row_count']:,}")
     print("")
-    
+
     # Advanced analytics and insights
     print("📈 BUSINESS INSIGHTS:")
-    
-    # Price analysis
+
+    # Price analysis, from one row per distinct price
     price_stats = spark.sql(f"""
-        SELECT 
-            AVG(UnitPrice) as avg_price,
-            MIN(UnitPrice) as min_price,
-            MAX(UnitPrice) as max_price,
-            STDDEV(UnitPrice) as price_stddev
-        FROM {catalog_name}.{schema_name}.stock_items
-        WHERE UnitPrice > 0
+        SELECT
+            SUM(item_count * UnitPrice) / SUM(item_count) AS avg_price,
+            MIN(UnitPrice) AS min_price,
+            MAX(UnitPrice) AS max_price,
+            SQRT((SUM(item_count * UnitPrice * UnitPrice) - POW(SUM(item_count * UnitPrice), 2) / SUM(item_count)) / (SUM(item_count) - 1)) AS price_stddev
+        FROM {catalog_name}.{schema_name}.stock_price_distribution
     """).collect()[0]
-    
-    print(f"  - Average unit price: ${price_stats['avg_price']:.2f}")
-    print(f"  - Price range: ${price_stats['min_price']:.2f} - ${price_stats['max_price']:.2f}")
-    print(f"  - Price standard deviation: ${price_stats['price_stddev']:.2f}")
-    
+    print(f"  - Average unit price: ${price_stats['avg_price'] or 0:.2f}")
+    print(f"  - Price range: ${price_stats['min_price'] or 0:.2f} - ${price_stats['max_price'] or 0:.2f}")
+    print(f"  - Price standard deviation: ${price_stats['price_stddev'] or 0:.2f}")
+
     # Inventory analysis
-    inventory_stats = spark.sql(f"""
-        SELECT 
-            SUM(QuantityOnHand) as total_quantity,
-            AVG(QuantityOnHand) as avg_quantity,
-            COUNT(CASE WHEN QuantityOnHand = 0 THEN 1 END) as zero_stock_items,
-            COUNT(CASE WHEN QuantityOnHand < ReorderLevel THEN 1 END) as below_reorder_items
-        FROM {catalog_name}.{schema_name}.stock_item_holdings
-    """).collect()[0]
-    
-    print(f"  - Total inventory quantity: {inventory_stats['total_quantity']:,}")
-    print(f"  - Average quantity per item: {inventory_stats['avg_quantity']:.1f}")
-    print(f"  - Items out of stock: {inventory_stats['zero_stock_items']:,}")
-    print(f"  - Items below reorder level: {inventory_stats['below_reorder_items']:,}")
-    
+    inventory = spark.table(f"{catalog_name}.{schema_name}.stock_inventory_summary").collect()[0]
+    print(f"  - Total inventory quantity: {inventory['total_quantity']:,}")
+    print(f"  - Average quantity per item: {inventory['total_quantity'] / inventory['item_count'] if inventory['item_count'] else 0:.1f}")
+    print(f"  - Total inventory value: ${inventory['total_value']:,.2f}")
+    print(f"  - Items out of stock: {inventory['zero_stock_items']:,}")
+    print(f"  - Items below reorder level: {inventory['below_reorder_items']:,}")
+
     # Category distribution
-    category_distribution = spark.sql(f"""
-        SELECT sg.StockGroupName, COUNT(DISTINCT sisg.StockItemID) as item_count
-        FROM {catalog_name}.{schema_name}.stock_groups sg
-        JOIN {catalog_name}.{schema_name}.stock_item_stock_groups sisg ON sg.StockGroupID = sisg.StockGroupID
-        GROUP BY sg.StockGroupName
-        ORDER BY item_count DESC
-        LIMIT 5
-    """).collect()
-    
+    category_distribution = spark.table(f"{catalog_name}.{schema_name}.stock_group_item_counts") \
+        .where(col("StockGroupName").isNotNull()) \
+        .orderBy(col("item_count").desc()) \
+        .limit(5) \
+        .collect()
+
     print(f"  - Top 5 stock group categories:")
     for row in category_distribution:
         print(f"    * {row['StockGroupName']}: {row['item_count']} items")
-    
+
     print("")
     print("🔍 DATA QUALITY METRICS:")
-    
+
     # Data completeness checks
-    completeness_check = spark.sql(f"""
-        SELECT 
-            COUNT(*) as total_items,
-            COUNT(CASE WHEN StockItemName IS NOT NULL THEN 1 END) as items_with_name,
-            COUNT(CASE WHEN UnitPrice > 0 THEN 1 END) as items_with_price,
-            COUNT(CASE WHEN Brand IS NOT NULL THEN 1 END) as items_with_brand,
-            COUNT(CASE WHEN Size IS NOT NULL THEN 1 END) as items_with_size
-        FROM {catalog_name}.{schema_name}.stock_items
-    """).collect()[0]
-    
-    total = completeness_check['total_items']
-    print(f"  - Items with name: {completeness_check['items_with_name']:,} ({completeness_check['items_with_name']/total*100:.1f}%)")
-    print(f"  - Items with price: {completeness_check['items_with_price']:,} ({completeness_check['items_with_price']/total*100:.1f}%)")
-    print(f"  - Items with brand: {completeness_check['items_with_brand']:,} ({completeness_check['items_with_brand']/total*100:.1f}%)")
-    print(f"  - Items with size: {completeness_check['items_with_size']:,} ({completeness_check['items_with_size']/total*100:.1f}%)")
-    
+    total = stock_items_report['current_items']
+    print(f"  - Items with name: {stock_items_report['items_with_name']:,} ({percent(stock_items_report['items_with_name'], total)})")
+    print(f"  - Items with price: {stock_items_report['items_with_price']:,} ({percent(stock_items_report['items_with_price'], total)})")
+    print(f"  - Items with brand: {stock_items_report['items_with_brand']:,} ({percent(stock_items_report['items_with_brand'], total)})")
+    print(f"  - Items with size: {stock_items_report['items_with_size']:,} ({percent(stock_items_report['items_with_size'], total)})")
+    print(f"  - Items with country of manufacture: {stock_items_report['items_with_country']:,} ({percent(stock_items_report['items_with_country'], total)})")
+
     print("")
     print("✅ Stock data extraction completed successfully!")
-    
+
 except Exception as e:
     print(f"❌ Error generating summary report: {str(e)}")
     # Don't raise here as the main extraction was successful
@@ -477,8 +288,11 @@ except Exception as e:
 
 # COMMAND ----------
 
+# Drop staged snapshots and confirm each table was read from SQL Server once
+engine.drop_snapshots()
+
 # Clear sensitive parameters from memory
 sql_password = None
-connection_properties = None
+source.clear_credentials()
 
 print("🧹 Cleanup completed - sensitive data cleared from memory")
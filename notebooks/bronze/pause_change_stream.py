@@ -0,0 +1,60 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Pause or Resume the Change Stream
+# MAGIC 
+# MAGIC The `wwi_bronze_cdc` stream and the nightly `wwi_bronze_etl` loads write the same bronze tables (`orders`, `order_lines`, `stock_item_holdings` and their side tables) and `_etl_watermarks`, so the two never run together.
+# MAGIC The nightly job runs this notebook first to pause the continuous stream job and wait until its run ended, and again after its bronze loads to unpause it - only if it was unpaused before, and also when the loads failed.
+# MAGIC When resumed, the stream continues from the Change Tracking versions in `_etl_cdc_offsets`; re-applying the changes the nightly loads already picked up is harmless.
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `cdc_job_id`: Job ID of `wwi_bronze_cdc`
+# MAGIC - `action`: `pause` or `resume`
+# MAGIC - `timeout_seconds`: How long `pause` waits for the stream's run to end
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import pause_continuous_job, resume_continuous_job
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+dbutils.widgets.text("cdc_job_id", "", "CDC Job ID")
+dbutils.widgets.dropdown("action", "pause", ["pause", "resume"], "Action")
+dbutils.widgets.text("timeout_seconds", "900", "Timeout Seconds")
+
+cdc_job_id = int(dbutils.widgets.get("cdc_job_id"))
+action = dbutils.widgets.get("action")
+timeout_seconds = int(dbutils.widgets.get("timeout_seconds"))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Pause or Resume
+
+# COMMAND ----------
+
+if action == "pause":
+    was_unpaused = pause_continuous_job(cdc_job_id, timeout_seconds=timeout_seconds)
+    # The resume task only unpauses a stream this run paused
+    dbutils.jobs.taskValues.set(key="was_unpaused", value=was_unpaused)
+    print(f"✅ Change stream job {cdc_job_id} paused (was {'running' if was_unpaused else 'already paused'})")
+else:
+    was_unpaused = dbutils.jobs.taskValues.get(
+        taskKey="pause_change_stream", key="was_unpaused", default=False, debugValue=False
+    )
+    if was_unpaused:
+        resume_continuous_job(cdc_job_id)
+        print(f"✅ Change stream job {cdc_job_id} resumed")
+    else:
+        print(f"INFO: Change stream job {cdc_job_id} was paused before this run; leaving it paused")
@@ -0,0 +1,135 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Stream Source Changes to Bronze Layer
+# MAGIC 
+# MAGIC This notebook keeps bronze tables close to real time by streaming SQL Server Change Tracking changes into them, instead of waiting for the nightly batch.
+# MAGIC Each table runs as its own micro-batch stream: every trigger polls the changes after the Change Tracking version stored in `_etl_cdc_offsets` and MERGEs them into bronze.
+# MAGIC 
+# MAGIC ## Tables Streamed (by default):
+# MAGIC - Sales.Orders
+# MAGIC - Sales.OrderLines
+# MAGIC - Warehouse.StockItemHoldings
+# MAGIC 
+# MAGIC Change Tracking must be enabled on the database and on every streamed table. Temporal tables keep their SCD2 history through the nightly incremental loads and can't be streamed.
+# MAGIC 
+# MAGIC The nightly `wwi_bronze_etl` job writes the same tables, so it pauses this job while it loads them (`pause_change_stream.py`) and unpauses it afterwards; the stream then catches up from its stored versions.
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `catalog_name`: Unity Catalog name
+# MAGIC - `schema_name`: Schema name (bronze)
+# MAGIC - `sql_server_host`: SQL Server hostname
+# MAGIC - `sql_database_name`: SQL Database name
+# MAGIC - `sql_username`: SQL Server username
+# MAGIC - `sql_password`: SQL Server password
+# MAGIC - `tables`: Comma-separated registry names of the tables to stream
+# MAGIC - `trigger_interval`: How often SQL Server is polled for changes, e.g. `1 minute`
+# MAGIC - `max_rows_per_batch`: Back-pressure: changed rows applied per micro-batch; larger backlogs are worked off over several batches
+# MAGIC - `checkpoint_root`: Folder holding one streaming checkpoint per table (default: the `checkpoints` volume of the bronze schema)
+# MAGIC - `vertical_split`: `true` keeps wide columns in their side tables, as the batch job does
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import ChangeStream, ExtractionEngine, SqlServerSource, get_table
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+# Get parameters from widget or job parameters
+dbutils.widgets.text("catalog_name", "don_datalab_catalog", "Catalog Name")
+dbutils.widgets.text("schema_name", "bronze", "Schema Name")
+dbutils.widgets.text("sql_server_host", "", "SQL Server Host")
+dbutils.widgets.text("sql_database_name", "WorldWideImporters", "SQL Database Name")
+dbutils.widgets.text("sql_username", "", "SQL Username")
+dbutils.widgets.text("sql_password", "", "SQL Password")
+dbutils.widgets.text("tables", "orders,order_lines,stock_item_holdings", "Tables")
+dbutils.widgets.text("trigger_interval", "1 minute", "Trigger Interval")
+dbutils.widgets.text("max_rows_per_batch", "50000", "Max Rows per Batch")
+dbutils.widgets.text("checkpoint_root", "", "Checkpoint Root")
+dbutils.widgets.dropdown("vertical_split", "false", ["true", "false"], "Vertical Split")
+
+# Get parameter values
+catalog_name = dbutils.widgets.get("catalog_name")
+schema_name = dbutils.widgets.get("schema_name")
+sql_server_host = dbutils.widgets.get("sql_server_host")
+sql_database_name = dbutils.widgets.get("sql_database_name")
+sql_username = dbutils.widgets.get("sql_username")
+sql_password = dbutils.widgets.get("sql_password")
+table_names = [name.strip() for name in dbutils.widgets.get("tables").split(",") if name.strip()]
+trigger_interval = dbutils.widgets.get("trigger_interval")
+max_rows_per_batch = int(dbutils.widgets.get("max_rows_per_batch"))
+checkpoint_root = dbutils.widgets.get("checkpoint_root") or f"/Volumes/{catalog_name}/{schema_name}/checkpoints/cdc"
+vertical_split = dbutils.widgets.get("vertical_split") == "true"
+
+print(f"Target: {catalog_name}.{schema_name}")
+print(f"Source: {sql_server_host}/{sql_database_name}")
+print(f"Streaming: {', '.join(table_names)} every {trigger_interval}, at most {max_rows_per_batch} rows per batch")
+print(f"Checkpoints: {checkpoint_root}")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Extraction Engine Setup
+# MAGIC 
+# MAGIC The engine runs in `full` mode: it is only used to take a snapshot of a table when its stream
+# MAGIC starts without a stored offset, or after the offset fell behind the Change Tracking retention.
+
+# COMMAND ----------
+
+source = SqlServerSource(
+    spark,
+    host=sql_server_host,
+    database=sql_database_name,
+    user=sql_username,
+    password=sql_password
+)
+
+engine = ExtractionEngine(
+    spark,
+    source,
+    catalog_name=catalog_name,
+    schema_name=schema_name,
+    load_mode="full",
+    vertical_split=vertical_split,
+    # Re-clustering after every micro-batch would cost more than the MERGE; the nightly job does it
+    optimize_after_merge=False
+)
+
+# Create catalog, schema and control tables if they don't exist
+engine.setup()
+spark.sql(f"CREATE VOLUME IF NOT EXISTS {catalog_name}.{schema_name}.checkpoints")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Start the Streams
+# MAGIC 
+# MAGIC Every micro-batch MERGEs deletes and upserts on the primary key, so applying a batch twice
+# MAGIC leaves bronze unchanged, and the stored Change Tracking version only advances after the MERGEs
+# MAGIC committed. Micro-batches replayed from the checkpoint after a restart are skipped.
+
+# COMMAND ----------
+
+streams = [
+    ChangeStream(
+        engine,
+        get_table(table_name),
+        checkpoint_location=f"{checkpoint_root}/{table_name}",
+        trigger_interval=trigger_interval,
+        max_rows_per_batch=max_rows_per_batch
+    ).start()
+    for table_name in table_names
+]
+
+# Block until a stream fails (or the run is cancelled); the job then restarts the notebook
+spark.streams.awaitAnyTermination()
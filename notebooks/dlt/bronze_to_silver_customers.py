@@ -0,0 +1,31 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Bronze to Silver: Customers
+# MAGIC 
+# MAGIC Part of the `wwi_dlt_pipeline` Delta Live Tables pipeline. Keeps silver.customers up to date from the Change Data Feed of bronze.customers.
+# MAGIC Each update reads only the bronze commits since the previous update and upserts the changed rows on the primary key, so its cost follows the number of changed rows, not the size of bronze.
+# MAGIC 
+# MAGIC ## Table Refreshed:
+# MAGIC - silver.customers (from bronze.customers, keyed by `CustomerID`)
+# MAGIC 
+# MAGIC bronze.customers keeps SCD2 history; silver holds only the current version of each customer, and customers deleted at the source are removed.
+# MAGIC 
+# MAGIC ## Pipeline Configuration:
+# MAGIC - `source_schema`: Schema of the bronze tables (bronze)
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import BRONZE_TABLES, declare_silver_table
+
+# COMMAND ----------
+
+source_schema = spark.conf.get("source_schema", "bronze")
+
+declare_silver_table(spark, BRONZE_TABLES["customers"], source_schema)
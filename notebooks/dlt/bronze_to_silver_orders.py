@@ -0,0 +1,31 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Bronze to Silver: Orders
+# MAGIC 
+# MAGIC Part of the `wwi_dlt_pipeline` Delta Live Tables pipeline. Keeps the silver orders tables up to date from the Change Data Feed of their bronze tables.
+# MAGIC Each update reads only the bronze commits since the previous update and upserts the changed rows on the primary key, so its cost follows the number of changed rows, not the size of bronze.
+# MAGIC 
+# MAGIC ## Tables Refreshed:
+# MAGIC - silver.orders (from bronze.orders, keyed by `OrderID`)
+# MAGIC - silver.order_lines (from bronze.order_lines, keyed by `OrderLineID`)
+# MAGIC 
+# MAGIC ## Pipeline Configuration:
+# MAGIC - `source_schema`: Schema of the bronze tables (bronze)
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import BRONZE_TABLES, declare_silver_table
+
+# COMMAND ----------
+
+source_schema = spark.conf.get("source_schema", "bronze")
+
+for table_name in ["orders", "order_lines"]:
+    declare_silver_table(spark, BRONZE_TABLES[table_name], source_schema)
@@ -0,0 +1,35 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Bronze to Silver: Stock Items
+# MAGIC 
+# MAGIC Part of the `wwi_dlt_pipeline` Delta Live Tables pipeline. Keeps the silver stock item tables up to date from the Change Data Feed of their bronze tables.
+# MAGIC Each update reads only the bronze commits since the previous update and upserts the changed rows on the primary key, so its cost follows the number of changed rows, not the size of bronze.
+# MAGIC 
+# MAGIC ## Tables Refreshed:
+# MAGIC - silver.stock_items (from bronze.stock_items, keyed by `StockItemID`)
+# MAGIC - silver.stock_groups (from bronze.stock_groups, keyed by `StockGroupID`)
+# MAGIC - silver.stock_item_stock_groups (from bronze.stock_item_stock_groups, keyed by `StockItemStockGroupID`)
+# MAGIC - silver.stock_item_holdings (from bronze.stock_item_holdings, keyed by `StockItemID`)
+# MAGIC 
+# MAGIC `stock_items` and `stock_groups` keep SCD2 history in bronze; silver holds only the current version of each row, and rows deleted at the source are removed.
+# MAGIC 
+# MAGIC ## Pipeline Configuration:
+# MAGIC - `source_schema`: Schema of the bronze tables (bronze)
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import BRONZE_TABLES, declare_silver_table
+
+# COMMAND ----------
+
+source_schema = spark.conf.get("source_schema", "bronze")
+
+for table_name in ["stock_items", "stock_groups", "stock_item_stock_groups", "stock_item_holdings"]:
+    declare_silver_table(spark, BRONZE_TABLES[table_name], source_schema)
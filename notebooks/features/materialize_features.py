@@ -0,0 +1,120 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Materialize Serving Features
+# MAGIC 
+# MAGIC This notebook computes the online features of the `wwi-analytics` serving endpoint from the bronze layer and
+# MAGIC exports them as memory-mapped feature files. The feature sets are declared in `src/datalab_etl/features.py`.
+# MAGIC 
+# MAGIC ## Feature Sets:
+# MAGIC - `customer_features`: order count, total spend, recent order count and spend, last order date
+# MAGIC - `stock_item_features`: stock on hand, reorder level and their ratio, unit price, recent units sold, last sale date
+# MAGIC 
+# MAGIC ## Parameters:
+# MAGIC - `catalog_name`: Unity Catalog name
+# MAGIC - `schema_name`: Schema holding the bronze tables; feature tables are written here
+# MAGIC - `recent_days`: Window of the `recent_*` features, counted back from today
+# MAGIC - `export_dir`: Directory of the feature files (default: the `features` volume of the schema)
+
+# COMMAND ----------
+
+# Import required libraries
+import os
+import sys
+import time
+
+# Make the shared extraction package importable from the bundle's src/ folder
+sys.path.append(os.path.abspath("../../src"))
+
+from datalab_etl import FEATURE_SETS, ExtractionEngine, FeatureLookup, FeatureMaterializer, OrderLineFacts
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Parameters
+
+# COMMAND ----------
+
+# Get parameters from widget or job parameters
+dbutils.widgets.text("catalog_name", "don_datalab_catalog", "Catalog Name")
+dbutils.widgets.text("schema_name", "bronze", "Schema Name")
+dbutils.widgets.text("recent_days", "90", "Recent Window (days)")
+dbutils.widgets.text("export_dir", "", "Feature File Directory")
+
+# Get parameter values
+catalog_name = dbutils.widgets.get("catalog_name")
+schema_name = dbutils.widgets.get("schema_name")
+recent_days = int(dbutils.widgets.get("recent_days"))
+export_dir = dbutils.widgets.get("export_dir") or f"/Volumes/{catalog_name}/{schema_name}/features"
+
+print(f"Target: {catalog_name}.{schema_name}")
+print(f"Feature files: {export_dir} (recent window: {recent_days} days)")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Engine Setup
+# MAGIC 
+# MAGIC Features are computed from bronze only, so the engine gets no SQL Server source.
+
+# COMMAND ----------
+
+engine = ExtractionEngine(
+    spark,
+    None,
+    catalog_name=catalog_name,
+    schema_name=schema_name
+)
+
+# Create catalog, schema and control tables if they don't exist
+engine.setup()
+spark.sql(f"CREATE VOLUME IF NOT EXISTS {catalog_name}.{schema_name}.features")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Refresh the Order Line Fact Table
+# MAGIC 
+# MAGIC Both feature sets aggregate `order_line_facts`. It is refreshed here again because the stock items of this run
+# MAGIC were loaded in parallel with the orders; only the orders of changed stock items are rebuilt.
+
+# COMMAND ----------
+
+OrderLineFacts(engine).refresh()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Refresh Feature Tables and Files
+# MAGIC 
+# MAGIC Only the keys whose features may have changed are recomputed: keys in the Change Data Feed of a source table
+# MAGIC since the last refresh, and keys with orders that left the recent window since then. They are MERGEd into the
+# MAGIC Delta feature table, which is then exported to `<export_dir>/<feature set>.npy` with a `.json` sidecar. Files
+# MAGIC are replaced by a rename, so readers never see a partial file.
+
+# COMMAND ----------
+
+materializer = FeatureMaterializer(engine, export_dir, recent_days=recent_days)
+materializer.refresh_all(FEATURE_SETS.values())
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Lookup Check
+# MAGIC 
+# MAGIC Opens each exported file the way the serving model does and times a batch lookup of its first keys.
+
+# COMMAND ----------
+
+for feature_set in FEATURE_SETS.values():
+    path = materializer.file_path(feature_set)
+    if not os.path.exists(path):
+        print(f"WARNING: {path} was not exported")
+        continue
+    lookup = FeatureLookup(path)
+    keys = lookup.keys[:1000]
+    start = time.perf_counter()
+    records, found = lookup.lookup(keys)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{feature_set.name}: {len(lookup.keys)} keys, {found.sum()}/{len(keys)} found in {elapsed_ms:.3f} ms")
+    if len(keys):
+        print(f"  {lookup.key_field}={keys[0]}: {lookup.get(int(keys[0]))}")
@@ -2,43 +2,133 @@
 
 # Databricks init script to install SQL Server JDBC driver
 # This script ensures the Microsoft SQL Server JDBC driver is available for all notebooks
+#
+# Artifacts listed in artifacts.manifest are copied from the artifact cache volume and verified
+# against their pinned SHA-256, so a cold node start doesn't touch the network. An artifact that
+# isn't pinned or staged fails the cluster start, unless ALLOW_UNPINNED_ARTIFACTS=true lets it
+# fall back to its Maven Central / PyPI source. A checksum mismatch always fails the cluster start.
+#
+# Environment (set through the cluster's spark_env_vars):
+#   ARTIFACT_CACHE            cache volume holding the staged artifacts (see stage-artifacts.sh)
+#   ARTIFACT_MANIFEST         pinned manifest, deployed next to this script
+#   ALLOW_UNPINNED_ARTIFACTS  "true" to download unpinned or unstaged artifacts from their source
 
-echo "Starting SQL Server JDBC driver installation..."
+ARTIFACT_MANIFEST="${ARTIFACT_MANIFEST:-/Workspace/databricks/init-scripts/artifacts.manifest}"
+ALLOW_UNPINNED_ARTIFACTS="${ALLOW_UNPINNED_ARTIFACTS:-false}"
+JARS_DIR="/databricks/jars"
+PIP="/databricks/python/bin/pip"
 
-# Create directory for custom drivers if it doesn't exist
-mkdir -p /databricks/jars
-
-# Download Microsoft SQL Server JDBC driver if not already present
-JDBC_JAR="/databricks/jars/mssql-jdbc-12.4.2.jre8.jar"
-
-if [ ! -f "$JDBC_JAR" ]; then
-    echo "Downloading Microsoft SQL Server JDBC driver..."
-    
-    # Download the JDBC driver
-    wget -O "$JDBC_JAR" "https://repo1.maven.org/maven2/com/microsoft/sqlserver/mssql-jdbc/12.4.2.jre8/mssql-jdbc-12.4.2.jre8.jar"
-    
-    if [ $? -eq 0 ]; then
-        echo "✅ SQL Server JDBC driver downloaded successfully"
-        chmod 644 "$JDBC_JAR"
-    else
-        echo "❌ Failed to download SQL Server JDBC driver"
+SCRIPT_START=$(date +%s%3N)
+PHASE_START=$SCRIPT_START
+
+# Log how long the phase since the previous call took, so cold start overhead shows in the init script log
+phase_done() {
+    local now
+    now=$(date +%s%3N)
+    echo "⏱️  $1: $((now - PHASE_START)) ms"
+    PHASE_START=$now
+}
+
+# Fail the start if a file doesn't match its pinned checksum
+verify_sha256() {
+    local file="$1" expected="$2" actual
+    actual=$(sha256sum "$file" | cut -d' ' -f1)
+    if [ "$actual" != "$expected" ]; then
+        echo "❌ Checksum mismatch for $file: expected $expected, got $actual"
+        rm -f "$file"
         exit 1
     fi
-else
-    echo "✅ SQL Server JDBC driver already exists"
+}
+
+echo "Starting SQL Server JDBC driver installation..."
+
+if [ -z "$ARTIFACT_CACHE" ]; then
+    echo "❌ ARTIFACT_CACHE is not set; add it to the cluster's spark_env_vars"
+    exit 1
 fi
+echo "Artifact cache: $ARTIFACT_CACHE"
 
-# Verify the driver file
-if [ -f "$JDBC_JAR" ]; then
-    echo "JDBC driver size: $(du -h $JDBC_JAR | cut -f1)"
-    echo "JDBC driver path: $JDBC_JAR"
-else
-    echo "❌ JDBC driver verification failed"
+# Create directory for custom drivers if it doesn't exist
+mkdir -p "$JARS_DIR"
+
+if [ ! -f "$ARTIFACT_MANIFEST" ]; then
+    echo "❌ Artifact manifest not found at $ARTIFACT_MANIFEST"
     exit 1
 fi
+phase_done "prepare"
+
+while read -r kind sha256 file source; do
+    case "$kind" in
+        ""|\#*) continue ;;
+    esac
+
+    if [ "$sha256" != "unpinned" ] && [ -f "$ARTIFACT_CACHE/$file" ]; then
+        # Hot path: pinned and staged, no network access
+        if [ "$kind" = "jar" ]; then
+            if [ -f "$JARS_DIR/$file" ] && [ "$(sha256sum "$JARS_DIR/$file" | cut -d' ' -f1)" = "$sha256" ]; then
+                echo "✅ $file already installed"
+            else
+                cp "$ARTIFACT_CACHE/$file" "$JARS_DIR/$file"
+                verify_sha256 "$JARS_DIR/$file" "$sha256"
+                echo "✅ $file installed from the artifact cache"
+            fi
+        else
+            wheel_copy="/tmp/$file"
+            cp "$ARTIFACT_CACHE/$file" "$wheel_copy"
+            verify_sha256 "$wheel_copy" "$sha256"
+            if ! "$PIP" install --quiet --no-index --no-deps "$wheel_copy" < /dev/null; then
+                echo "❌ Failed to install $file"
+                exit 1
+            fi
+            echo "✅ $file installed from the artifact cache"
+        fi
+    elif [ "$ALLOW_UNPINNED_ARTIFACTS" != "true" ]; then
+        if [ "$sha256" = "unpinned" ]; then
+            echo "❌ $source is not pinned in $ARTIFACT_MANIFEST; run stage-artifacts.sh and commit the manifest"
+        else
+            echo "❌ $file is not staged in $ARTIFACT_CACHE; run stage-artifacts.sh"
+        fi
+        echo "   (set ALLOW_UNPINNED_ARTIFACTS=true in the cluster's spark_env_vars to download it from its source instead)"
+        exit 1
+    else
+        # Cold path, opted in: resolve from the public source, still verified when pinned
+        echo "⚠️  $source is not pinned or staged, downloading it because ALLOW_UNPINNED_ARTIFACTS=true"
+        if [ "$kind" = "jar" ]; then
+            if ! wget -q -O "$JARS_DIR/$file" "$source" < /dev/null; then
+                echo "❌ Failed to download $source"
+                exit 1
+            fi
+            if [ "$sha256" != "unpinned" ]; then
+                verify_sha256 "$JARS_DIR/$file" "$sha256"
+            fi
+            echo "✅ $file downloaded successfully"
+        else
+            wheel_dir=$(mktemp -d)
+            if ! "$PIP" download --quiet --no-deps --only-binary=:all: -d "$wheel_dir" "$source" < /dev/null; then
+                echo "❌ Failed to download $source"
+                exit 1
+            fi
+            wheel_copy=$(ls "$wheel_dir"/*.whl)
+            if [ "$sha256" != "unpinned" ]; then
+                verify_sha256 "$wheel_copy" "$sha256"
+            fi
+            if ! "$PIP" install --quiet --no-index --no-deps "$wheel_copy" < /dev/null; then
+                echo "❌ Failed to install $source"
+                exit 1
+            fi
+            echo "✅ $source installed from PyPI"
+        fi
+    fi
 
-# Set proper permissions
-chown root:root "$JDBC_JAR"
-chmod 644 "$JDBC_JAR"
+    if [ "$kind" = "jar" ]; then
+        # Set proper permissions
+        chown root:root "$JARS_DIR/$file"
+        chmod 644 "$JARS_DIR/$file"
+        echo "JDBC driver size: $(du -h "$JARS_DIR/$file" | cut -f1)"
+        echo "JDBC driver path: $JARS_DIR/$file"
+    fi
+    phase_done "install $kind $file"
+done < "$ARTIFACT_MANIFEST"
 
+echo "⏱️  total: $(($(date +%s%3N) - SCRIPT_START)) ms"
 echo "✅ SQL Server JDBC driver installation completed successfully"
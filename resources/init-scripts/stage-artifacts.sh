@@ -0,0 +1,64 @@
+#!/bin/bash
+
+# Stage the artifacts in artifacts.manifest into the artifact cache volume and pin their SHA-256.
+#
+# Run from a workstation with the Databricks CLI authenticated against the workspace:
+#   resources/init-scripts/stage-artifacts.sh <catalog> <schema>
+#
+# Jars are downloaded from Maven Central and checked against Maven's published SHA-1, wheels are
+# downloaded from PyPI for the cluster Python (DBR 13.3: CPython 3.10, manylinux x86_64). Each
+# file is uploaded to /Volumes/<catalog>/<schema>/artifacts and the manifest is rewritten with
+# its file name and SHA-256. Commit the manifest and redeploy the init scripts afterwards.
+
+set -euo pipefail
+
+if [ $# -ne 2 ]; then
+    echo "Usage: $0 <catalog> <schema>"
+    exit 1
+fi
+
+CATALOG="$1"
+SCHEMA="$2"
+MANIFEST="$(cd "$(dirname "$0")" && pwd)/artifacts.manifest"
+VOLUME_PATH="dbfs:/Volumes/$CATALOG/$SCHEMA/artifacts"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "Staging artifacts into $VOLUME_PATH..."
+databricks volumes create "$CATALOG" "$SCHEMA" artifacts MANAGED > /dev/null 2>&1 || true
+
+while IFS= read -r line; do
+    read -r kind _ _ source <<< "$line"
+    case "$kind" in
+        ""|\#*)
+            echo "$line" >> "$WORK_DIR/manifest"
+            continue
+            ;;
+    esac
+
+    if [ "$kind" = "jar" ]; then
+        file=$(basename "$source")
+        curl -fsSL -o "$WORK_DIR/$file" "$source"
+        expected_sha1=$(curl -fsSL "$source.sha1" | cut -d' ' -f1)
+        if [ "$(sha1sum "$WORK_DIR/$file" | cut -d' ' -f1)" != "$expected_sha1" ]; then
+            echo "❌ $file doesn't match the SHA-1 published on Maven Central"
+            exit 1
+        fi
+    else
+        mkdir -p "$WORK_DIR/wheel"
+        rm -f "$WORK_DIR"/wheel/*
+        pip download --quiet --no-deps --only-binary=:all: \
+            --implementation cp --python-version 3.10 --platform manylinux2014_x86_64 \
+            -d "$WORK_DIR/wheel" "$source" < /dev/null
+        file=$(basename "$(ls "$WORK_DIR"/wheel/*.whl)")
+        mv "$WORK_DIR/wheel/$file" "$WORK_DIR/$file"
+    fi
+
+    sha256=$(sha256sum "$WORK_DIR/$file" | cut -d' ' -f1)
+    databricks fs cp --overwrite "$WORK_DIR/$file" "$VOLUME_PATH/$file" < /dev/null
+    echo "$kind $sha256 $file $source" >> "$WORK_DIR/manifest"
+    echo "✅ $file staged (sha256 $sha256)"
+done < "$MANIFEST"
+
+cp "$WORK_DIR/manifest" "$MANIFEST"
+echo "✅ Pinned checksums written to $MANIFEST; commit it and redeploy the init scripts"
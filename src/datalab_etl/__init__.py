@@ -0,0 +1,79 @@
+"""Shared extraction code for the WorldWideImporters bronze layer notebooks.
+
+Notebooks make the package importable from the bundle's `src/` folder and drive every table
+through one `ExtractionEngine`, using the declarations in `registry.BRONZE_TABLES`.
+"""
+
+from .benchmark import benchmark_layouts, benchmark_lookups, benchmark_queries, benchmark_schemas
+from .control import ChangeOffsetStore, JdbcTuningStore, JsonSchemaStore, RunCheckpointStore, RunMetricsStore, WatermarkStore
+from .engine import OPEN_VALID_TO, ExtractionEngine, ExtractionResult, current_version
+from .facts import ORDER_LINE_FACTS, OrderLineFacts
+from .feature_store import FeatureLookup
+from .features import FEATURE_SETS, FeatureMaterializer, FeatureSet
+from .json_projection import JsonProjector
+from .layout import ORDER_LINE_FACT_LAYOUT, ORDER_LINES_LAYOUTS, ORDERS_LAYOUTS, TableLayout
+from .metrics import StageRecorder, TaskMetricsCollector
+from .reconcile import RECONCILE_BUCKETS, ReconcileResult, Reconciler
+from .registry import BRONZE_TABLES, TableSpec, get_table
+from .report import delta_row_count, percent, table_report
+from .scheduler import ConnectionLimiter, ExtractionScheduler
+from .silver import change_feed, declare_silver_table
+from .source import SqlServerSource, TableSize, build_range_predicates, split_histogram
+from .streaming import ChangeStream, pause_continuous_job, resume_continuous_job
+from .summaries import STOCK_SUMMARIES, SummaryRefresher, SummaryTable
+from .tuning import JdbcSettings, JdbcTuner
+
+__all__ = [
+    "BRONZE_TABLES",
+    "FEATURE_SETS",
+    "OPEN_VALID_TO",
+    "ORDERS_LAYOUTS",
+    "ORDER_LINE_FACTS",
+    "ORDER_LINE_FACT_LAYOUT",
+    "ORDER_LINES_LAYOUTS",
+    "RECONCILE_BUCKETS",
+    "STOCK_SUMMARIES",
+    "ChangeOffsetStore",
+    "ChangeStream",
+    "ConnectionLimiter",
+    "ExtractionEngine",
+    "ExtractionResult",
+    "ExtractionScheduler",
+    "FeatureLookup",
+    "FeatureMaterializer",
+    "FeatureSet",
+    "JdbcSettings",
+    "JdbcTuner",
+    "JdbcTuningStore",
+    "JsonProjector",
+    "JsonSchemaStore",
+    "OrderLineFacts",
+    "ReconcileResult",
+    "Reconciler",
+    "RunCheckpointStore",
+    "RunMetricsStore",
+    "SqlServerSource",
+    "StageRecorder",
+    "SummaryRefresher",
+    "SummaryTable",
+    "TableLayout",
+    "TableSize",
+    "TaskMetricsCollector",
+    "TableSpec",
+    "WatermarkStore",
+    "benchmark_layouts",
+    "benchmark_lookups",
+    "benchmark_queries",
+    "benchmark_schemas",
+    "build_range_predicates",
+    "change_feed",
+    "current_version",
+    "declare_silver_table",
+    "delta_row_count",
+    "get_table",
+    "pause_continuous_job",
+    "percent",
+    "resume_continuous_job",
+    "split_histogram",
+    "table_report",
+]
@@ -0,0 +1,230 @@
+"""Benchmarks comparing physical layouts of bronze tables."""
+
+import time
+import uuid
+from typing import Any, Dict, List, Sequence
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+from .engine import ExtractionEngine
+from .layout import TableLayout, add_derived_columns, optimize_layout, write_with_layout
+from .metrics import TaskMetricsCollector
+from .registry import TableSpec
+
+
+def table_file_stats(spark: SparkSession, table: str) -> Dict[str, Any]:
+    """File count and size of a Delta table, from its metadata."""
+    detail = spark.sql(f"DESCRIBE DETAIL {table}").collect()[0]
+    num_files = detail["numFiles"] or 0
+    size_bytes = detail["sizeInBytes"] or 0
+    return {
+        "num_files": num_files,
+        "size_mb": round(size_bytes / 1024 / 1024, 1),
+        "avg_file_mb": round(size_bytes / num_files / 1024 / 1024, 2) if num_files else 0.0,
+    }
+
+
+def time_query(spark: SparkSession, table: str, predicate: str, runs: int = 3) -> float:
+    """Best wall-clock time in seconds to scan the rows of `table` matching `predicate`.
+
+    The result is written to the `noop` sink, so every matching row is read without being
+    collected to the driver.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        spark.table(table).where(predicate).write.format("noop").mode("overwrite").save()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings), 3)
+
+
+def benchmark_layouts(
+    spark: SparkSession,
+    source_table: str,
+    layouts: Dict[str, TableLayout],
+    target_prefix: str,
+    queries: Dict[str, str],
+    runs: int = 3,
+    keep_tables: bool = False,
+) -> List[Dict[str, Any]]:
+    """Copy `source_table` into one table per layout and time the same queries against each.
+
+    Each copy is written the way a full load writes it and then optimized the way incremental
+    loads leave it, so the timings reflect the steady state. Returns one row per layout with
+    write time, file statistics and the best time of each query in `queries` (name -> predicate).
+    """
+    # Measure storage layout, not the disk cache of an earlier run
+    spark.conf.set("spark.databricks.io.cache.enabled", "false")
+    source = spark.table(source_table)
+
+    results = []
+    for name, layout in layouts.items():
+        table = f"{target_prefix}_{name}"
+        print(f"Benchmarking layout '{name}' in {table}...")
+
+        start = time.perf_counter()
+        write_with_layout(spark, add_derived_columns(source, layout), table, layout)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        optimize_layout(spark, table, layout)
+        optimize_seconds = time.perf_counter() - start
+
+        row = {
+            "layout": name,
+            "write_s": round(write_seconds, 1),
+            "optimize_s": round(optimize_seconds, 1),
+            **table_file_stats(spark, table),
+        }
+        for query_name, predicate in queries.items():
+            row[f"{query_name}_s"] = time_query(spark, table, predicate, runs)
+        results.append(row)
+
+        if not keep_tables:
+            spark.sql(f"DROP TABLE IF EXISTS {table}")
+
+    return results
+
+
+def benchmark_lookups(
+    spark: SparkSession,
+    source: DataFrame,
+    layouts: Dict[str, TableLayout],
+    target_prefix: str,
+    lookups: Dict[str, str],
+    runs: int = 3,
+    keep_tables: bool = False,
+) -> List[Dict[str, Any]]:
+    """Write `source` with each layout and measure how well point lookups skip its files.
+
+    Each copy is written and optimized like `benchmark_layouts`. Returns one row per layout and
+    lookup (name -> predicate) with the table's file count, the files the lookup read and pruned
+    (from the scan's SQL metrics, None without the Spark UI API), the share of files skipped by
+    partition pruning, min/max statistics and Bloom filters, and the best time to fetch the rows.
+    """
+    spark.conf.set("spark.databricks.io.cache.enabled", "false")
+    collector = TaskMetricsCollector(spark)
+
+    results = []
+    for name, layout in layouts.items():
+        table = f"{target_prefix}_{name}"
+        print(f"Benchmarking lookups on layout '{name}' in {table}...")
+        write_with_layout(spark, add_derived_columns(source, layout), table, layout)
+        optimize_layout(spark, table, layout)
+        num_files = table_file_stats(spark, table)["num_files"]
+
+        for lookup, predicate in lookups.items():
+            timings = []
+            for _ in range(runs):
+                group_id = f"lookup_{name}_{lookup}_{uuid.uuid4().hex[:8]}"
+                start = time.perf_counter()
+                with collector.job_group(group_id, f"Lookup {lookup} on {name}"):
+                    rows = len(spark.table(table).where(predicate).collect())
+                timings.append(time.perf_counter() - start)
+            metrics = collector.sql_metrics(group_id)
+            files_read = metrics.get("number of files read") if metrics else None
+            results.append({
+                "layout": name,
+                "lookup": lookup,
+                "rows": rows,
+                "num_files": num_files,
+                "files_read": files_read,
+                "files_skipped_pct": round((1 - files_read / num_files) * 100, 1) if files_read is not None and num_files else None,
+                # Files the scan opened but skipped, e.g. by their Bloom filter, where the runtime reports it
+                "files_pruned": sum(value for key, value in metrics.items() if "files pruned" in key) if metrics else None,
+                "best_s": round(min(timings), 3),
+            })
+
+        if not keep_tables:
+            spark.sql(f"DROP TABLE IF EXISTS {table}")
+
+    return results
+
+
+def benchmark_queries(spark: SparkSession, queries: Dict[str, str], runs: int = 3) -> List[Dict[str, Any]]:
+    """Time SQL queries and measure the data each one shuffles.
+
+    Every query is written to the `noop` sink `runs` times; returns one row per query with the
+    best time and the shuffle bytes and task count of the last run (None without the Spark UI API).
+    """
+    spark.conf.set("spark.databricks.io.cache.enabled", "false")
+    collector = TaskMetricsCollector(spark)
+
+    results = []
+    for name, query in queries.items():
+        print(f"Benchmarking query '{name}'...")
+        timings = []
+        for _ in range(runs):
+            group_id = f"benchmark_{name}_{uuid.uuid4().hex[:8]}"
+            start = time.perf_counter()
+            with collector.job_group(group_id, f"Benchmark {name}"):
+                spark.sql(query).write.format("noop").mode("overwrite").save()
+            timings.append(time.perf_counter() - start)
+        metrics = collector.collect(group_id)
+        results.append({
+            "query": name,
+            "best_s": round(min(timings), 3),
+            "shuffle_read_bytes": metrics["shuffle_read_bytes"],
+            "shuffle_write_bytes": metrics["shuffle_write_bytes"],
+            "num_tasks": metrics["num_tasks"],
+        })
+    return results
+
+
+def benchmark_schemas(
+    engine: ExtractionEngine,
+    specs: Sequence[TableSpec],
+    target_prefix: str,
+    runs: int = 3,
+    keep_tables: bool = False,
+) -> List[Dict[str, Any]]:
+    """Load each table twice, with the default JDBC type mapping and with its checked column types.
+
+    Both copies are written with the table's layout; returns one row per table with the columns
+    whose type changed, the size of each copy and the best time of an aggregation over every
+    declared column (SUM of numbers, MAX of dates).
+    """
+    spark = engine.spark
+    spark.conf.set("spark.databricks.io.cache.enabled", "false")
+
+    results = []
+    for spec in specs:
+        custom_schema = engine.custom_schema(spec)
+        if not custom_schema:
+            print(f"Skipping {spec.name}: no usable column types")
+            continue
+        print(f"Benchmarking the column types of {spec.name}...")
+        row: Dict[str, Any] = {"table": spec.name}
+        schemas = {}
+        for variant, schema in (("default", None), ("narrowed", custom_schema)):
+            table = f"{target_prefix}_{spec.name}_{variant}"
+            df = engine.source.read(spec.split_source_query, custom_schema=schema)
+            schemas[variant] = {field.name: field.dataType.simpleString() for field in df.schema.fields}
+            write_with_layout(spark, add_derived_columns(df, spec.layout), table, spec.layout)
+
+            aggregates = [F.count(F.lit(1))]
+            for column, sql_type in spec.column_types:
+                aggregates.append(F.max(column) if sql_type in ("DATE", "TIMESTAMP") else F.sum(column))
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                spark.table(table).agg(*aggregates).write.format("noop").mode("overwrite").save()
+                timings.append(time.perf_counter() - start)
+
+            stats = table_file_stats(spark, table)
+            row[f"{variant}_mb"] = stats["size_mb"]
+            row[f"{variant}_files"] = stats["num_files"]
+            row[f"{variant}_aggregate_s"] = round(min(timings), 3)
+            if not keep_tables:
+                spark.sql(f"DROP TABLE IF EXISTS {table}")
+
+        row["changed_columns"] = ", ".join(
+            f"{column}: {schemas['default'][column]} -> {data_type}"
+            for column, data_type in schemas["narrowed"].items()
+            if schemas["default"].get(column) != data_type
+        ) or "none"
+        row["size_change"] = f"{(row['narrowed_mb'] / row['default_mb'] - 1) * 100:+.1f}%" if row["default_mb"] else "n/a"
+        results.append(row)
+
+    return results
@@ -0,0 +1,250 @@
+"""Control tables that carry extraction state from one run to the next."""
+
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from delta.tables import DeltaTable
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import col, current_timestamp
+
+
+class WatermarkStore:
+    """Per-table high-water marks kept in the `_etl_watermarks` Delta table."""
+
+    def __init__(self, spark: SparkSession, table: str):
+        self.spark = spark
+        self.table = table
+
+    def ensure(self) -> None:
+        self.spark.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                table_name STRING,
+                watermark_column STRING,
+                high_watermark TIMESTAMP,
+                batch_id STRING,
+                updated_at TIMESTAMP
+            ) USING DELTA
+        """)
+
+    def get(self, table_name: str) -> Optional[datetime.datetime]:
+        """Return the stored high-water mark for a bronze table, or None if there is none."""
+        rows = self.spark.table(self.table) \
+            .filter(col("table_name") == table_name) \
+            .select("high_watermark") \
+            .collect()
+        return rows[0]["high_watermark"] if rows else None
+
+    def set(self, table_name: str, watermark_column: str, high_watermark: datetime.datetime, batch_id: str) -> None:
+        """Upsert the high-water mark for a bronze table after a successful write."""
+        update_df = self.spark.createDataFrame(
+            [(table_name, watermark_column, high_watermark, batch_id)],
+            "table_name STRING, watermark_column STRING, high_watermark TIMESTAMP, batch_id STRING"
+        ).withColumn("updated_at", current_timestamp())
+
+        DeltaTable.forName(self.spark, self.table).alias("t") \
+            .merge(update_df.alias("s"), "t.table_name = s.table_name") \
+            .whenMatchedUpdateAll() \
+            .whenNotMatchedInsertAll() \
+            .execute()
+
+
+class JsonSchemaStore:
+    """Cached schemas of JSON source columns, kept in the `_etl_json_schemas` Delta table."""
+
+    def __init__(self, spark: SparkSession, table: str):
+        self.spark = spark
+        self.table = table
+
+    def ensure(self) -> None:
+        self.spark.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                table_name STRING,
+                column_name STRING,
+                schema_json STRING,
+                schema_version INT,
+                added_fields STRING,
+                updated_at TIMESTAMP
+            ) USING DELTA
+        """)
+
+    def get(self, table_name: str, column_name: str) -> Optional[Tuple[str, int]]:
+        """Return the cached (schema JSON, version) of a JSON column, or None if there is none."""
+        rows = self.spark.table(self.table) \
+            .filter((col("table_name") == table_name) & (col("column_name") == column_name)) \
+            .select("schema_json", "schema_version") \
+            .collect()
+        return (rows[0]["schema_json"], rows[0]["schema_version"]) if rows else None
+
+    def set(self, table_name: str, column_name: str, schema_json: str, schema_version: int, added_fields: str) -> None:
+        """Upsert the schema of a JSON column; Delta history keeps the previous versions."""
+        update_df = self.spark.createDataFrame(
+            [(table_name, column_name, schema_json, schema_version, added_fields)],
+            "table_name STRING, column_name STRING, schema_json STRING, schema_version INT, added_fields STRING"
+        ).withColumn("updated_at", current_timestamp())
+
+        DeltaTable.forName(self.spark, self.table).alias("t") \
+            .merge(update_df.alias("s"), "t.table_name = s.table_name AND t.column_name = s.column_name") \
+            .whenMatchedUpdateAll() \
+            .whenNotMatchedInsertAll() \
+            .execute()
+
+
+class JdbcTuningStore:
+    """Winning JDBC read settings per table, kept in the `_etl_jdbc_tuning` Delta table."""
+
+    SCHEMA = (
+        "table_name STRING, fetch_size INT, num_partitions INT, trial_rows_per_sec DOUBLE, "
+        "trial_bytes_per_sec DOUBLE, baseline_rows_per_sec DOUBLE, last_rows_per_sec DOUBLE, "
+        "needs_retune BOOLEAN, tuned_at TIMESTAMP"
+    )
+
+    def __init__(self, spark: SparkSession, table: str):
+        self.spark = spark
+        self.table = table
+
+    def ensure(self) -> None:
+        self.spark.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.SCHEMA},
+                updated_at TIMESTAMP
+            ) USING DELTA
+        """)
+
+    def get(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Return the stored settings and throughput of a bronze table, or None if it was never tuned."""
+        rows = self.spark.table(self.table) \
+            .filter(col("table_name") == table_name) \
+            .drop("updated_at") \
+            .collect()
+        return rows[0].asDict() if rows else None
+
+    def set(self, settings: Dict[str, Any]) -> None:
+        """Upsert the settings row of a bronze table."""
+        columns = [column.split()[0] for column in self.SCHEMA.split(", ")]
+        update_df = self.spark.createDataFrame([tuple(settings.get(column) for column in columns)], self.SCHEMA) \
+            .withColumn("updated_at", current_timestamp())
+
+        DeltaTable.forName(self.spark, self.table).alias("t") \
+            .merge(update_df.alias("s"), "t.table_name = s.table_name") \
+            .whenMatchedUpdateAll() \
+            .whenNotMatchedInsertAll() \
+            .execute()
+
+
+class RunMetricsStore:
+    """Append-only per-stage metrics of every extraction, kept in the `_etl_run_metrics` Delta table."""
+
+    SCHEMA = (
+        "_batch_id STRING, table_name STRING, stage STRING, incremental BOOLEAN, status STRING, "
+        "started_at TIMESTAMP, seconds DOUBLE, source_reads INT, rows_read BIGINT, bytes_read BIGINT, "
+        "rows_written BIGINT, files_written BIGINT, bytes_written BIGINT, num_tasks BIGINT, "
+        "executor_run_ms BIGINT, executor_cpu_ns BIGINT, jvm_gc_ms BIGINT, shuffle_read_bytes BIGINT, "
+        "shuffle_write_bytes BIGINT, memory_spilled_bytes BIGINT, disk_spilled_bytes BIGINT, error STRING"
+    )
+
+    def __init__(self, spark: SparkSession, table: str):
+        self.spark = spark
+        self.table = table
+
+    def ensure(self) -> None:
+        self.spark.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.SCHEMA},
+                recorded_at TIMESTAMP
+            ) USING DELTA
+        """)
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        """Append metric rows; missing metrics are stored as NULL."""
+        if not rows:
+            return
+        columns = [column.split()[0] for column in self.SCHEMA.split(", ")]
+        self.spark.createDataFrame([tuple(row.get(column) for column in columns) for row in rows], self.SCHEMA) \
+            .withColumn("recorded_at", current_timestamp()) \
+            .write \
+            .mode("append") \
+            .saveAsTable(self.table)
+
+
+class ChangeOffsetStore:
+    """Change Tracking version applied to each streamed bronze table, kept in the `_etl_cdc_offsets` Delta table."""
+
+    SCHEMA = (
+        "table_name STRING, change_version BIGINT, checkpoint_location STRING, "
+        "stream_batch_id BIGINT, rows_applied BIGINT"
+    )
+
+    def __init__(self, spark: SparkSession, table: str):
+        self.spark = spark
+        self.table = table
+
+    def ensure(self) -> None:
+        self.spark.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.SCHEMA},
+                updated_at TIMESTAMP
+            ) USING DELTA
+        """)
+
+    def get(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Return the stored offset of a bronze table, or None if it was never streamed."""
+        rows = self.spark.table(self.table) \
+            .filter(col("table_name") == table_name) \
+            .drop("updated_at") \
+            .collect()
+        return rows[0].asDict() if rows else None
+
+    def set(self, offset: Dict[str, Any]) -> None:
+        """Upsert the offset row of a bronze table after a batch was applied."""
+        columns = [column.split()[0] for column in self.SCHEMA.split(", ")]
+        update_df = self.spark.createDataFrame([tuple(offset.get(column) for column in columns)], self.SCHEMA) \
+            .withColumn("updated_at", current_timestamp())
+
+        DeltaTable.forName(self.spark, self.table).alias("t") \
+            .merge(update_df.alias("s"), "t.table_name = s.table_name") \
+            .whenMatchedUpdateAll() \
+            .whenNotMatchedInsertAll() \
+            .execute()
+
+
+class RunCheckpointStore:
+    """Units of work finished by each job run, kept in the `_etl_run_checkpoints` Delta table.
+
+    A unit is a whole table (`table`), the key-range plan of its staged full read (`plan`, with the
+    predicates as JSON in `detail`) or one staged key range (`range <n>`). Rows are only appended,
+    so ranges finishing concurrently never conflict.
+    """
+
+    SCHEMA = (
+        "run_id STRING, table_name STRING, unit STRING, batch_id STRING, incremental BOOLEAN, "
+        "rows BIGINT, detail STRING"
+    )
+
+    def __init__(self, spark: SparkSession, table: str):
+        self.spark = spark
+        self.table = table
+
+    def ensure(self) -> None:
+        self.spark.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.SCHEMA},
+                completed_at TIMESTAMP
+            ) USING DELTA
+        """)
+
+    def get(self, run_id: str, table_name: str) -> Dict[str, Dict[str, Any]]:
+        """Return the units of a table already finished by the run, keyed by unit."""
+        rows = self.spark.table(self.table) \
+            .filter((col("run_id") == run_id) & (col("table_name") == table_name)) \
+            .drop("completed_at") \
+            .collect()
+        return {row["unit"]: row.asDict() for row in rows}
+
+    def complete(self, checkpoint: Dict[str, Any]) -> None:
+        """Record a finished unit; missing fields are stored as NULL."""
+        columns = [column.split()[0] for column in self.SCHEMA.split(", ")]
+        self.spark.createDataFrame([tuple(checkpoint.get(column) for column in columns)], self.SCHEMA) \
+            .withColumn("completed_at", current_timestamp()) \
+            .write \
+            .mode("append") \
+            .saveAsTable(self.table)
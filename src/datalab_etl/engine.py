@@ -0,0 +1,799 @@
+"""Extraction engine that loads any registered table from SQL Server into the bronze layer."""
+
+import datetime
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from delta.tables import DeltaTable
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+from .control import JdbcTuningStore, JsonSchemaStore, RunCheckpointStore, RunMetricsStore, WatermarkStore
+from .json_projection import JsonProjector
+from .layout import TableLayout, add_derived_columns, optimize_layout, write_with_layout
+from .metrics import StageRecorder, TaskMetricsCollector, delta_write_metrics, table_version
+from .reconcile import RECONCILE_BUCKETS, ReconcileResult, Reconciler, range_predicate, reconcile_key
+from .registry import BRONZE_TABLES, SideTable, TableSpec, get_table
+from .report import table_report
+from .source import SOURCE_DECIMAL_TYPES, SourceColumn, SqlServerSource, TableSize, narrowing_fits
+from .tuning import TUNING_MODES, JdbcSettings, JdbcTuner
+
+SOURCE_SYSTEM = "WorldWideImporters_SQL"
+
+# ValidTo of the current version of a row in a system-versioned temporal table
+OPEN_VALID_TO = "9999-12-31 23:59:59.9999999"
+
+LOAD_MODES = ("full", "incremental", "window")
+
+METADATA_COLUMNS = ("_extract_timestamp", "_source_system", "_batch_id")
+
+# Content hashes per blob query, keeping the IN list well below SQL Server's parameter limits
+BLOB_HASH_BATCH = 1000
+
+
+def current_version() -> Column:
+    """Filter for the current version of each row in an SCD2 bronze table."""
+    return F.col("ValidTo") >= F.lit(OPEN_VALID_TO[:10]).cast("timestamp")
+
+
+@dataclass
+class ExtractionResult:
+    """Outcome of extracting one table."""
+
+    table_name: str
+    batch_id: str
+    incremental: bool
+    records: int
+    checks: Dict[str, int] = field(default_factory=dict)
+    stats: Dict[str, Any] = field(default_factory=dict)
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    stage_source_reads: Dict[str, int] = field(default_factory=dict)
+
+
+class ExtractionEngine:
+    """Runs registered tables from SQL Server into Unity Catalog bronze tables.
+
+    Every table goes through the same steps: build the source query (full, incremental on a
+    `LastEditedWhen` watermark, temporal change capture, or a rolling window of recent rows),
+    read it exactly once into a staged Delta snapshot, profile the snapshot in one aggregation
+    pass, then overwrite, MERGE or replace the window of the bronze table and advance the
+    table's watermark.
+
+    Jobs that only work on tables already in the schema (e.g. feature materialization) pass no
+    `source`; they must not run extractions.
+    """
+
+    def __init__(
+        self,
+        spark: SparkSession,
+        source: Optional[SqlServerSource],
+        catalog_name: str,
+        schema_name: str,
+        load_mode: str = "full",
+        watermark_overlap_minutes: int = 15,
+        vertical_split: bool = False,
+        json_schema_evolution: str = "add",
+        jdbc_tuning: str = "off",
+        collect_metrics: bool = True,
+        window_days: int = 30,
+        optimize_after_merge: bool = True,
+        driver_fetch_max_rows: int = 10000,
+        driver_fetch_max_bytes: int = 16 * 1024 * 1024,
+        run_id: Optional[str] = None,
+    ):
+        if load_mode not in LOAD_MODES:
+            raise ValueError(f"load_mode must be one of {LOAD_MODES}, got '{load_mode}'")
+        if jdbc_tuning not in TUNING_MODES:
+            raise ValueError(f"jdbc_tuning must be one of {TUNING_MODES}, got '{jdbc_tuning}'")
+        self.spark = spark
+        # Session settings are set once here, not from the scheduler's table threads: driver fetches
+        # convert through Arrow, and MERGEs evolve the schema like the mergeSchema option on full loads
+        spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+        spark.conf.set("spark.databricks.delta.schema.autoMerge.enabled", "true")
+        self.source = source
+        self.catalog_name = catalog_name
+        self.schema_name = schema_name
+        self.load_mode = load_mode
+        self.window_days = window_days
+        self.optimize_after_merge = optimize_after_merge
+        self.driver_fetch_max_rows = driver_fetch_max_rows
+        self.driver_fetch_max_bytes = driver_fetch_max_bytes
+        # Source table statistics, looked up once per run (the scheduler fills them in for its tables)
+        self.source_sizes: Dict[str, Optional[TableSize]] = {}
+        # Source column types and the checked custom schema per table, looked up once per run
+        self.source_columns: Dict[str, Optional[Dict[str, SourceColumn]]] = {}
+        self.custom_schemas: Dict[str, Optional[str]] = {}
+        self.watermark_overlap_minutes = watermark_overlap_minutes
+        self.vertical_split = vertical_split
+        self.watermarks = WatermarkStore(spark, self.qualify("_etl_watermarks"))
+        self.json_schemas = JsonSchemaStore(spark, self.qualify("_etl_json_schemas"))
+        self.json_projector = JsonProjector(spark, self.json_schemas, json_schema_evolution)
+        self.jdbc_tuning = jdbc_tuning
+        self.tuner = JdbcTuner(spark, source, JdbcTuningStore(spark, self.qualify("_etl_jdbc_tuning")))
+        self.run_metrics = RunMetricsStore(spark, self.qualify("_etl_run_metrics"))
+        self.task_metrics = TaskMetricsCollector(spark) if collect_metrics else None
+        # Units finished under `run_id` are skipped when the same run is retried
+        self.run_id = run_id or None
+        self.checkpoints = RunCheckpointStore(spark, self.qualify("_etl_run_checkpoints"))
+        # Source reads per table for this run; each table should be read exactly once
+        self.source_round_trips: Dict[str, int] = {}
+        # Round-trips expected for tables that aren't read exactly once: a driver fetch also looks
+        # up the JDBC schema, and checkpointed ranges are planned and read one by one
+        self.expected_round_trips: Dict[str, int] = {}
+        # Blob reads per side table for this run; only content not seen before is fetched
+        self.blob_fetches: Dict[str, int] = {}
+        # Set by the scheduler to cap concurrent JDBC connections across tables
+        self.connection_limiter = None
+
+    def qualify(self, table_name: str) -> str:
+        return f"{self.catalog_name}.{self.schema_name}.{table_name}"
+
+    def setup(self) -> None:
+        """Create the catalog, schema and control tables if they don't exist."""
+        self.spark.sql(f"CREATE CATALOG IF NOT EXISTS {self.catalog_name}")
+        self.spark.sql(f"USE CATALOG {self.catalog_name}")
+        self.spark.sql(f"CREATE SCHEMA IF NOT EXISTS {self.schema_name}")
+        self.spark.sql(f"USE SCHEMA {self.schema_name}")
+        self.ensure_control_tables()
+        self.enable_change_data_feed()
+        print(f"Using catalog: {self.catalog_name}, schema: {self.schema_name}")
+
+    def ensure_control_tables(self) -> None:
+        self.watermarks.ensure()
+        self.json_schemas.ensure()
+        self.tuner.store.ensure()
+        self.run_metrics.ensure()
+        self.checkpoints.ensure()
+
+    def enable_change_data_feed(self) -> None:
+        """Record the row changes of bronze tables, which the silver pipeline consumes incrementally."""
+        # Tables created or replaced from now on
+        self.spark.conf.set("spark.databricks.delta.properties.defaults.enableChangeDataFeed", "true")
+        for spec in BRONZE_TABLES.values():
+            table = self.qualify(spec.name)
+            if not self.spark.catalog.tableExists(table):
+                continue
+            enabled = self.spark.sql(f"SHOW TBLPROPERTIES {table} ('delta.enableChangeDataFeed')").collect()[0]["value"]
+            if enabled != "true":
+                print(f"Enabling Change Data Feed on {table}")
+                self.spark.sql(f"ALTER TABLE {table} SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true')")
+
+    def splits(self, spec: TableSpec) -> bool:
+        """Whether the table's wide and BLOB columns go to side tables on this run."""
+        return self.vertical_split and bool(spec.side_tables)
+
+    def base_query(self, spec: TableSpec) -> str:
+        """Full-extraction query, with BLOB columns replaced by content hashes when split."""
+        return spec.split_source_query if self.splits(spec) else spec.source_query
+
+    def source_slot(self, connections: int):
+        """Hold `connections` JDBC connections from the scheduler's limiter, if there is one."""
+        return self.connection_limiter.acquire(connections) if self.connection_limiter else nullcontext()
+
+    def max_connections(self) -> Optional[int]:
+        """The scheduler's cap on concurrent JDBC connections, or None without a limiter."""
+        return self.connection_limiter.max_connections if self.connection_limiter else None
+
+    def clamp_connections(self, spec: TableSpec, connections: int) -> int:
+        """Lower a read's partition count to the connection cap, so every connection it opens holds a slot."""
+        cap = self.max_connections()
+        if cap is not None and connections > cap:
+            print(f"INFO: Reading {spec.name} with {cap} instead of {connections} JDBC partitions (max_source_connections)")
+            return cap
+        return connections
+
+    def source_size(self, spec: TableSpec) -> Optional[TableSize]:
+        """Row count and used bytes of the source table, or None if the statistics can't be read."""
+        if spec.source_table not in self.source_sizes:
+            try:
+                self.source_sizes.update(self.source.table_sizes([spec.source_table]))
+            except Exception as e:
+                print(f"INFO: Could not read the size of {spec.source_table} ({str(e)})")
+            self.source_sizes.setdefault(spec.source_table, None)
+        return self.source_sizes[spec.source_table]
+
+    def custom_schema(self, spec: TableSpec) -> Optional[str]:
+        """The declared column types that hold every source value, as a JDBC `customSchema`.
+
+        Declarations are checked once per run against the source's INFORMATION_SCHEMA. A column
+        whose source type doesn't fit keeps the default type mapping, and if the source types
+        can't be read no declaration is used.
+        """
+        if not spec.column_types:
+            return None
+        if spec.name in self.custom_schemas:
+            return self.custom_schemas[spec.name]
+        if spec.source_table not in self.source_columns:
+            try:
+                self.source_columns.update(self.source.column_types([spec.source_table]))
+            except Exception as e:
+                print(f"INFO: Could not read the column types of {spec.source_table} ({str(e)})")
+                self.source_columns[spec.source_table] = None
+
+        columns = {name.upper(): column for name, column in (self.source_columns.get(spec.source_table) or {}).items()}
+        if not columns:
+            print(f"INFO: No source column types for {spec.source_table}, reading it with the default type mapping")
+            self.custom_schemas[spec.name] = None
+            return None
+
+        declared = []
+        for name, sql_type in spec.column_types:
+            column = columns.get(name.upper())
+            if column is None:
+                print(f"WARNING: {spec.source_table}.{name} is not on the source, not reading it as {sql_type}")
+                continue
+            if not narrowing_fits(sql_type, column):
+                source_type = column.data_type
+                if source_type.lower() in SOURCE_DECIMAL_TYPES:
+                    source_type += f"({column.precision},{column.scale})"
+                print(f"WARNING: {spec.source_table}.{name} is {source_type} on the source, which {sql_type} can't hold; using the default type mapping")
+                continue
+            declared.append(f"{name} {sql_type}")
+        self.custom_schemas[spec.name] = ", ".join(declared) or None
+        return self.custom_schemas[spec.name]
+
+    def fetches_on_driver(self, spec: TableSpec) -> bool:
+        """Whether the source table is small enough, by its statistics, to skip Spark JDBC."""
+        if not self.driver_fetch_max_rows or not self.source.supports_driver_fetch:
+            return False
+        size = self.source_size(spec)
+        return size is not None and size.rows <= self.driver_fetch_max_rows and size.bytes <= self.driver_fetch_max_bytes
+
+    def fetch_on_driver(self, query: str, table_name: str, custom_schema: Optional[str] = None) -> Tuple[DataFrame, Dict[str, int]]:
+        """Fetch a small query into Arrow on the driver and return it as a local DataFrame.
+
+        The rows live in the driver's query plan, so profiling and writing them read no source
+        again and the bronze write is a single-task job with one Delta commit. Also returns the
+        rows and Arrow bytes fetched, in the shape of `delta_write_metrics`.
+        """
+        # The schema is looked up through JDBC metadata: a second round-trip, but no rows
+        schema = self.source.schema(query, custom_schema)
+        table = self.source.fetch_arrow(query, schema)
+        self.source_round_trips[table_name] = self.source_round_trips.get(table_name, 0) + 2
+        self.expected_round_trips[table_name] = 2
+        fetched = {"rows_written": table.num_rows, "files_written": 0, "bytes_written": table.nbytes}
+        # Nullable integers as objects instead of float64 NaN, and dates as `datetime.date`,
+        # so the rows keep their types even where Spark falls back to the non-Arrow conversion
+        pdf = table.to_pandas(integer_object_nulls=True, date_as_object=True)
+        return self.spark.createDataFrame(pdf, schema), fetched
+
+    def jdbc_settings(self, spec: TableSpec, is_incremental: bool) -> Optional[JdbcSettings]:
+        """Tuned read settings for the table, tuning it first on full loads when due."""
+        if self.jdbc_tuning == "off":
+            return None
+        if not is_incremental and (self.jdbc_tuning == "tune" or self.tuner.due(spec)):
+            return self.tuner.tune(spec, self.base_query(spec), self.source_slot, self.custom_schema(spec), self.max_connections())
+        return self.tuner.stored(spec)
+
+    def needs_full_reload(self, spec: TableSpec) -> bool:
+        """Whether the bronze table or one of its side tables is missing, so only a full load can run."""
+        if not self.spark.catalog.tableExists(self.qualify(spec.name)):
+            print(f"INFO: {spec.name} does not exist yet, doing a full reload")
+            return True
+        if self.splits(spec) and not all(self.spark.catalog.tableExists(self.qualify(self.side_name(spec, side))) for side in spec.side_tables):
+            print(f"INFO: Side tables of {spec.name} do not exist yet, doing a full reload")
+            return True
+        return False
+
+    def window_predicate(self, spec: TableSpec) -> Optional[str]:
+        """Predicate selecting the rows re-extracted in rolling-window mode, or None.
+
+        The predicate is valid in both T-SQL and Spark SQL, so the same rows are read from the
+        source and replaced in bronze. Tables without a window are loaded incrementally instead.
+        """
+        if self.load_mode != "window" or not (spec.window_column or spec.window_parent):
+            return None
+        if self.needs_full_reload(spec):
+            return None
+
+        cutoff = (datetime.date.today() - datetime.timedelta(days=self.window_days)).isoformat()
+        if spec.window_column:
+            print(f"Rolling window for {spec.name}: {spec.window_column} >= {cutoff} (last {self.window_days} days)")
+            return f"{spec.window_column} >= '{cutoff}'"
+
+        # Follow the parent's window through its key, from the lowest key in the window up
+        parent = get_table(spec.window_parent)
+        key = parent.key_columns[0]
+        low_key = self.source.query(
+            f"SELECT MIN({key}) AS low_key FROM {parent.source_table} WHERE {parent.window_column} >= '{cutoff}'"
+        )[0]["low_key"]
+        if low_key is None:
+            print(f"INFO: No {parent.name} in the last {self.window_days} days, nothing to replace in {spec.name}")
+            return "1 = 0"
+        print(f"Rolling window for {spec.name}: {key} >= {low_key} ({parent.name} since {cutoff})")
+        return f"{key} >= {low_key}"
+
+    def incremental_query(self, spec: TableSpec) -> Optional[str]:
+        """Build the source query for an incremental pull, or None for a full reload."""
+        if self.load_mode not in ("incremental", "window") or spec.watermark_column is None:
+            return None
+        if self.needs_full_reload(spec):
+            return None
+
+        high_watermark = self.watermarks.get(spec.name)
+        if high_watermark is None:
+            print(f"INFO: No watermark stored for {spec.name}, doing a full reload")
+            return None
+
+        since = (high_watermark - datetime.timedelta(minutes=self.watermark_overlap_minutes)).strftime('%Y-%m-%d %H:%M:%S.%f')
+        if spec.temporal:
+            print(f"Capturing row versions of {spec.name} changed after {since} (watermark {high_watermark})")
+            # BETWEEN returns every version that overlaps the window, including untouched
+            # current rows, so keep only versions that started, or were closed, inside it
+            return f"""{self.base_query(spec)}
+            FOR SYSTEM_TIME BETWEEN '{since}' AND '{OPEN_VALID_TO}'
+            WHERE ValidFrom > '{since}'
+                OR (ValidTo > '{since}' AND ValidTo < '{OPEN_VALID_TO}')
+            """
+
+        print(f"Incremental pull for {spec.name}: {spec.watermark_column} > {since} (watermark {high_watermark})")
+        return f"{self.base_query(spec)}\nWHERE {spec.watermark_column} > '{since}'"
+
+    def with_metadata(self, df: DataFrame, spec: TableSpec, batch_id: str) -> DataFrame:
+        """Add the metadata columns for data lineage and the layout's derived columns."""
+        df = df \
+            .withColumn("_extract_timestamp", F.current_timestamp()) \
+            .withColumn("_source_system", F.lit(SOURCE_SYSTEM)) \
+            .withColumn("_batch_id", F.lit(batch_id))
+        return add_derived_columns(df, spec.layout)
+
+    def stage(self, df: DataFrame, table_name: str) -> DataFrame:
+        """Materialise a source DataFrame into a staged Delta snapshot with a single source read."""
+        stage_table = self.qualify(f"_stage_{table_name}")
+        df.write \
+            .mode("overwrite") \
+            .option("overwriteSchema", "true") \
+            .saveAsTable(stage_table)
+        self.source_round_trips[table_name] = self.source_round_trips.get(table_name, 0) + 1
+        return self.spark.table(stage_table)
+
+    def start_ranges(
+        self,
+        spec: TableSpec,
+        query: str,
+        predicates: List[str],
+        batch_id: str,
+        fetch_size: Optional[int],
+        custom_schema: Optional[str],
+    ) -> None:
+        """Replace the stage table with an empty one of the read schema, then record the range plan.
+
+        The ranges are appended concurrently, so the table must exist before the first one is
+        written. No range is staged before the plan is recorded, so an attempt that fails in
+        between is simply planned and emptied again on retry.
+        """
+        empty = self.source.read(f"SELECT * FROM ({query}) AS src WHERE 1 = 0", fetch_size=fetch_size, custom_schema=custom_schema)
+        self.with_metadata(empty, spec, batch_id).write \
+            .mode("overwrite") \
+            .option("overwriteSchema", "true") \
+            .saveAsTable(self.qualify(f"_stage_{spec.name}"))
+        self.checkpoints.complete({
+            "run_id": self.run_id, "table_name": spec.name, "unit": "plan",
+            "batch_id": batch_id, "detail": json.dumps(predicates),
+        })
+
+    def stage_ranges(
+        self,
+        spec: TableSpec,
+        query: str,
+        predicates: List[str],
+        batch_id: str,
+        fetch_size: Optional[int],
+        custom_schema: Optional[str],
+        checkpoints: Dict[str, Dict[str, Any]],
+        connections: int,
+    ) -> DataFrame:
+        """Stage a full read one key range at a time, checkpointing each range under the run.
+
+        Ranges staged by an earlier attempt of the run are kept and not read again. Each range is
+        appended with a Delta idempotent-write ID, so a range whose checkpoint was lost by a failure
+        right after its write is not staged twice. At most `connections` ranges, the slots the
+        caller holds, are read at once; every range read counts as a source round-trip.
+        """
+        stage_table = self.qualify(f"_stage_{spec.name}")
+        pending = [i for i in range(len(predicates)) if f"range {i}" not in checkpoints]
+        if len(pending) < len(predicates):
+            print(f"Resuming {spec.name}: {len(predicates) - len(pending)} of {len(predicates)} key ranges already staged")
+        else:
+            print(f"Staging {spec.source_table} in {len(predicates)} checkpointed key ranges")
+
+        sc = self.spark.sparkContext
+        # Local properties are per thread, so the range threads take the job group and pool of this one
+        properties = {key: sc.getLocalProperty(key) for key in ("spark.jobGroup.id", "spark.job.description", "spark.scheduler.pool")}
+
+        def stage_range(i: int) -> None:
+            for key, value in properties.items():
+                sc.setLocalProperty(key, value)
+            df = self.source.read(f"SELECT * FROM ({query}) AS src WHERE {predicates[i]}", fetch_size=fetch_size, custom_schema=custom_schema)
+            self.with_metadata(df, spec, batch_id).write \
+                .mode("append") \
+                .option("txnAppId", f"{self.run_id}:{spec.name}:{i}") \
+                .option("txnVersion", 0) \
+                .saveAsTable(stage_table)
+            self.checkpoints.complete({"run_id": self.run_id, "table_name": spec.name, "unit": f"range {i}", "batch_id": batch_id})
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(len(pending), max(connections, 1))) as pool:
+                for future in [pool.submit(stage_range, i) for i in pending]:
+                    future.result()
+        self.source_round_trips[spec.name] = self.source_round_trips.get(spec.name, 0) + len(pending)
+        self.expected_round_trips[spec.name] = self.source_round_trips[spec.name]
+        return self.spark.table(stage_table)
+
+    def profile(self, df: DataFrame, spec: TableSpec) -> ExtractionResult:
+        """Count records, quality-check failures and statistics in one pass over the snapshot."""
+        aggregates = [F.count(F.lit(1)).alias("records")]
+        aggregates += [F.count(F.when(F.expr(condition), 1)).alias(f"check_{i}") for i, (_, condition, _) in enumerate(spec.quality_checks)]
+        aggregates += [F.expr(expression).alias(f"stat_{i}") for i, (_, expression, _) in enumerate(spec.stats)]
+        row = df.agg(*aggregates).collect()[0]
+
+        return ExtractionResult(
+            table_name=spec.name,
+            batch_id="",
+            incremental=False,
+            records=row["records"],
+            checks={description: row[f"check_{i}"] for i, (_, _, description) in enumerate(spec.quality_checks)},
+            stats={label: row[f"stat_{i}"] for i, (label, _, _) in enumerate(spec.stats)},
+        )
+
+    def side_name(self, spec: TableSpec, side: SideTable) -> str:
+        return f"{spec.name}_{side.suffix}"
+
+    def write(
+        self,
+        df: DataFrame,
+        spec: TableSpec,
+        is_incremental: bool,
+        replace_where: Optional[str] = None,
+        side_replace_where: Optional[str] = None,
+    ) -> None:
+        """Write the snapshot to bronze, splitting wide and BLOB columns into side tables if enabled.
+
+        `replace_where` replaces only the main table's rows matching the predicate. Side tables
+        hold just the keys and side columns, so they are replaced on `side_replace_where`, or
+        MERGEd on their keys when only the main table's predicate is given.
+        """
+        if self.splits(spec):
+            for side in spec.side_tables:
+                if side.blob:
+                    self.sync_blobs(df, spec, side)
+                else:
+                    side_spec = replace(
+                        spec,
+                        name=self.side_name(spec, side),
+                        layout=TableLayout(compression=spec.layout.compression),
+                        side_tables=(),
+                    )
+                    side_incremental = is_incremental or (replace_where is not None and side_replace_where is None)
+                    self.write_table(df.select(*spec.merge_keys, *side.columns, *METADATA_COLUMNS), side_spec, side_incremental, side_replace_where)
+            df = df.drop(*[column for side in spec.side_tables if not side.blob for column in side.columns])
+
+        self.write_table(df, spec, is_incremental, replace_where)
+
+    def write_table(self, df: DataFrame, spec: TableSpec, is_incremental: bool, replace_where: Optional[str] = None) -> None:
+        """Overwrite the bronze table on full loads, MERGE on its keys on incremental loads.
+
+        Full loads rewrite the table with the spec's layout; incremental loads keep the existing
+        layout and re-cluster the table afterwards if it declares Z-order or clustering columns.
+        With `replace_where`, only the rows matching the predicate are replaced by the snapshot.
+        """
+        target_table = self.qualify(spec.name)
+
+        if replace_where:
+            if self.spark.catalog.tableExists(target_table):
+                # Columns keep their bronze type until the next full load rewrites the table
+                target_types = {field.name: field.dataType for field in self.spark.table(target_table).schema.fields}
+                df = df.select(*[
+                    F.col(column).cast(target_types[column]) if column in target_types and df.schema[column].dataType != target_types[column] else F.col(column)
+                    for column in df.columns
+                ])
+            df.write \
+                .mode("overwrite") \
+                .option("replaceWhere", replace_where) \
+                .option("mergeSchema", "true") \
+                .saveAsTable(target_table)
+            return
+
+        if is_incremental:
+            merge_condition = " AND ".join(f"t.{key} = s.{key}" for key in spec.merge_keys)
+            DeltaTable.forName(self.spark, target_table).alias("t") \
+                .merge(df.alias("s"), merge_condition) \
+                .whenMatchedUpdateAll() \
+                .whenNotMatchedInsertAll() \
+                .execute()
+            if self.optimize_after_merge:
+                optimize_layout(self.spark, target_table, spec.layout)
+            return
+
+        write_with_layout(self.spark, df, target_table, spec.layout)
+
+    def sync_blobs(self, df: DataFrame, spec: TableSpec, side: SideTable) -> None:
+        """Add blobs whose content hash is not in the side table yet; existing blobs are never rewritten."""
+        column = side.columns[0]
+        blob_table = self.qualify(self.side_name(spec, side))
+        hashes = df.where(F.col(side.hash_column).isNotNull()).select(side.hash_column).distinct()
+        blob_table_exists = self.spark.catalog.tableExists(blob_table)
+        if blob_table_exists:
+            hashes = hashes.join(self.spark.table(blob_table).select(side.hash_column), side.hash_column, "left_anti")
+        new_hashes: List[str] = [row[0] for row in hashes.collect()]
+
+        if not new_hashes:
+            print(f"No new {column} content for {spec.name}")
+            return
+        print(f"Fetching {len(new_hashes)} new {column} value(s) for {spec.name}")
+
+        # Without a side table every distinct blob is new, so fetch them all in one read
+        batches = [new_hashes[i:i + BLOB_HASH_BATCH] for i in range(0, len(new_hashes), BLOB_HASH_BATCH)] if blob_table_exists else [None]
+        for batch in batches:
+            with self.source_slot(1):
+                blobs = self.source.read(spec.blob_query(side, batch)) \
+                    .withColumn("_extract_timestamp", F.current_timestamp()) \
+                    .withColumn("_source_system", F.lit(SOURCE_SYSTEM))
+                if self.spark.catalog.tableExists(blob_table):
+                    DeltaTable.forName(self.spark, blob_table).alias("t") \
+                        .merge(blobs.alias("s"), f"t.{side.hash_column} = s.{side.hash_column}") \
+                        .whenNotMatchedInsertAll() \
+                        .execute()
+                else:
+                    blobs.write.saveAsTable(blob_table)
+            self.blob_fetches[blob_table] = self.blob_fetches.get(blob_table, 0) + 1
+
+    def update_watermark(self, spec: TableSpec, batch_id: str) -> None:
+        """Advance the table's watermark to the newest change that landed in bronze."""
+        if spec.watermark_column is None:
+            return
+
+        bronze = self.spark.table(self.qualify(spec.name))
+        if spec.temporal:
+            # Newest version start or newest closed version end
+            high_watermark = bronze.agg(
+                F.greatest(
+                    F.max("ValidFrom"),
+                    F.max(F.when(F.col("ValidTo") < F.lit(OPEN_VALID_TO).cast("timestamp"), F.col("ValidTo")))
+                )
+            ).collect()[0][0]
+        else:
+            high_watermark = bronze.agg(F.max(spec.watermark_column)).collect()[0][0]
+
+        if high_watermark is not None:
+            self.watermarks.set(spec.name, spec.watermark_column, high_watermark, batch_id)
+
+    def written_tables(self, spec: TableSpec) -> List[str]:
+        """The bronze tables a write of the spec touches: the main table and its side tables."""
+        tables = [self.qualify(spec.name)]
+        if self.splits(spec):
+            tables += [self.qualify(self.side_name(spec, side)) for side in spec.side_tables]
+        return tables
+
+    def record_metrics(
+        self,
+        spec: TableSpec,
+        recorder: StageRecorder,
+        is_incremental: Optional[bool],
+        delta_metrics: Dict[str, Dict[str, int]],
+        status: str,
+        error: Optional[str],
+    ) -> None:
+        """Append one `_etl_run_metrics` row per stage of the table's extraction."""
+        rows = []
+        for stage, seconds in recorder.seconds.items():
+            written = delta_metrics.get(stage, {})
+            rows.append({
+                "_batch_id": recorder.batch_id,
+                "table_name": spec.name,
+                "stage": stage,
+                "incremental": is_incremental,
+                "status": status,
+                "started_at": datetime.datetime.fromtimestamp(recorder.started_at[stage]),
+                "seconds": seconds,
+                "source_reads": recorder.source_reads.get(stage, 0),
+                # The staged snapshot holds exactly what was read from the source
+                "rows_read": written.get("rows_written") if stage == "extract" else None,
+                "bytes_read": written.get("bytes_written") if stage == "extract" else None,
+                "rows_written": written.get("rows_written") if stage == "write" else None,
+                "files_written": written.get("files_written"),
+                "bytes_written": written.get("bytes_written"),
+                **recorder.task_metrics.get(stage, {}),
+                "error": error,
+            })
+        try:
+            self.run_metrics.append(rows)
+        except Exception as e:
+            # Metrics must never fail the load itself
+            print(f"WARNING: Could not record run metrics for {spec.name}: {str(e)}")
+
+    def run(self, spec: TableSpec, num_partitions: Optional[int] = None) -> ExtractionResult:
+        """Extract one registered table into bronze and report what was loaded.
+
+        With a `run_id`, a table the run already loaded is skipped, and a retried table keeps the
+        batch ID and staged key ranges of the earlier attempt.
+        """
+        checkpoints = self.checkpoints.get(self.run_id, spec.name) if self.run_id else {}
+        if "table" in checkpoints:
+            done = checkpoints["table"]
+            print(f"⏭️ {spec.source_table} was already loaded by run {self.run_id} (batch {done['batch_id']}), skipping it")
+            return ExtractionResult(table_name=spec.name, batch_id=done["batch_id"], incremental=done["incremental"], records=done["rows"])
+        if checkpoints:
+            batch_id = next(iter(checkpoints.values()))["batch_id"]
+        else:
+            batch_id = f"{spec.name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        recorder = StageRecorder(self.source, batch_id, self.task_metrics)
+        delta_metrics: Dict[str, Dict[str, int]] = {}
+        is_incremental = None
+        status, error = "failed", None
+        try:
+            print(f"Starting {spec.source_table} extraction...")
+
+            with recorder.stage("plan"):
+                window = self.window_predicate(spec)
+                changes_query = self.incremental_query(spec) if window is None else None
+                is_incremental = changes_query is not None
+                is_full = not is_incremental and window is None
+                on_driver = self.fetches_on_driver(spec)
+                settings = None if on_driver else self.jdbc_settings(spec, not is_full)
+                custom_schema = self.custom_schema(spec)
+                fetch_size = settings.fetch_size if settings else None
+                if window is not None:
+                    # A window covers recent rows only, so a single JDBC read is enough
+                    connections = 1
+                    query = f"{self.base_query(spec)}\nWHERE {window}"
+                elif is_incremental:
+                    # Incremental pulls are small, so a single JDBC read is enough
+                    connections = 1
+                    query = changes_query
+                else:
+                    if settings:
+                        connections = settings.num_partitions
+                    else:
+                        connections = num_partitions if num_partitions is not None else spec.num_partitions
+                    connections = self.clamp_connections(spec, connections)
+                    query = self.base_query(spec)
+
+                predicates = None
+                if on_driver:
+                    connections = 1
+                    print(f"{spec.source_table} is small, fetching it on the driver")
+                elif is_full and self.run_id and spec.partition_column and connections > 1:
+                    # Keep the plan of the first attempt, so a retry stages exactly the same ranges
+                    if "plan" in checkpoints:
+                        predicates = json.loads(checkpoints["plan"]["detail"])
+                    else:
+                        planning_queries = self.source.planning_queries
+                        predicates = self.source.range_predicates(spec.source_table, spec.partition_column, connections) or ["1 = 1"]
+                        self.start_ranges(spec, query, predicates, batch_id, fetch_size, custom_schema)
+                        # The planning queries and the read of the stage table's schema
+                        self.source_round_trips[spec.name] = self.source_round_trips.get(spec.name, 0) + self.source.planning_queries - planning_queries + 1
+                elif is_full:
+                    df = self.source.read(query, spec.source_table, spec.partition_column, connections, fetch_size, custom_schema)
+                else:
+                    df = self.source.read(query, fetch_size=fetch_size, custom_schema=custom_schema)
+
+            # Read the source exactly once; checks, statistics and the write use the snapshot
+            stage_table = self.qualify(f"_stage_{spec.name}")
+            stage_version = table_version(self.spark, stage_table) if self.task_metrics and not on_driver else None
+            with self.source_slot(connections), recorder.stage("extract"):
+                if on_driver:
+                    # Already materialised on the driver, so there is nothing to stage
+                    df, delta_metrics["extract"] = self.fetch_on_driver(query, spec.name, custom_schema)
+                    df = self.with_metadata(df, spec, batch_id)
+                elif predicates is not None:
+                    df = self.stage_ranges(spec, query, predicates, batch_id, fetch_size, custom_schema, checkpoints, connections)
+                else:
+                    df = self.stage(self.with_metadata(df, spec, batch_id), spec.name)
+            if self.task_metrics and not on_driver:
+                delta_metrics["extract"] = delta_write_metrics(self.spark, stage_table, stage_version)
+
+            # Parse JSON columns once here, so bronze readers get typed columns
+            with recorder.stage("parse"):
+                df = self.json_projector.project(df, spec)
+
+            with recorder.stage("profile"):
+                result = self.profile(df, spec)
+            result.batch_id = batch_id
+            result.incremental = is_incremental
+            # A resumed load staged only the ranges left over, and a clamped one didn't read with the
+            # tuned partitions, so neither throughput says anything about the settings
+            resumed = any(unit.startswith("range ") for unit in checkpoints)
+            if settings and is_full and not resumed and connections == settings.num_partitions:
+                self.tuner.record_run(spec, result.records, recorder.seconds["extract"])
+            print(f"{spec.source_table} extracted: {result.records} {'changed ' if is_incremental else 'windowed ' if window else ''}records")
+            for level, _, description in spec.quality_checks:
+                if result.checks[description] > 0:
+                    print(f"{level}: Found {result.checks[description]} {description}")
+            for label, _, value_format in spec.stats:
+                value = result.stats[label]
+                print(f"{label}: {value_format.format(value) if value is not None else 'n/a'}")
+
+            table_name = self.qualify(spec.name)
+            print(f"Writing to table: {table_name}")
+            written_tables = self.written_tables(spec)
+            write_versions = {table: table_version(self.spark, table) for table in written_tables} if self.task_metrics else {}
+            with recorder.stage("write"):
+                self.write(df, spec, is_incremental, replace_where=window)
+            if self.task_metrics:
+                totals = [delta_write_metrics(self.spark, table, version) for table, version in write_versions.items()]
+                delta_metrics["write"] = {key: sum(total[key] for total in totals) for key in totals[0]}
+            with recorder.stage("watermark"):
+                self.update_watermark(spec, batch_id)
+            if self.run_id:
+                self.checkpoints.complete({
+                    "run_id": self.run_id, "table_name": spec.name, "unit": "table",
+                    "batch_id": batch_id, "incremental": is_incremental, "rows": result.records,
+                })
+
+            result.stage_seconds = recorder.seconds
+            result.stage_source_reads = recorder.source_reads
+            status = "succeeded"
+            action = "merged into" if is_incremental else "replaced in the window of" if window else "written to"
+            print(f"✅ {spec.source_table} data successfully {action} {table_name}")
+            return result
+
+        except Exception as e:
+            error = str(e)
+            print(f"❌ Error extracting {spec.source_table} data: {str(e)}")
+            raise
+
+        finally:
+            if self.task_metrics:
+                self.record_metrics(spec, recorder, is_incremental, delta_metrics, status, error)
+
+    def reconcile(self, spec: TableSpec, num_buckets: int = RECONCILE_BUCKETS, resync: bool = True) -> ReconcileResult:
+        """Compare the bronze table with the source by key-range checksums and re-sync the buckets that differ.
+
+        Only the current version of each row is compared for temporal tables; a mismatched range
+        is re-read with its full history (`FOR SYSTEM_TIME ALL`).
+        """
+        table_name = self.qualify(spec.name)
+        if not self.spark.catalog.tableExists(table_name):
+            raise ValueError(f"{table_name} does not exist; run a full load before reconciling it")
+
+        print(f"Reconciling {spec.name} against {spec.source_table} in {num_buckets} key-range buckets...")
+        bronze = self.spark.table(table_name)
+        if spec.temporal:
+            bronze = bronze.where(current_version())
+        result = Reconciler(self.spark, self.source, num_buckets).compare(spec, bronze)
+        if not result.mismatched:
+            print(f"✅ {spec.name}: all {result.buckets} buckets match the source")
+            return result
+
+        print(f"{spec.name}: {len(result.mismatched)} of {result.buckets} buckets differ from the source")
+        if resync:
+            result.rows_resynced = self.resync(spec, range_predicate(reconcile_key(spec), result.ranges))
+            print(f"✅ {spec.name}: re-synced {result.rows_resynced} rows in {len(result.ranges)} key range(s)")
+        return result
+
+    def resync(self, spec: TableSpec, predicate: str) -> int:
+        """Re-read the rows matching a key predicate from the source and replace them in bronze."""
+        batch_id = f"{spec.name}_resync_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        history = "\nFOR SYSTEM_TIME ALL" if spec.temporal else ""
+        df = self.source.read(f"{self.base_query(spec)}{history}\nWHERE {predicate}", custom_schema=self.custom_schema(spec))
+        with self.source_slot(1):
+            df = self.stage(self.with_metadata(df, spec, batch_id), f"{spec.name}_resync")
+        df = self.json_projector.project(df, spec)
+        self.write(df, spec, is_incremental=False, replace_where=predicate, side_replace_where=predicate)
+        return df.count()
+
+    def table_report(self, table_name: str, metrics: Dict[str, Column], where: Optional[Column] = None) -> Dict[str, Any]:
+        """Report metrics for a bronze table: metadata row count plus one aggregation pass."""
+        return table_report(self.spark, self.qualify(table_name), metrics, where)
+
+    def drop_snapshot(self, table_name: str) -> None:
+        """Drop one staged snapshot once its rows are written."""
+        self.spark.sql(f"DROP TABLE IF EXISTS {self.qualify(f'_stage_{table_name}')}")
+
+    def drop_snapshots(self) -> None:
+        """Drop the staged snapshots and report the source reads per table."""
+        for table_name, round_trips in self.source_round_trips.items():
+            self.drop_snapshot(table_name)
+            expected = self.expected_round_trips.get(table_name, 1)
+            status = "✅" if round_trips == expected else "WARNING:"
+            print(f"{status} {table_name}: {round_trips} source round-trip(s)")
+        for blob_table, fetches in self.blob_fetches.items():
+            print(f"{blob_table}: {fetches} blob fetch(es) for new content")
+        if self.tuner.trial_reads:
+            print(f"JDBC tuning trial reads: {self.tuner.trial_reads}")
+        if self.source.planning_queries:
+            print(f"Range planning queries: {self.source.planning_queries}")
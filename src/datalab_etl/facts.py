@@ -0,0 +1,150 @@
+"""Pre-joined order line fact table, so the common orders / order lines / stock items join runs once per load.
+
+Delta tables can't be bucketed, so two separately written tables always shuffle when joined on
+`OrderID`. `order_line_facts` holds every order line with the columns of its order and of the
+current version of its stock item, laid out by month and Z-ordered on `OrderID`/`StockItemID`.
+Analyses read it without a join.
+
+A refresh rebuilds only the orders touched since the bronze versions it last covered: orders
+or order lines that changed, and orders with a line for a stock item that changed. Those orders'
+fact rows are deleted and rebuilt from bronze. The covered versions are committed as the
+`userMetadata` of the rebuild, so an interrupted refresh is redone by the next one. A full
+reload of a source, or changes that can't be read, rebuild the whole table.
+"""
+
+import json
+from typing import Dict, Optional
+
+from delta.tables import DeltaTable
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+
+from .engine import METADATA_COLUMNS, ExtractionEngine, current_version
+from .layout import ORDER_LINE_FACT_LAYOUT, add_derived_columns, optimize_layout, write_with_layout
+from .metrics import commit_metadata, last_commit_metadata, table_version
+from .report import replaced_since
+
+ORDER_LINE_FACTS = "order_line_facts"
+
+# Columns each source contributes besides the order line columns
+ORDER_FACT_COLUMNS = (
+    "CustomerID", "SalespersonPersonID", "OrderDate", "ExpectedDeliveryDate",
+    "CustomerPurchaseOrderNumber", "IsUndersupplyBackordered",
+)
+STOCK_ITEM_FACT_COLUMNS = (
+    "StockItemName", "SupplierID", "ColorID", "Brand", "Size", "IsChillerStock",
+    "RecommendedRetailPrice",
+)
+FACT_SOURCES = ("orders", "order_lines", "stock_items")
+
+
+class OrderLineFacts:
+    """Keeps `order_line_facts` in the engine's schema up to date with the bronze tables it joins."""
+
+    def __init__(self, engine: ExtractionEngine):
+        self.engine = engine
+        self.spark = engine.spark
+        self.table = engine.qualify(ORDER_LINE_FACTS)
+
+    def covered_versions(self) -> Optional[Dict[str, int]]:
+        """Bronze versions the fact table was last refreshed to, or None if it has none."""
+        metadata = last_commit_metadata(self.spark, self.table)
+        return metadata.get("source_versions") if metadata else None
+
+    def build(self, order_ids: Optional[DataFrame] = None) -> DataFrame:
+        """Join order lines to their order and current stock item, for all orders or just `order_ids`."""
+        lines = self.spark.table(self.engine.qualify("order_lines"))
+        orders = self.spark.table(self.engine.qualify("orders")).select("OrderID", *ORDER_FACT_COLUMNS)
+        if order_ids is not None:
+            lines = lines.join(F.broadcast(order_ids), "OrderID", "left_semi")
+            orders = orders.join(F.broadcast(order_ids), "OrderID", "left_semi")
+        stock_items = self.spark.table(self.engine.qualify("stock_items")) \
+            .where(current_version()) \
+            .select("StockItemID", *STOCK_ITEM_FACT_COLUMNS)
+
+        facts = lines.join(orders, "OrderID").join(F.broadcast(stock_items), "StockItemID", "left")
+        line_columns = [column for column in lines.columns if column not in METADATA_COLUMNS]
+        facts = facts.select(*line_columns, *ORDER_FACT_COLUMNS, *STOCK_ITEM_FACT_COLUMNS, *METADATA_COLUMNS)
+        return add_derived_columns(facts, ORDER_LINE_FACT_LAYOUT)
+
+    def changed_orders(self, covered: Dict[str, int], versions: Dict[str, int]) -> DataFrame:
+        """OrderIDs whose fact rows may differ from bronze at `versions`."""
+        def changes(name: str) -> DataFrame:
+            return self.spark.read \
+                .option("readChangeFeed", "true") \
+                .option("startingVersion", covered[name] + 1) \
+                .option("endingVersion", versions[name]) \
+                .table(self.engine.qualify(name))
+
+        order_ids = []
+        for name in ("orders", "order_lines"):
+            if versions[name] > covered[name]:
+                order_ids.append(changes(name).select("OrderID"))
+        if versions["stock_items"] > covered["stock_items"]:
+            stock_item_ids = changes("stock_items").select("StockItemID").distinct()
+            order_ids.append(
+                self.spark.table(self.engine.qualify("order_lines"))
+                .join(F.broadcast(stock_item_ids), "StockItemID", "left_semi")
+                .select("OrderID")
+            )
+        if not order_ids:
+            return self.spark.createDataFrame([], "OrderID INT")
+        changed = order_ids[0]
+        for ids in order_ids[1:]:
+            changed = changed.unionByName(ids)
+        return changed.where(F.col("OrderID").isNotNull()).distinct()
+
+    def incremental(self, covered: Optional[Dict[str, int]], versions: Dict[str, int]) -> bool:
+        """Whether the changes since the covered versions can be applied instead of a full rebuild."""
+        if covered is None or set(covered) != set(versions):
+            return False
+        for name in FACT_SOURCES:
+            if covered[name] > versions[name]:
+                return False
+            # A full reload changes every row; rebuilding is cheaper than reading its changes
+            if replaced_since(self.spark, self.engine.qualify(name), covered[name]):
+                return False
+        return True
+
+    def refresh(self) -> bool:
+        """Bring the fact table up to date; returns False if it was rebuilt as a whole."""
+        sources = {name: self.engine.qualify(name) for name in FACT_SOURCES}
+        missing = [table for table in sources.values() if not self.spark.catalog.tableExists(table)]
+        if missing:
+            print(f"WARNING: Skipping {self.table}, {', '.join(missing)} not loaded yet")
+            return False
+
+        versions = {name: table_version(self.spark, table) for name, table in sources.items()}
+        covered = self.covered_versions()
+        if covered == versions:
+            print(f"{self.table} is up to date")
+            return True
+
+        if self.incremental(covered, versions):
+            try:
+                # Collected once, so the delete and the rebuild cover exactly the same orders
+                order_ids = [row["OrderID"] for row in self.changed_orders(covered, versions).collect()]
+            except Exception as e:
+                print(f"INFO: Could not read the bronze changes since {covered}, rebuilding {self.table} ({str(e)})")
+            else:
+                changed = self.spark.createDataFrame([(order_id,) for order_id in order_ids], "OrderID INT")
+                # Both commits carry the covered versions, so readers of the fact table's change feed can pair them
+                metadata = {"source_versions": versions}
+                if order_ids:
+                    with commit_metadata(self.spark, metadata):
+                        DeltaTable.forName(self.spark, self.table).alias("t") \
+                            .merge(changed.alias("s"), "t.OrderID = s.OrderID") \
+                            .whenMatchedDelete() \
+                            .execute()
+                self.build(changed).write \
+                    .mode("append") \
+                    .option("userMetadata", json.dumps(metadata)) \
+                    .saveAsTable(self.table)
+                if self.engine.optimize_after_merge:
+                    optimize_layout(self.spark, self.table, ORDER_LINE_FACT_LAYOUT)
+                print(f"✅ {self.table}: rebuilt the lines of {len(order_ids)} changed order(s)")
+                return True
+
+        write_with_layout(self.spark, self.build(), self.table, ORDER_LINE_FACT_LAYOUT, user_metadata={"source_versions": versions})
+        print(f"✅ {self.table} rebuilt from bronze")
+        return False
@@ -0,0 +1,108 @@
+"""Memory-mapped feature files for in-process lookups at serving time.
+
+A feature file is a NumPy `.npy` array of fixed-width records, one per key, sorted by the key in
+its first field. Loading it with `mmap_mode="r"` costs no reads up front: a lookup binary-searches
+the key column and touches only the pages of the rows it returns, so a point lookup takes
+microseconds and thousands of keys are looked up in one vectorized call.
+
+This module only needs NumPy, so a serving model can ship it as a single file (e.g. with MLflow
+`code_paths`) without Spark. Files are written by `features.FeatureMaterializer`.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def write_feature_file(path: str, records: np.ndarray, metadata: Dict[str, Any]) -> None:
+    """Publish `records` (sorted by their first field) and a JSON sidecar of `metadata` at `path`.
+
+    Both files are written next to their destination and renamed into place, so a reader opens
+    either the previous file or the new one, never a partial write.
+    """
+    key_field = records.dtype.names[0]
+    keys = records[key_field]
+    if len(keys) > 1 and not np.all(keys[1:] > keys[:-1]):
+        raise ValueError(f"Feature records must be sorted by unique {key_field}")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    staging = f"{path}.tmp"
+    with open(staging, "wb") as f:
+        np.save(f, records, allow_pickle=False)
+    os.replace(staging, path)
+
+    sidecar = {
+        **metadata,
+        "key": key_field,
+        "columns": {name: records.dtype[name].str for name in records.dtype.names},
+        "count": int(len(records)),
+    }
+    with open(f"{path}.json.tmp", "w") as f:
+        json.dump(sidecar, f)
+    os.replace(f"{path}.json.tmp", f"{path}.json")
+
+
+class FeatureLookup:
+    """Read-only, memory-mapped view of a feature file.
+
+    `reload()` re-opens the file when a newer one was published, so a long-running serving
+    process picks up each ETL run without restarting. Arrays returned earlier stay valid.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Optional[np.ndarray] = None
+        self.keys: Optional[np.ndarray] = None
+        self.metadata: Dict[str, Any] = {}
+        # Inode and modification time of the opened file; a publish renames a new inode into place
+        self.file_id: Optional[Tuple[int, int]] = None
+        self.reload()
+
+    @property
+    def key_field(self) -> str:
+        return self.records.dtype.names[0]
+
+    @property
+    def feature_names(self) -> Tuple[str, ...]:
+        return self.records.dtype.names[1:]
+
+    def reload(self) -> bool:
+        """Open the current file if it changed since it was last opened; returns whether it did."""
+        stat = os.stat(self.path)
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if file_id == self.file_id:
+            return False
+        records = np.load(self.path, mmap_mode="r", allow_pickle=False)
+        metadata_path = f"{self.path}.json"
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        self.records, self.keys, self.metadata = records, records[records.dtype.names[0]], metadata
+        self.file_id = file_id
+        return True
+
+    def lookup(self, keys: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Features of many keys at once.
+
+        Returns the records in the order of `keys` and a boolean mask of the keys that were found;
+        the records of keys that weren't found are zero-filled.
+        """
+        wanted = np.asarray(keys, dtype=self.keys.dtype)
+        positions = np.searchsorted(self.keys, wanted)
+        positions = np.minimum(positions, len(self.keys) - 1) if len(self.keys) else np.zeros_like(positions)
+        found = self.keys[positions] == wanted if len(self.keys) else np.zeros(len(wanted), dtype=bool)
+        records = np.zeros(len(wanted), dtype=self.records.dtype)
+        records[found] = self.records[positions[found]]
+        return records, found
+
+    def get(self, key: int) -> Optional[Dict[str, Any]]:
+        """Features of one key as a dict, or None if the key has none."""
+        records, found = self.lookup([key])
+        if not found[0]:
+            return None
+        return {name: records[0][name].item() for name in self.feature_names}
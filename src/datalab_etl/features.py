@@ -0,0 +1,274 @@
+"""Serving features materialized from bronze into Delta feature tables and memory-mapped files.
+
+Each `FeatureSet` is kept as a Delta table next to bronze, one row per key, and exported to a
+`.npy` feature file (see `feature_store`) that the serving model opens with `FeatureLookup`.
+
+A refresh recomputes only the keys whose features may have changed since the source versions it
+last covered: keys in the Change Data Feed of a source table, and keys with orders that dropped out
+of the recent window because the as-of date moved. Their rows are MERGEd into the feature table
+together with the covered versions and as-of date (as Delta `userMetadata`), so an interrupted
+refresh is redone by the next one. A full reload of a source, or changes that can't be read,
+recompute every key. The feature file is re-exported whenever the feature table changed.
+"""
+
+import datetime
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from delta.tables import DeltaTable
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+
+from .engine import ExtractionEngine, current_version
+from .facts import ORDER_LINE_FACTS
+from .feature_store import write_feature_file
+from .metrics import commit_metadata, last_commit_metadata, table_version
+from .report import replaced_since
+
+# Window of the `recent_*` features, counted back from the as-of date
+RECENT_DAYS = 90
+
+# Dates are stored as days since the epoch, -1 when there is none
+EPOCH = "1970-01-01"
+
+SPARK_TYPES = {"int32": "int", "int64": "bigint", "float32": "float", "float64": "double"}
+
+
+@dataclass(frozen=True)
+class FeatureSet:
+    """Serving features of one entity, one row per integer key.
+
+    - `key`: key column, stored as int64 in the first field of the feature file
+    - `features`: (column, NumPy dtype) in file order
+    - `sources`: tables whose changed rows change the features of the keys they carry
+    """
+
+    name: str
+    key: str
+    features: Tuple[Tuple[str, str], ...]
+    sources: Tuple[str, ...]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([(self.key, "int64"), *self.features])
+
+
+FEATURE_SETS: Dict[str, FeatureSet] = {
+    feature_set.name: feature_set
+    for feature_set in [
+        FeatureSet(
+            name="customer_features",
+            key="CustomerID",
+            features=(
+                ("order_count", "int32"),
+                ("total_spend", "float64"),
+                ("recent_order_count", "int32"),
+                ("recent_spend", "float64"),
+                ("last_order_day", "int32"),
+            ),
+            sources=(ORDER_LINE_FACTS,),
+        ),
+        FeatureSet(
+            name="stock_item_features",
+            key="StockItemID",
+            features=(
+                ("quantity_on_hand", "int32"),
+                ("reorder_level", "int32"),
+                # NaN without a reorder level
+                ("stock_to_reorder_ratio", "float32"),
+                ("unit_price", "float64"),
+                ("recent_units_sold", "int64"),
+                ("last_sold_day", "int32"),
+            ),
+            sources=(ORDER_LINE_FACTS, "stock_item_holdings", "stock_items"),
+        ),
+    ]
+}
+
+
+class FeatureMaterializer:
+    """Keeps the feature tables in the engine's schema and their files in `export_dir` up to date.
+
+    Features are computed from `order_line_facts`, which must be refreshed first, and from the
+    current stock items and holdings in bronze.
+    """
+
+    def __init__(
+        self,
+        engine: ExtractionEngine,
+        export_dir: str,
+        recent_days: int = RECENT_DAYS,
+        as_of: Optional[datetime.date] = None,
+    ):
+        self.engine = engine
+        self.spark = engine.spark
+        self.export_dir = export_dir
+        self.recent_days = recent_days
+        self.as_of = as_of or datetime.date.today()
+        self.builders = {
+            "customer_features": self.customer_features,
+            "stock_item_features": self.stock_item_features,
+        }
+
+    def cutoff(self, as_of: datetime.date) -> str:
+        """First order date counted as recent on `as_of`."""
+        return (as_of - datetime.timedelta(days=self.recent_days)).isoformat()
+
+    def file_path(self, feature_set: FeatureSet) -> str:
+        return os.path.join(self.export_dir, f"{feature_set.name}.npy")
+
+    def customer_features(self, keys: Optional[DataFrame]) -> DataFrame:
+        facts = self.spark.table(self.engine.qualify(ORDER_LINE_FACTS))
+        if keys is not None:
+            facts = facts.join(F.broadcast(keys), "CustomerID", "left_semi")
+        value = F.col("Quantity") * F.col("UnitPrice")
+        recent = F.col("OrderDate") >= F.lit(self.cutoff(self.as_of)).cast("date")
+        return facts.groupBy("CustomerID").agg(
+            F.countDistinct("OrderID").alias("order_count"),
+            F.coalesce(F.sum(value), F.lit(0)).alias("total_spend"),
+            F.countDistinct(F.when(recent, F.col("OrderID"))).alias("recent_order_count"),
+            F.coalesce(F.sum(F.when(recent, value)), F.lit(0)).alias("recent_spend"),
+            F.datediff(F.max("OrderDate"), F.lit(EPOCH)).alias("last_order_day"),
+        )
+
+    def stock_item_features(self, keys: Optional[DataFrame]) -> DataFrame:
+        items = self.spark.table(self.engine.qualify("stock_items")).where(current_version()).select("StockItemID", "UnitPrice")
+        holdings = self.spark.table(self.engine.qualify("stock_item_holdings")).select("StockItemID", "QuantityOnHand", "ReorderLevel")
+        facts = self.spark.table(self.engine.qualify(ORDER_LINE_FACTS))
+        if keys is not None:
+            items = items.join(F.broadcast(keys), "StockItemID", "left_semi")
+            facts = facts.join(F.broadcast(keys), "StockItemID", "left_semi")
+        recent = F.col("OrderDate") >= F.lit(self.cutoff(self.as_of)).cast("date")
+        sales = facts.groupBy("StockItemID").agg(
+            F.sum(F.when(recent, F.col("Quantity"))).alias("recent_units_sold"),
+            F.datediff(F.max("OrderDate"), F.lit(EPOCH)).alias("last_sold_day"),
+        )
+        return items.join(holdings, "StockItemID", "left").join(sales, "StockItemID", "left").select(
+            "StockItemID",
+            F.coalesce("QuantityOnHand", F.lit(0)).alias("quantity_on_hand"),
+            F.coalesce("ReorderLevel", F.lit(0)).alias("reorder_level"),
+            F.when(F.col("ReorderLevel") > 0, F.col("QuantityOnHand") / F.col("ReorderLevel"))
+                .otherwise(F.lit(float("nan"))).alias("stock_to_reorder_ratio"),
+            F.col("UnitPrice").alias("unit_price"),
+            F.coalesce("recent_units_sold", F.lit(0)).alias("recent_units_sold"),
+            F.coalesce("last_sold_day", F.lit(-1)).alias("last_sold_day"),
+        )
+
+    def build(self, feature_set: FeatureSet, keys: Optional[DataFrame] = None) -> DataFrame:
+        """Features of every key, or just of `keys`, typed as they are stored in the feature file."""
+        features = self.builders[feature_set.name](keys)
+        return features.select(
+            F.col(feature_set.key).cast("bigint"),
+            *[F.col(column).cast(SPARK_TYPES[dtype]).alias(column) for column, dtype in feature_set.features],
+        )
+
+    def changed_keys(self, feature_set: FeatureSet, covered: Dict[str, int], versions: Dict[str, int], covered_as_of: str) -> DataFrame:
+        """Keys whose features may differ from those computed at the covered versions and as-of date."""
+        keys = []
+        for name in feature_set.sources:
+            if versions[name] > covered[name]:
+                keys.append(
+                    self.spark.read
+                    .option("readChangeFeed", "true")
+                    .option("startingVersion", covered[name] + 1)
+                    .option("endingVersion", versions[name])
+                    .table(self.engine.qualify(name))
+                    .select(feature_set.key)
+                )
+        previous_cutoff, cutoff = self.cutoff(datetime.date.fromisoformat(covered_as_of)), self.cutoff(self.as_of)
+        if cutoff > previous_cutoff:
+            # Orders that left the recent window since the last refresh
+            keys.append(
+                self.spark.table(self.engine.qualify(ORDER_LINE_FACTS))
+                .where((F.col("OrderDate") >= F.lit(previous_cutoff).cast("date")) & (F.col("OrderDate") < F.lit(cutoff).cast("date")))
+                .select(feature_set.key)
+            )
+        changed = self.spark.createDataFrame([], f"{feature_set.key} BIGINT")
+        for ids in keys:
+            changed = changed.unionByName(ids.select(F.col(feature_set.key).cast("bigint")))
+        return changed.where(F.col(feature_set.key).isNotNull()).distinct()
+
+    def refresh(self, feature_set: FeatureSet) -> bool:
+        """Bring the feature table and file up to date; returns False if every key was recomputed."""
+        table = self.engine.qualify(feature_set.name)
+        sources = {name: self.engine.qualify(name) for name in feature_set.sources}
+        missing = [source for source in sources.values() if not self.spark.catalog.tableExists(source)]
+        if missing:
+            print(f"WARNING: Skipping {table}, {', '.join(missing)} not loaded yet")
+            return False
+
+        versions = {name: table_version(self.spark, source) for name, source in sources.items()}
+        as_of = self.as_of.isoformat()
+        metadata = last_commit_metadata(self.spark, table) or {}
+        covered, covered_as_of = metadata.get("source_versions"), metadata.get("as_of")
+        if covered == versions and covered_as_of == as_of:
+            print(f"{table} is up to date")
+            self.export(feature_set)
+            return True
+
+        incremental = (
+            covered is not None
+            and set(covered) == set(versions)
+            and covered_as_of is not None
+            and covered_as_of <= as_of
+            and all(covered[name] <= versions[name] and not replaced_since(self.spark, sources[name], covered[name]) for name in sources)
+        )
+        if incremental:
+            try:
+                # Collected once, so the features are recomputed for exactly the keys that are replaced
+                keys = [row[0] for row in self.changed_keys(feature_set, covered, versions, covered_as_of).collect()]
+            except Exception as e:
+                print(f"INFO: Could not read the changes since {covered}, recomputing {table} ({str(e)})")
+                incremental = False
+
+        metadata = {"source_versions": versions, "as_of": as_of}
+        if incremental:
+            changed = self.spark.createDataFrame([(key,) for key in keys], f"{feature_set.key} BIGINT")
+            # Keys without features any more (e.g. every order line deleted) carry nulls and are removed
+            updates = changed.join(self.build(feature_set, changed).withColumn("_exists", F.lit(True)), feature_set.key, "left")
+            columns = [feature_set.key, *[column for column, _ in feature_set.features]]
+            with commit_metadata(self.spark, metadata):
+                DeltaTable.forName(self.spark, table).alias("t") \
+                    .merge(updates.alias("s"), f"t.{feature_set.key} = s.{feature_set.key}") \
+                    .whenMatchedDelete(condition="s._exists IS NULL") \
+                    .whenMatchedUpdate(set={column: f"s.{column}" for column in columns}) \
+                    .whenNotMatchedInsert(condition="s._exists IS NOT NULL", values={column: f"s.{column}" for column in columns}) \
+                    .execute()
+        else:
+            self.build(feature_set).write \
+                .mode("overwrite") \
+                .option("overwriteSchema", "true") \
+                .option("userMetadata", json.dumps(metadata)) \
+                .saveAsTable(table)
+        print(f"✅ {table}: {f'recomputed {len(keys)} changed key(s)' if incremental else 'recomputed every key'} as of {as_of}")
+        self.export(feature_set)
+        return incremental
+
+    def export(self, feature_set: FeatureSet) -> None:
+        """Write the feature table to its feature file, unless the file already holds its current version."""
+        table = self.engine.qualify(feature_set.name)
+        path = self.file_path(feature_set)
+        version = table_version(self.spark, table)
+        if os.path.exists(f"{path}.json"):
+            with open(f"{path}.json") as f:
+                if json.load(f).get("table_version") == version:
+                    return
+
+        self.spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+        rows = self.spark.table(table).orderBy(feature_set.key).toPandas()
+        records = np.zeros(len(rows), dtype=feature_set.dtype)
+        for column in feature_set.dtype.names:
+            records[column] = rows[column].to_numpy()
+        write_feature_file(path, records, {"table": table, "table_version": version, "as_of": self.as_of.isoformat()})
+        print(f"✅ Exported {len(records)} rows of {table} to {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+    def refresh_all(self, feature_sets: Iterable[FeatureSet]) -> None:
+        """Refresh every feature set; a failed one is reported and left for the next run."""
+        for feature_set in feature_sets:
+            try:
+                self.refresh(feature_set)
+            except Exception as e:
+                print(f"WARNING: Could not refresh {feature_set.name}: {str(e)}")
@@ -0,0 +1,228 @@
+"""Ingest-time projection of JSON string columns into typed struct and array columns."""
+
+import json
+from typing import Any, List, Optional
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import (
+    ArrayType,
+    BooleanType,
+    DataType,
+    DoubleType,
+    LongType,
+    NullType,
+    StringType,
+    StructField,
+    StructType,
+)
+
+from .control import JsonSchemaStore
+from .registry import TableSpec
+
+# add: extend the cached schema with new keys; freeze: keep it and leave new keys in the raw
+# string; fail: stop the load until the schema change is accepted by running with `add`
+SCHEMA_EVOLUTION_MODES = ("add", "freeze", "fail")
+
+# Holds the raw value when checking a cached schema parses it
+CORRUPT_RECORD_COLUMN = "_corrupt_record"
+
+
+def parsed_column(column: str) -> str:
+    """Name of the typed column projected from a JSON string column."""
+    return f"{column}Parsed"
+
+
+def infer_json_type(value: Any) -> DataType:
+    """Spark type of one decoded JSON value."""
+    if value is None:
+        return NullType()
+    if isinstance(value, bool):
+        return BooleanType()
+    if isinstance(value, int):
+        return LongType()
+    if isinstance(value, float):
+        return DoubleType()
+    if isinstance(value, str):
+        return StringType()
+    if isinstance(value, list):
+        element: DataType = NullType()
+        for item in value:
+            element = merge_types(element, infer_json_type(item))
+        return ArrayType(element)
+    return StructType([StructField(key, infer_json_type(item)) for key, item in value.items()])
+
+
+def merge_types(current: DataType, new: DataType) -> DataType:
+    """Widen `current` so it also holds `new`.
+
+    Struct fields are matched by name and new fields are appended, integers widen to DOUBLE
+    and any other conflict falls back to STRING.
+    """
+    if isinstance(current, NullType):
+        return new
+    if isinstance(new, NullType):
+        return current
+    if isinstance(current, StructType) and isinstance(new, StructType):
+        fields = {field.name: field.dataType for field in current.fields}
+        for field in new.fields:
+            fields[field.name] = merge_types(fields[field.name], field.dataType) if field.name in fields else field.dataType
+        return StructType([StructField(name, data_type) for name, data_type in fields.items()])
+    if isinstance(current, ArrayType) and isinstance(new, ArrayType):
+        return ArrayType(merge_types(current.elementType, new.elementType))
+    if current == new:
+        return current
+    if {type(current), type(new)} == {LongType, DoubleType}:
+        return DoubleType()
+    return StringType()
+
+
+def added_fields(current: DataType, merged: DataType, prefix: str = "") -> List[str]:
+    """Dotted paths of struct fields present in `merged` but not in `current`."""
+    if isinstance(merged, ArrayType):
+        current_element = current.elementType if isinstance(current, ArrayType) else NullType()
+        return added_fields(current_element, merged.elementType, f"{prefix}[]")
+    if not isinstance(merged, StructType):
+        return []
+    current_fields = {field.name: field.dataType for field in current.fields} if isinstance(current, StructType) else {}
+    paths = []
+    for field in merged.fields:
+        path = f"{prefix}.{field.name}" if prefix else field.name
+        if field.name in current_fields:
+            paths += added_fields(current_fields[field.name], field.dataType, path)
+        else:
+            paths.append(path)
+    return paths
+
+
+def readable_type(data_type: DataType) -> DataType:
+    """Replace types only ever seen as null with STRING; Delta cannot store void columns."""
+    if isinstance(data_type, NullType):
+        return StringType()
+    if isinstance(data_type, ArrayType):
+        return ArrayType(readable_type(data_type.elementType))
+    if isinstance(data_type, StructType):
+        return StructType([StructField(field.name, readable_type(field.dataType)) for field in data_type.fields])
+    return data_type
+
+
+def schema_to_json(data_type: DataType) -> str:
+    return StructType([StructField("value", data_type)]).json()
+
+
+def schema_from_json(schema_json: str) -> DataType:
+    return StructType.fromJson(json.loads(schema_json)).fields[0].dataType
+
+
+class JsonProjector:
+    """Parses a table's JSON string columns once at ingest, into `<column>Parsed` typed columns.
+
+    The schema of each column is inferred from the staged rows the first time and cached in
+    the `_etl_json_schemas` control table. Later runs read the cached schema and check in one
+    pass that it parses every value and knows every top-level key; only rows that don't fit
+    lead to a new inference, and the schema changes as the evolution mode allows.
+    """
+
+    def __init__(self, spark: SparkSession, store: JsonSchemaStore, evolution: str = "add", sample_size: int = 1000):
+        if evolution not in SCHEMA_EVOLUTION_MODES:
+            raise ValueError(f"evolution must be one of {SCHEMA_EVOLUTION_MODES}, got '{evolution}'")
+        self.spark = spark
+        self.store = store
+        self.evolution = evolution
+        self.sample_size = sample_size
+
+    def sample(self, df: DataFrame, column: str) -> List[Any]:
+        """Decode a sample of distinct values, plus rows carrying any object key the sample missed."""
+        values = df.where(F.col(column).isNotNull()).select(column).distinct()
+        raw_values = [row[0] for row in values.limit(self.sample_size).collect()]
+
+        # json_object_keys is NULL for arrays and scalars, so this only looks at objects
+        object_keys = F.expr(f"json_object_keys({column})")
+        all_keys = {row[0] for row in df.select(F.explode(object_keys)).distinct().collect()}
+        decoded = [self.decode(raw) for raw in raw_values]
+        seen_keys = {key for value in decoded if isinstance(value, dict) for key in value}
+        missing_keys = sorted(all_keys - seen_keys)
+        if missing_keys:
+            extra = values.where(F.arrays_overlap(object_keys, F.array(*[F.lit(key) for key in missing_keys])))
+            decoded += [self.decode(row[0]) for row in extra.limit(self.sample_size).collect()]
+
+        return [value for value in decoded if value is not None]
+
+    @staticmethod
+    def fits(df: DataFrame, column: str, schema: DataType) -> bool:
+        """Whether `schema` parses every JSON value of `column` and knows all its top-level keys.
+
+        One aggregation over the rows. Keys new below the top level only show when they break
+        parsing; values that aren't JSON at all are ignored, as inference ignores them.
+        """
+        if not isinstance(schema, (StructType, ArrayType)):
+            return True
+        raw = F.col(column)
+        if isinstance(schema, StructType):
+            checked = StructType(schema.fields + [StructField(CORRUPT_RECORD_COLUMN, StringType())])
+            parsed = F.from_json(raw, checked, {"columnNameOfCorruptRecord": CORRUPT_RECORD_COLUMN})
+            known_keys = F.array(*[F.lit(field.name) for field in schema.fields]).cast("array<string>")
+            # json_object_keys is NULL for arrays and scalars, whose size is then -1
+            new_keys = F.size(F.array_except(F.expr(f"json_object_keys({column})"), known_keys)) > 0
+            misfit = parsed[CORRUPT_RECORD_COLUMN].isNotNull() | new_keys
+        else:
+            misfit = F.from_json(raw, schema).isNull()
+        is_json = F.get_json_object(raw, "$").isNotNull()
+        return df.where(is_json).agg(F.count(F.when(misfit, 1)).alias("misfits")).collect()[0]["misfits"] == 0
+
+    @staticmethod
+    def decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def resolve_schema(self, df: DataFrame, spec: TableSpec, column: str) -> Optional[DataType]:
+        """Return the schema to parse `column` with, evolving the cached schema if allowed.
+
+        Returns None while no schema is cached and the rows have no JSON to infer one from.
+        """
+        cached = self.store.get(spec.name, column)
+        if cached is not None and self.fits(df, column, readable_type(schema_from_json(cached[0]))):
+            return readable_type(schema_from_json(cached[0]))
+
+        inferred: DataType = NullType()
+        for value in self.sample(df, column):
+            inferred = merge_types(inferred, infer_json_type(value))
+
+        if cached is None:
+            if isinstance(inferred, NullType):
+                print(f"INFO: No JSON values in {spec.name}.{column} to infer a schema from, not projecting it")
+                return None
+            self.store.set(spec.name, column, schema_to_json(inferred), 1, "")
+            print(f"Inferred JSON schema for {spec.name}.{column}: {readable_type(inferred).simpleString()}")
+            return readable_type(inferred)
+
+        cached_json, version = cached
+        current = schema_from_json(cached_json)
+        merged = merge_types(current, inferred)
+        if merged == current:
+            return readable_type(current)
+
+        changes = ", ".join(added_fields(current, merged)) or "widened field types"
+        if self.evolution == "fail":
+            raise ValueError(f"JSON schema of {spec.name}.{column} changed ({changes}); rerun with json_schema_evolution=add to accept it")
+        if self.evolution == "freeze":
+            print(f"WARNING: JSON schema of {spec.name}.{column} changed ({changes}); kept schema version {version}, new fields stay in the raw column only")
+            return readable_type(current)
+
+        self.store.set(spec.name, column, schema_to_json(merged), version + 1, changes)
+        print(f"Evolved JSON schema of {spec.name}.{column} to version {version + 1}: {changes}")
+        return readable_type(merged)
+
+    def project(self, df: DataFrame, spec: TableSpec) -> DataFrame:
+        """Add a typed `<column>Parsed` column next to each raw JSON column of the table."""
+        for column in spec.json_columns:
+            schema = self.resolve_schema(df, spec, column)
+            if schema is None:
+                continue
+            if not isinstance(schema, (StructType, ArrayType)):
+                print(f"WARNING: {spec.name}.{column} does not hold JSON objects or arrays ({schema.simpleString()}), not projecting it")
+                continue
+            df = df.withColumn(parsed_column(column), F.from_json(column, schema))
+        return df
@@ -0,0 +1,231 @@
+"""Physical layout of bronze Delta tables: partitioning, clustering, Bloom filters, file size and compression."""
+
+import json
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+from .metrics import commit_metadata
+
+
+@dataclass(frozen=True)
+class TableLayout:
+    """How a bronze table is laid out on storage.
+
+    - `derived_columns`: (name, SQL expression) columns added before writing, typically a coarse
+      partition key such as `("OrderMonth", "TRUNC(OrderDate, 'MM')")`
+    - `partition_by`: Delta partition columns; keep them coarse (month/year) so each partition
+      holds a few large files instead of one directory of tiny files per day
+    - `zorder_by`: columns to co-locate for data skipping; full loads range-partition and sort on
+      them while writing, incremental loads run `OPTIMIZE ... ZORDER BY` afterwards
+    - `cluster_by`: liquid clustering columns, used instead of partitioning and Z-ordering
+    - `bloom_filter_columns`: key columns with a Databricks Bloom filter index in every data file,
+      so point lookups also skip files whose min/max range covers the key without holding it
+    - `target_file_size`: `delta.targetFileSize` table property, e.g. `"128mb"`
+    - `compression`: Parquet compression codec for full loads, e.g. `"zstd"` or `"snappy"` (liquid
+      clustered tables are created with CREATE TABLE AS SELECT and use the session codec)
+    """
+
+    derived_columns: Tuple[Tuple[str, str], ...] = ()
+    partition_by: Tuple[str, ...] = ()
+    zorder_by: Tuple[str, ...] = ()
+    cluster_by: Tuple[str, ...] = ()
+    bloom_filter_columns: Tuple[str, ...] = ()
+    target_file_size: Optional[str] = None
+    compression: Optional[str] = None
+
+    def __post_init__(self):
+        if self.cluster_by and (self.partition_by or self.zorder_by):
+            raise ValueError("cluster_by replaces partition_by and zorder_by; use one or the other")
+
+
+# Default file settings shared by all bronze tables
+DEFAULT_TARGET_FILE_SIZE = "128mb"
+DEFAULT_COMPRESSION = "zstd"
+
+# Bloom filter indexes: false positive rate, and distinct values expected per data file
+BLOOM_FILTER_FPP = 0.1
+BLOOM_FILTER_NUM_ITEMS = 1000000
+
+# Column metadata of a Bloom filter index; files are indexed when written with it in the schema
+BLOOM_FILTER_METADATA: Dict[str, Any] = {
+    "delta.bloomFilter.enabled": True,
+    "delta.bloomFilter.fpp": BLOOM_FILTER_FPP,
+    "delta.bloomFilter.numItems": BLOOM_FILTER_NUM_ITEMS,
+    "delta.bloomFilter.maxExpectedFpp": 1.0,
+}
+
+# Layouts for bronze.orders, selectable per run and compared by the layout benchmark
+ORDERS_LAYOUTS: Dict[str, TableLayout] = {
+    # The original layout: one partition per OrderDate
+    "daily": TableLayout(partition_by=("OrderDate",)),
+    "monthly": TableLayout(
+        derived_columns=(("OrderMonth", "TRUNC(OrderDate, 'MM')"),),
+        partition_by=("OrderMonth",),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "monthly_zorder": TableLayout(
+        derived_columns=(("OrderMonth", "TRUNC(OrderDate, 'MM')"),),
+        partition_by=("OrderMonth",),
+        zorder_by=("OrderID", "CustomerID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "monthly_zorder_bloom": TableLayout(
+        derived_columns=(("OrderMonth", "TRUNC(OrderDate, 'MM')"),),
+        partition_by=("OrderMonth",),
+        zorder_by=("OrderID", "CustomerID"),
+        bloom_filter_columns=("OrderID", "CustomerID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "yearly_zorder": TableLayout(
+        derived_columns=(("OrderYear", "YEAR(OrderDate)"),),
+        partition_by=("OrderYear",),
+        zorder_by=("OrderID", "CustomerID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "zorder": TableLayout(
+        zorder_by=("OrderID", "CustomerID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "liquid": TableLayout(
+        cluster_by=("OrderID", "CustomerID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+}
+
+# Layouts for bronze.order_lines; lookups go by order or by stock item
+ORDER_LINES_LAYOUTS: Dict[str, TableLayout] = {
+    "none": TableLayout(),
+    "zorder": TableLayout(
+        zorder_by=("OrderID", "StockItemID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "zorder_bloom": TableLayout(
+        zorder_by=("OrderID", "StockItemID"),
+        bloom_filter_columns=("OrderID", "StockItemID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+    "liquid": TableLayout(
+        cluster_by=("OrderID", "StockItemID"),
+        target_file_size=DEFAULT_TARGET_FILE_SIZE,
+        compression=DEFAULT_COMPRESSION,
+    ),
+}
+
+# Layout of the pre-joined order line fact table: monthly like orders, co-located by order and stock item
+ORDER_LINE_FACT_LAYOUT = TableLayout(
+    derived_columns=(("OrderMonth", "TRUNC(OrderDate, 'MM')"),),
+    partition_by=("OrderMonth",),
+    zorder_by=("OrderID", "StockItemID"),
+    target_file_size=DEFAULT_TARGET_FILE_SIZE,
+    compression=DEFAULT_COMPRESSION,
+)
+
+
+def add_derived_columns(df: DataFrame, layout: TableLayout) -> DataFrame:
+    """Add the layout's derived columns (such as a month partition key) to a DataFrame."""
+    for name, expression in layout.derived_columns:
+        df = df.withColumn(name, F.expr(expression))
+    return df
+
+
+def add_bloom_filters(df: DataFrame, layout: TableLayout) -> DataFrame:
+    """Declare the layout's Bloom filter indexes on the columns of `df`, so the files written from it are indexed."""
+    return df.select(*[
+        F.col(field.name).alias(field.name, metadata={**field.metadata, **BLOOM_FILTER_METADATA})
+        if field.name in layout.bloom_filter_columns else F.col(field.name)
+        for field in df.schema.fields
+    ])
+
+
+def write_with_layout(
+    spark: SparkSession,
+    df: DataFrame,
+    table: str,
+    layout: TableLayout,
+    user_metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Replace a Delta table with the contents of `df`, laid out as declared.
+
+    `user_metadata` is attached to the commit as Delta `userMetadata`.
+    """
+    if layout.bloom_filter_columns:
+        df = add_bloom_filters(df, layout)
+    if layout.cluster_by:
+        view_name = f"_layout_source_{table.replace('.', '_')}"
+        df.createOrReplaceTempView(view_name)
+        # CREATE OR REPLACE takes no writer options, so the metadata goes through the session conf
+        with commit_metadata(spark, user_metadata) if user_metadata else nullcontext():
+            spark.sql(f"""
+                CREATE OR REPLACE TABLE {table}
+                CLUSTER BY ({', '.join(layout.cluster_by)})
+                AS SELECT * FROM {view_name}
+            """)
+        spark.catalog.dropTempView(view_name)
+    else:
+        if layout.partition_by:
+            # One writer per table partition, so each partition gets a few large files
+            df = df.repartition(*layout.partition_by)
+            if layout.zorder_by:
+                df = df.sortWithinPartitions(*layout.zorder_by)
+        elif layout.zorder_by:
+            # Non-overlapping key ranges per file keep min/max statistics selective
+            df = df.repartitionByRange(*layout.zorder_by).sortWithinPartitions(*layout.zorder_by)
+
+        writer = df.write \
+            .mode("overwrite") \
+            .option("overwriteSchema", "true")
+        if layout.compression:
+            writer = writer.option("compression", layout.compression)
+        if user_metadata:
+            writer = writer.option("userMetadata", json.dumps(user_metadata))
+        if layout.partition_by:
+            writer = writer.partitionBy(*layout.partition_by)
+        writer.saveAsTable(table)
+
+    apply_table_properties(spark, table, layout)
+
+
+def apply_table_properties(spark: SparkSession, table: str, layout: TableLayout) -> None:
+    """Set the layout's Delta table properties."""
+    if layout.target_file_size:
+        spark.sql(f"ALTER TABLE {table} SET TBLPROPERTIES ('delta.targetFileSize' = '{layout.target_file_size}')")
+    ensure_bloom_filters(spark, table, layout)
+
+
+def ensure_bloom_filters(spark: SparkSession, table: str, layout: TableLayout) -> None:
+    """Create the layout's missing Bloom filter indexes; files written from then on are indexed.
+
+    The index is kept in the table schema, so MERGEs and `replaceWhere` writes index their
+    files too. Files written before the index existed are indexed when OPTIMIZE rewrites them.
+    """
+    if not layout.bloom_filter_columns:
+        return
+    fields = {field.name: field for field in spark.table(table).schema.fields}
+    missing = [
+        column for column in layout.bloom_filter_columns
+        if column in fields and not fields[column].metadata.get("delta.bloomFilter.enabled")
+    ]
+    if missing:
+        options = f"OPTIONS (fpp = {BLOOM_FILTER_FPP}, numItems = {BLOOM_FILTER_NUM_ITEMS})"
+        spark.sql(f"CREATE BLOOMFILTER INDEX ON TABLE {table} FOR COLUMNS ({', '.join(f'{column} {options}' for column in missing)})")
+
+
+def optimize_layout(spark: SparkSession, table: str, layout: TableLayout) -> None:
+    """Restore clustering after incremental writes (MERGE appends unclustered files)."""
+    ensure_bloom_filters(spark, table, layout)
+    if layout.cluster_by:
+        spark.sql(f"OPTIMIZE {table}")
+    elif layout.zorder_by:
+        spark.sql(f"OPTIMIZE {table} ZORDER BY ({', '.join(layout.zorder_by)})")
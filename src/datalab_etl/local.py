@@ -0,0 +1,134 @@
+"""Local stand-ins for running the extraction without Databricks or SQL Server.
+
+The source is an H2 database in SQL Server compatibility mode, with `Sales` and `Warehouse`
+schemas so the registry's queries run unchanged, and the target is the Delta-enabled session
+catalog of a local Spark. SQL Server-only features are not available locally: statistics
+histograms (range planning falls back to NTILE), `FOR SYSTEM_TIME` change capture and
+`HASHBYTES`, so temporal tables only run full loads and BLOB columns can't be split off. Small
+tables are read through JDBC too, since the driver-side fetch needs SQL Server.
+
+Change Tracking is stood in for by a `<table>_CT` table per tracked table, holding key columns,
+`SYS_CHANGE_VERSION` and `SYS_CHANGE_OPERATION` rows appended with `record_changes`.
+"""
+
+import os
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pyspark.sql import DataFrame, SparkSession
+
+from .engine import ExtractionEngine
+from .registry import TableSpec
+from .source import SqlServerSource, TableSize
+
+H2_DRIVER = "org.h2.Driver"
+H2_PACKAGE = "com.h2database:h2:2.2.224"
+
+
+def h2_url(path: str) -> str:
+    """JDBC URL of a file-based H2 database that behaves like SQL Server for our queries."""
+    return (
+        f"jdbc:h2:file:{os.path.abspath(path)};MODE=MSSQLServer;DATABASE_TO_UPPER=FALSE;"
+        "CASE_INSENSITIVE_IDENTIFIERS=TRUE;INIT=CREATE SCHEMA IF NOT EXISTS Sales\\;CREATE SCHEMA IF NOT EXISTS Warehouse"
+    )
+
+
+def local_spark(warehouse_dir: str, app_name: str = "datalab-local") -> SparkSession:
+    """Local Spark session with Delta Lake and the H2 JDBC driver."""
+    from delta import configure_spark_with_delta_pip
+
+    builder = SparkSession.builder \
+        .master("local[*]") \
+        .appName(app_name) \
+        .config("spark.sql.extensions", "io.delta.sql.DeltaSparkSessionExtension") \
+        .config("spark.sql.catalog.spark_catalog", "org.apache.spark.sql.delta.catalog.DeltaCatalog") \
+        .config("spark.sql.warehouse.dir", os.path.abspath(warehouse_dir)) \
+        .config("spark.scheduler.mode", "FAIR") \
+        .config("spark.ui.showConsoleProgress", "false")
+    return configure_spark_with_delta_pip(builder, extra_packages=[H2_PACKAGE]).getOrCreate()
+
+
+def local_spec(spec: TableSpec) -> TableSpec:
+    """A registry entry without the Databricks-only `delta.targetFileSize` table property."""
+    return replace(spec, layout=replace(spec.layout, target_file_size=None))
+
+
+class H2Source(SqlServerSource):
+    """A local H2 database standing in for the WorldWideImporters SQL Server."""
+
+    def __init__(self, spark: SparkSession, path: str, user: str = "sa", password: str = ""):
+        super().__init__(spark, host="", database="", user=user, password=password, partition_planning="ntile")
+        self.jdbc_url = h2_url(path)
+        self.driver = H2_DRIVER
+        self.supports_driver_fetch = False
+        # Tracked tables: key columns and the minimum valid Change Tracking version
+        self.change_keys: Dict[str, Tuple[str, ...]] = {}
+        self.min_valid_versions: Dict[str, int] = {}
+
+    @property
+    def connection_properties(self) -> Dict[str, str]:
+        return {"user": self.user, "password": self.password, "driver": self.driver}
+
+    def load(self, tables: Dict[str, DataFrame], batch_size: int = 10000) -> None:
+        """Replace the given source tables (keyed by schema-qualified name) with DataFrames."""
+        for source_table, df in tables.items():
+            df.write \
+                .mode("overwrite") \
+                .option("batchsize", batch_size) \
+                .jdbc(self.jdbc_url, source_table, properties=self.connection_properties)
+
+    def track_changes(self, source_table: str, key_columns: Sequence[str]) -> None:
+        """Enable the Change Tracking stand-in on a table, with an empty change table."""
+        schema = ", ".join([*(f"{key} INT" for key in key_columns), "SYS_CHANGE_VERSION BIGINT", "SYS_CHANGE_OPERATION STRING"])
+        self.load({f"{source_table}_CT": self.spark.createDataFrame([], schema)})
+        self.change_keys[source_table] = tuple(key_columns)
+        self.min_valid_versions[source_table] = 0
+
+    def record_changes(self, source_table: str, changes: List[Tuple]) -> None:
+        """Append changes as (*key values, version, operation) rows; the operation is `I`, `U` or `D`."""
+        keys = self.change_keys[source_table]
+        schema = ", ".join([*(f"{key} INT" for key in keys), "SYS_CHANGE_VERSION BIGINT", "SYS_CHANGE_OPERATION STRING"])
+        self.spark.createDataFrame(changes, schema).write \
+            .mode("append") \
+            .jdbc(self.jdbc_url, f"{source_table}_CT", properties=self.connection_properties)
+
+    def expire_changes(self, source_table: str, min_valid_version: int) -> None:
+        """Move the minimum valid version forward, as Change Tracking cleanup does after the retention period."""
+        self.min_valid_versions[source_table] = min_valid_version
+
+    def change_tracking_versions(self, source_table: str) -> Tuple[int, Optional[int]]:
+        if source_table not in self.change_keys:
+            return 0, None
+        current_version = self.query(f"SELECT COALESCE(MAX(SYS_CHANGE_VERSION), 0) AS current_version FROM {source_table}_CT")[0]["current_version"]
+        return int(current_version), self.min_valid_versions[source_table]
+
+    def changes(self, source_table: str, since_version: int) -> str:
+        """The latest change per key after `since_version`, like `CHANGETABLE(CHANGES ...)`."""
+        keys = ", ".join(self.change_keys[source_table])
+        return f"""(
+    SELECT * FROM (
+        SELECT c.*, ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY SYS_CHANGE_VERSION DESC) AS change_rank
+        FROM {source_table}_CT AS c
+        WHERE SYS_CHANGE_VERSION > {since_version}
+    ) AS ranked
+    WHERE change_rank = 1
+)"""
+
+    def table_sizes(self, source_tables: Sequence[str]) -> Dict[str, TableSize]:
+        """Row counts of the source tables; H2 has no cheap per-table size, so bytes are 0."""
+        return {
+            table: TableSize(int(self.query(f"SELECT COUNT(*) AS row_count FROM {table}")[0]["row_count"]), 0)
+            for table in source_tables
+        }
+
+
+class LocalExtractionEngine(ExtractionEngine):
+    """ExtractionEngine writing to a schema of the local session catalog instead of Unity Catalog."""
+
+    def __init__(self, spark: SparkSession, source: SqlServerSource, schema_name: str, catalog_name: Optional[str] = None, **kwargs):
+        super().__init__(spark, source, catalog_name=catalog_name or "spark_catalog", schema_name=schema_name, **kwargs)
+
+    def setup(self) -> None:
+        self.spark.sql(f"CREATE SCHEMA IF NOT EXISTS {self.catalog_name}.{self.schema_name}")
+        self.ensure_control_tables()
+        print(f"Using local schema: {self.catalog_name}.{self.schema_name}")
@@ -0,0 +1,206 @@
+"""Per-stage instrumentation of extraction runs: wall time, Spark task metrics and Delta write metrics."""
+
+import json
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from pyspark.sql import SparkSession
+
+# Spark REST stage fields summed per engine stage, and the column each one is stored in
+TASK_METRIC_FIELDS = {
+    "numCompleteTasks": "num_tasks",
+    "executorRunTime": "executor_run_ms",
+    "executorCpuTime": "executor_cpu_ns",
+    "jvmGcTime": "jvm_gc_ms",
+    "shuffleReadBytes": "shuffle_read_bytes",
+    "shuffleWriteBytes": "shuffle_write_bytes",
+    "memoryBytesSpilled": "memory_spilled_bytes",
+    "diskBytesSpilled": "disk_spilled_bytes",
+}
+
+# Held while the session-wide commit metadata conf is set, see `commit_metadata`
+COMMIT_METADATA_LOCK = threading.Lock()
+
+# operationMetrics keys of the Delta operations the engine runs, for files and bytes added
+FILES_ADDED_KEYS = ("numFiles", "numTargetFilesAdded", "numAddedFiles")
+BYTES_ADDED_KEYS = ("numOutputBytes", "numTargetBytesAdded", "numAddedBytes")
+
+
+def table_version(spark: SparkSession, table: str) -> int:
+    """Current Delta version of a table, or -1 if it doesn't exist yet."""
+    if not spark.catalog.tableExists(table):
+        return -1
+    return spark.sql(f"DESCRIBE HISTORY {table} LIMIT 1").collect()[0]["version"]
+
+
+def last_commit_metadata(spark: SparkSession, table: str) -> Optional[Dict[str, Any]]:
+    """The `userMetadata` of the table's latest commit that has one, or None."""
+    if not spark.catalog.tableExists(table):
+        return None
+    for commit in spark.sql(f"DESCRIBE HISTORY {table} LIMIT 10").collect():
+        if commit["userMetadata"]:
+            return json.loads(commit["userMetadata"])
+    return None
+
+
+@contextmanager
+def commit_metadata(spark: SparkSession, metadata: Dict[str, Any]) -> Iterator[None]:
+    """Attach `metadata` as `userMetadata` to the Delta commits made inside the block.
+
+    For MERGEs and SQL statements, which take no writer options; DataFrame writes pass
+    `.option("userMetadata", ...)` instead. The conf is session-wide, so the block holds
+    `COMMIT_METADATA_LOCK` until its commits are done and tagged blocks never overlap. Commits
+    that don't take the lock would pick the metadata up too, so blocks only run outside the
+    scheduler's concurrent table loads.
+    """
+    with COMMIT_METADATA_LOCK:
+        spark.conf.set("spark.databricks.delta.commitInfo.userMetadata", json.dumps(metadata))
+        try:
+            yield
+        finally:
+            spark.conf.unset("spark.databricks.delta.commitInfo.userMetadata")
+
+
+def delta_write_metrics(spark: SparkSession, table: str, since_version: int) -> Dict[str, int]:
+    """Rows, files and bytes added to a Delta table by the commits after `since_version`."""
+    totals = {"rows_written": 0, "files_written": 0, "bytes_written": 0}
+    if not spark.catalog.tableExists(table):
+        return totals
+    for commit in spark.sql(f"DESCRIBE HISTORY {table}").where(f"version > {since_version}").collect():
+        metrics = commit["operationMetrics"] or {}
+        totals["rows_written"] += int(metrics.get("numOutputRows", 0))
+        totals["files_written"] += next((int(metrics[key]) for key in FILES_ADDED_KEYS if key in metrics), 0)
+        totals["bytes_written"] += next((int(metrics[key]) for key in BYTES_ADDED_KEYS if key in metrics), 0)
+    return totals
+
+
+class TaskMetricsCollector:
+    """Sums Spark task metrics of the jobs run under a job group.
+
+    Jobs are found through the status tracker and their stage metrics are read from the Spark
+    UI REST API on the driver. Without a reachable UI only task counts are available.
+    """
+
+    def __init__(self, spark: SparkSession, timeout_seconds: float = 5.0):
+        self.spark = spark
+        self.timeout_seconds = timeout_seconds
+
+    @contextmanager
+    def job_group(self, group_id: str, description: str) -> Iterator[None]:
+        """Tag the Spark jobs run by this thread inside the block with a job group."""
+        sc = self.spark.sparkContext
+        previous_group = sc.getLocalProperty("spark.jobGroup.id")
+        previous_description = sc.getLocalProperty("spark.job.description")
+        sc.setJobGroup(group_id, description)
+        try:
+            yield
+        finally:
+            sc.setLocalProperty("spark.jobGroup.id", previous_group)
+            sc.setLocalProperty("spark.job.description", previous_description)
+
+    def stage_ids(self, group_id: str):
+        tracker = self.spark.sparkContext.statusTracker()
+        for job_id in tracker.getJobIdsForGroup(group_id):
+            job = tracker.getJobInfo(job_id)
+            if job is not None:
+                yield from job.stageIds
+
+    def rest_stage(self, stage_id: int) -> Optional[list]:
+        sc = self.spark.sparkContext
+        if not sc.uiWebUrl:
+            return None
+        url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/stages/{stage_id}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout_seconds) as response:
+                return json.load(response)
+        except Exception:
+            return None
+
+    def sql_metrics(self, group_id: str) -> Optional[Dict[str, int]]:
+        """Sum the count metrics of the SQL plan nodes (e.g. `number of files read`) run under the job group.
+
+        Metrics are summed by name over the queries whose jobs ran in the group. Returns None
+        without the Spark UI REST API.
+        """
+        sc = self.spark.sparkContext
+        if not sc.uiWebUrl:
+            return None
+        job_ids = set(sc.statusTracker().getJobIdsForGroup(group_id))
+        url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/sql?details=true&planDescription=false&length=100000"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout_seconds) as response:
+                executions = json.load(response)
+        except Exception:
+            return None
+
+        totals: Dict[str, int] = {}
+        for execution in executions:
+            if not job_ids.intersection(execution.get("successJobIds", []) + execution.get("failedJobIds", [])):
+                continue
+            for node in execution.get("nodes", []):
+                for metric in node.get("metrics", []):
+                    # Sizes and timings are reported as "total (min, med, max)" summaries; keep plain counts
+                    value = str(metric.get("value", "")).replace(",", "")
+                    if value.isdigit():
+                        totals[metric["name"]] = totals.get(metric["name"], 0) + int(value)
+        return totals
+
+    def collect(self, group_id: str) -> Dict[str, Optional[int]]:
+        """Sum the task metrics of every stage attempt run under the job group."""
+        totals: Dict[str, Optional[int]] = {column: 0 for column in TASK_METRIC_FIELDS.values()}
+        tracker = self.spark.sparkContext.statusTracker()
+        for stage_id in self.stage_ids(group_id):
+            attempts = self.rest_stage(stage_id)
+            if attempts is None:
+                # No REST API: fall back to the status tracker, which only knows task counts
+                info = tracker.getStageInfo(stage_id)
+                totals["num_tasks"] += info.numCompletedTasks if info else 0
+                for column in TASK_METRIC_FIELDS.values():
+                    if column != "num_tasks":
+                        totals[column] = None
+                continue
+            for attempt in attempts:
+                for field, column in TASK_METRIC_FIELDS.items():
+                    if totals[column] is not None:
+                        totals[column] += int(attempt.get(field, 0))
+        return totals
+
+
+class StageRecorder:
+    """Wall time, source reads and Spark task metrics of each stage of one table's extraction.
+
+    Each stage runs in its own Spark job group (`<batch_id>:<stage>`). Job groups are per
+    thread, so task metrics stay separate when tables run concurrently. Source reads are taken
+    from the shared `SqlServerSource.reads` counter, so they are exact when tables run one at a
+    time and approximate while other tables read concurrently.
+    """
+
+    def __init__(self, source, batch_id: str, collector: Optional[TaskMetricsCollector] = None):
+        self.source = source
+        self.batch_id = batch_id
+        self.collector = collector
+        self.started_at: Dict[str, float] = {}
+        self.seconds: Dict[str, float] = {}
+        self.source_reads: Dict[str, int] = {}
+        self.task_metrics: Dict[str, Dict[str, Optional[int]]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        reads = self.source.reads
+        self.started_at.setdefault(name, time.time())
+        start = time.perf_counter()
+        group_id = f"{self.batch_id}:{name}"
+        try:
+            if self.collector:
+                with self.collector.job_group(group_id, f"{self.batch_id} {name}"):
+                    yield
+            else:
+                yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+            self.source_reads[name] = self.source_reads.get(name, 0) + self.source.reads - reads
+            if self.collector:
+                self.task_metrics[name] = self.collector.collect(group_id)
@@ -0,0 +1,177 @@
+"""Checksum reconciliation of bronze tables against SQL Server, bucket by bucket of the key range.
+
+Both sides hash the same canonical text of every row's identity and version (key columns plus
+`LastEditedWhen`, or key and `ValidFrom` for temporal tables) with SHA-256 and sum the first
+four bytes of each hash per bucket. A bucket whose row count or checksum differs holds missing,
+extra or stale rows, and only those buckets need to be read from the source again.
+
+Date and time columns are hashed as `yyyy-MM-dd HH:mm:ss.ffffff` wall-clock time (SQL Server
+`datetime2` truncated to the microseconds Spark keeps), so the Spark session time zone must be
+the one the rows were read in. Other columns are hashed as their text, which matches for integer,
+decimal and string columns read with their source types; NULL hashes as an empty string. The text
+is hashed as UTF-16LE, the bytes `HASHBYTES` sees for `nvarchar`, so non-ASCII strings match
+whatever the source collation's code page is.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import DataType, DateType, TimestampType
+
+from .registry import TableSpec
+from .source import SqlServerSource
+
+# Default number of key-range buckets compared per table
+RECONCILE_BUCKETS = 64
+
+
+@dataclass
+class ReconcileResult:
+    """Outcome of reconciling one table."""
+
+    table_name: str
+    buckets: int
+    mismatched: List[int] = field(default_factory=list)
+    # Inclusive key ranges covering the mismatched buckets, adjacent buckets merged
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+    rows_resynced: int = 0
+
+
+def reconcile_key(spec: TableSpec) -> str:
+    """Integer column the table's rows are bucketed on."""
+    if spec.partition_column:
+        return spec.partition_column
+    if len(spec.key_columns) == 1:
+        return spec.key_columns[0]
+    raise ValueError(f"{spec.name} has no partition column or single integer key to reconcile on")
+
+
+def version_columns(spec: TableSpec) -> List[str]:
+    """Columns identifying one version of a row: its merge keys plus the change-detection column."""
+    columns = spec.merge_keys
+    if spec.watermark_column and spec.watermark_column not in columns:
+        columns = columns + [spec.watermark_column]
+    return columns
+
+
+def source_row_text(spec: TableSpec, types: Mapping[str, DataType]) -> str:
+    """SQL Server `nvarchar` expression with the canonical text of a row's version columns.
+
+    `types` are the bronze column types, which tell date and time columns from the others.
+    """
+    texts = [
+        f"LEFT(CONVERT(nvarchar(27), CAST({column} AS datetime2(7)), 121), 26)"
+        if isinstance(types[column], (TimestampType, DateType))
+        else f"CONVERT(nvarchar(4000), {column})"
+        for column in version_columns(spec)
+    ]
+    return " + N'|' + ".join(f"ISNULL({text}, N'')" for text in texts)
+
+
+def bronze_row_text(spec: TableSpec, bronze: DataFrame) -> Column:
+    """Spark expression with the same canonical text as `source_row_text`."""
+    types = {field.name: field.dataType for field in bronze.schema.fields}
+    return F.concat_ws("|", *[
+        F.coalesce(
+            F.date_format(F.col(column), "yyyy-MM-dd HH:mm:ss.SSSSSS") if isinstance(types[column], (TimestampType, DateType))
+            else F.col(column).cast("string"),
+            F.lit(""),
+        )
+        for column in version_columns(spec)
+    ])
+
+
+def bronze_row_hash(spec: TableSpec, bronze: DataFrame) -> Column:
+    """First four bytes of the row text's SHA-256 as an unsigned integer, like the source's `HASHBYTES`."""
+    digest = F.sha2(F.encode(bronze_row_text(spec, bronze), "UTF-16LE"), 256)
+    return F.conv(F.substring(digest, 1, 8), 16, 10).cast("long")
+
+
+def merge_ranges(buckets: Sequence[int], low: int, width: int) -> List[Tuple[int, int]]:
+    """Inclusive key ranges of the given buckets, merging adjacent buckets into one range."""
+    ranges: List[Tuple[int, int]] = []
+    for bucket in sorted(buckets):
+        start, end = low + bucket * width, low + (bucket + 1) * width - 1
+        if ranges and ranges[-1][1] + 1 == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def range_predicate(key_column: str, ranges: Sequence[Tuple[int, int]]) -> str:
+    """Predicate selecting the key ranges, valid in both T-SQL and Spark SQL."""
+    return " OR ".join(f"({key_column} BETWEEN {start} AND {end})" for start, end in ranges)
+
+
+class Reconciler:
+    """Finds the key-range buckets of a bronze table that differ from the source table."""
+
+    def __init__(self, spark: SparkSession, source: SqlServerSource, num_buckets: int = RECONCILE_BUCKETS):
+        self.spark = spark
+        self.source = source
+        self.num_buckets = num_buckets
+
+    def key_bounds(self, spec: TableSpec, bronze: DataFrame) -> Optional[Tuple[int, int]]:
+        """Lowest and highest key on either side, or None if both are empty."""
+        key = reconcile_key(spec)
+        source_row = self.source.query(f"SELECT MIN({key}) AS low, MAX({key}) AS high FROM {spec.source_table}")[0]
+        bronze_row = bronze.agg(F.min(key).alias("low"), F.max(key).alias("high")).collect()[0]
+        lows = [row["low"] for row in (source_row, bronze_row) if row["low"] is not None]
+        highs = [row["high"] for row in (source_row, bronze_row) if row["high"] is not None]
+        if not lows:
+            return None
+        return int(min(lows)), int(max(highs))
+
+    def source_checksums(self, spec: TableSpec, types: Mapping[str, DataType], low: int, width: int) -> Dict[int, Tuple[int, int]]:
+        """(row count, checksum) per bucket of the source table's current rows, computed on SQL Server."""
+        bucket = f"(CAST({reconcile_key(spec)} AS bigint) - {low}) / {width}"
+        rows = self.source.query(f"""SELECT {bucket} AS bucket,
+    COUNT_BIG(*) AS row_count,
+    SUM(CONVERT(bigint, SUBSTRING(HASHBYTES('SHA2_256', {source_row_text(spec, types)}), 1, 4))) AS checksum
+FROM {spec.source_table}
+GROUP BY {bucket}""")
+        return {int(row["bucket"]): (int(row["row_count"]), int(row["checksum"])) for row in rows}
+
+    def bronze_checksums(self, spec: TableSpec, bronze: DataFrame, low: int, width: int) -> Dict[int, Tuple[int, int]]:
+        """(row count, checksum) per bucket of the bronze rows, computed the same way in Spark."""
+        rows = bronze \
+            .select(
+                F.expr(f"(CAST({reconcile_key(spec)} AS BIGINT) - {low}) div {width}").alias("bucket"),
+                bronze_row_hash(spec, bronze).alias("row_hash"),
+            ) \
+            .groupBy("bucket") \
+            .agg(F.count(F.lit(1)).alias("row_count"), F.sum("row_hash").alias("checksum")) \
+            .collect()
+        return {int(row["bucket"]): (int(row["row_count"]), int(row["checksum"])) for row in rows}
+
+    def compare(self, spec: TableSpec, bronze: DataFrame) -> ReconcileResult:
+        """Compare every bucket and return the mismatched ones with the key ranges to re-read.
+
+        `bronze` holds the rows the source table should have: for temporal tables only the
+        current version of each row, as the source table without `FOR SYSTEM_TIME`.
+        """
+        bounds = self.key_bounds(spec, bronze)
+        if bounds is None:
+            return ReconcileResult(spec.name, 0)
+        low, high = bounds
+        width = max(1, math.ceil((high - low + 1) / self.num_buckets))
+
+        types = {field.name: field.dataType for field in bronze.schema.fields}
+        source = self.source_checksums(spec, types, low, width)
+        target = self.bronze_checksums(spec, bronze, low, width)
+        mismatched = sorted(bucket for bucket in set(source) | set(target) if source.get(bucket) != target.get(bucket))
+        for bucket in mismatched:
+            source_rows = source.get(bucket, (0, 0))[0]
+            bronze_rows = target.get(bucket, (0, 0))[0]
+            print(f"{spec.name} bucket {bucket} ({reconcile_key(spec)} {low + bucket * width}-{low + (bucket + 1) * width - 1}): "
+                  f"{source_rows} source rows, {bronze_rows} bronze rows, checksum differs")
+        return ReconcileResult(
+            table_name=spec.name,
+            buckets=math.ceil((high - low + 1) / width),
+            mismatched=mismatched,
+            ranges=merge_ranges(mismatched, low, width),
+        )
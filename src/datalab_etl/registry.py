@@ -0,0 +1,308 @@
+"""Registry of the WorldWideImporters tables extracted to the bronze layer.
+
+Each entry declares everything the extraction engine needs to know about a table: where it
+comes from, which columns to select, its key, how changes are detected and how it is laid out
+in Delta. Tuning a table means changing its entry here, not the notebook code.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .layout import ORDER_LINES_LAYOUTS, ORDERS_LAYOUTS, TableLayout
+
+
+# Narrowed types read instead of the default JDBC mapping
+ID = "INT"
+PRICE = "DECIMAL(18,2)"
+RATE = "DECIMAL(18,3)"
+
+
+def typed(sql_type: str, *columns: str) -> Tuple[Tuple[str, str], ...]:
+    """(column, type) declarations giving several columns the same type."""
+    return tuple((column, sql_type) for column in columns)
+
+
+def content_hash(column: str) -> str:
+    """SQL Server expression hashing a BLOB column on the source, as 64 hex characters."""
+    return f"CONVERT(varchar(64), HASHBYTES('SHA2_256', {column}), 2)"
+
+
+@dataclass(frozen=True)
+class SideTable:
+    """Wide or BLOB columns written to `<table>_<suffix>` instead of the main bronze table.
+
+    Text side tables hold the columns next to the main table's merge keys. A `blob` side
+    table holds one column deduplicated by content: the main table keeps `<column>Hash`
+    (hashed on SQL Server), and the side table is keyed on that hash, so a blob is only
+    transferred and written the first time its content is seen.
+    """
+
+    suffix: str
+    columns: Tuple[str, ...]
+    blob: bool = False
+
+    def __post_init__(self):
+        if self.blob and len(self.columns) != 1:
+            raise ValueError("A blob side table holds exactly one column")
+
+    @property
+    def hash_column(self) -> str:
+        return f"{self.columns[0]}Hash"
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Declaration of one source table and its bronze target.
+
+    - `name`: bronze table name (also used for staging, watermarks and batch IDs)
+    - `source_table`: schema-qualified SQL Server table
+    - `columns`: columns selected from the source
+    - `key_columns`: primary key, used for MERGE on incremental loads
+    - `watermark_column`: change-detection column (`LastEditedWhen`, or `ValidFrom` for
+      temporal tables); None means the table is always fully reloaded
+    - `temporal`: system-versioned temporal table, captured as SCD2 row versions
+    - `partition_column`: integer key used to split the JDBC read into parallel ranges
+    - `num_partitions`: default number of parallel JDBC reads (1 = single read)
+    - `window_column`: date column bounding the rows re-extracted in rolling-window mode
+    - `window_parent`: registry table whose rolling window this table follows, through the
+      parent's key column (e.g. order lines follow the orders in the window)
+    - `layout`: physical layout of the bronze table (partitioning, clustering, file size, codec)
+    - `column_types`: (column, Spark SQL type) read instead of the default JDBC type mapping,
+      e.g. `INT` keys, `DECIMAL(18,2)` prices and `DATE` order dates; each is checked against the
+      source's INFORMATION_SCHEMA at run start and only used if it holds every source value
+    - `json_columns`: JSON string columns parsed at ingest into typed `<column>Parsed` columns
+    - `side_tables`: wide and BLOB columns split out of the main table when the engine runs
+      with `vertical_split`
+    - `quality_checks`: (level, condition, description) rows counted and reported when non-zero
+    - `stats`: (label, aggregate expression, format) statistics printed after extraction
+    """
+
+    name: str
+    source_table: str
+    columns: Tuple[str, ...]
+    key_columns: Tuple[str, ...]
+    watermark_column: Optional[str] = None
+    temporal: bool = False
+    partition_column: Optional[str] = None
+    num_partitions: int = 1
+    window_column: Optional[str] = None
+    window_parent: Optional[str] = None
+    layout: TableLayout = TableLayout()
+    column_types: Tuple[Tuple[str, str], ...] = ()
+    json_columns: Tuple[str, ...] = ()
+    side_tables: Tuple[SideTable, ...] = ()
+    quality_checks: Tuple[Tuple[str, str, str], ...] = ()
+    stats: Tuple[Tuple[str, str, str], ...] = ()
+
+    @property
+    def merge_keys(self) -> List[str]:
+        """Columns identifying a bronze row; temporal tables keep one row per version."""
+        if self.temporal:
+            return list(self.key_columns) + ["ValidFrom"]
+        return list(self.key_columns)
+
+    @property
+    def source_query(self) -> str:
+        """SELECT statement for a full extraction of the table."""
+        column_list = ",\n    ".join(self.columns)
+        return f"SELECT \n    {column_list}\nFROM {self.source_table}"
+
+    @property
+    def split_source_query(self) -> str:
+        """SELECT statement for a vertically split extraction: BLOB columns arrive as content hashes."""
+        blobs = {side.columns[0]: side for side in self.side_tables if side.blob}
+        column_list = ",\n    ".join(
+            f"{content_hash(column)} AS {blobs[column].hash_column}" if column in blobs else column
+            for column in self.columns
+        )
+        return f"SELECT \n    {column_list}\nFROM {self.source_table}"
+
+    def blob_query(self, side: SideTable, hashes: Optional[List[str]] = None) -> str:
+        """SELECT one copy of each blob by content hash, across all row versions.
+
+        `hashes` restricts the result to the given content hashes; None returns every blob.
+        """
+        column = side.columns[0]
+        history = " FOR SYSTEM_TIME ALL" if self.temporal else ""
+        hash_filter = f" AND {side.hash_column} IN ({', '.join(repr(value) for value in hashes)})" if hashes else ""
+        return f"""SELECT {side.hash_column}, {column}
+FROM (
+    SELECT {content_hash(column)} AS {side.hash_column}, {column},
+        ROW_NUMBER() OVER (PARTITION BY HASHBYTES('SHA2_256', {column}) ORDER BY (SELECT NULL)) AS copy_number
+    FROM {self.source_table}{history}
+    WHERE {column} IS NOT NULL
+) blobs
+WHERE copy_number = 1{hash_filter}"""
+
+
+BRONZE_TABLES: Dict[str, TableSpec] = {
+    spec.name: spec
+    for spec in [
+        TableSpec(
+            name="customers",
+            source_table="Sales.Customers",
+            columns=(
+                "CustomerID", "CustomerName", "BillToCustomerID", "CustomerCategoryID",
+                "PrimaryContactPersonID", "DeliveryMethodID", "DeliveryCityID", "PostalCityID",
+                "AccountOpenedDate", "StandardDiscountPercentage", "IsStatementSent",
+                "IsOnCreditHold", "PaymentDays", "PhoneNumber", "FaxNumber", "WebsiteURL",
+                "DeliveryAddressLine1", "DeliveryPostalCode", "PostalAddressLine1",
+                "PostalPostalCode", "LastEditedBy", "ValidFrom", "ValidTo",
+            ),
+            key_columns=("CustomerID",),
+            column_types=typed(
+                ID, "CustomerID", "BillToCustomerID", "CustomerCategoryID", "PrimaryContactPersonID",
+                "DeliveryMethodID", "DeliveryCityID", "PostalCityID", "PaymentDays", "LastEditedBy",
+            ) + typed(RATE, "StandardDiscountPercentage") + typed("DATE", "AccountOpenedDate"),
+            watermark_column="ValidFrom",
+            temporal=True,
+            quality_checks=(
+                ("WARNING", "CustomerID IS NULL", "records with null CustomerID"),
+                ("WARNING", "CustomerName IS NULL", "records with null CustomerName"),
+            ),
+        ),
+        TableSpec(
+            name="orders",
+            source_table="Sales.Orders",
+            columns=(
+                "OrderID", "CustomerID", "SalespersonPersonID", "PickedByPersonID",
+                "ContactPersonID", "BackorderOrderID", "OrderDate", "ExpectedDeliveryDate",
+                "CustomerPurchaseOrderNumber", "IsUndersupplyBackordered", "Comments",
+                "DeliveryInstructions", "InternalComments", "PickingCompletedWhen",
+                "LastEditedBy", "LastEditedWhen",
+            ),
+            key_columns=("OrderID",),
+            column_types=typed(
+                ID, "OrderID", "CustomerID", "SalespersonPersonID", "PickedByPersonID",
+                "ContactPersonID", "BackorderOrderID", "LastEditedBy",
+            ) + typed("DATE", "OrderDate", "ExpectedDeliveryDate"),
+            watermark_column="LastEditedWhen",
+            partition_column="OrderID",
+            num_partitions=4,
+            window_column="OrderDate",
+            layout=ORDERS_LAYOUTS["monthly_zorder"],
+            side_tables=(
+                SideTable("notes", ("Comments", "DeliveryInstructions", "InternalComments")),
+            ),
+            quality_checks=(
+                ("WARNING", "OrderID IS NULL", "records with null OrderID"),
+            ),
+        ),
+        TableSpec(
+            name="order_lines",
+            source_table="Sales.OrderLines",
+            columns=(
+                "OrderLineID", "OrderID", "StockItemID", "Description", "PackageTypeID",
+                "Quantity", "UnitPrice", "TaxRate", "PickedQuantity", "PickingCompletedWhen",
+                "LastEditedBy", "LastEditedWhen",
+            ),
+            key_columns=("OrderLineID",),
+            column_types=typed(
+                ID, "OrderLineID", "OrderID", "StockItemID", "PackageTypeID", "Quantity",
+                "PickedQuantity", "LastEditedBy",
+            ) + typed(PRICE, "UnitPrice") + typed(RATE, "TaxRate"),
+            watermark_column="LastEditedWhen",
+            partition_column="OrderLineID",
+            num_partitions=8,
+            window_parent="orders",
+            layout=ORDER_LINES_LAYOUTS["zorder"],
+            quality_checks=(
+                ("WARNING", "OrderLineID IS NULL", "records with null OrderLineID"),
+                ("WARNING", "OrderID IS NULL", "records with null OrderID"),
+            ),
+            stats=(
+                ("Total quantity across all order lines", "SUM(Quantity)", "{}"),
+                ("Average unit price", "AVG(UnitPrice)", "${:.2f}"),
+            ),
+        ),
+        TableSpec(
+            name="stock_items",
+            source_table="Warehouse.StockItems",
+            columns=(
+                "StockItemID", "StockItemName", "SupplierID", "ColorID", "UnitPackageID",
+                "OuterPackageID", "Brand", "Size", "LeadTimeDays", "QuantityPerOuter",
+                "IsChillerStock", "Barcode", "TaxRate", "UnitPrice", "RecommendedRetailPrice",
+                "TypicalWeightPerUnit", "MarketingComments", "InternalComments", "Photo",
+                "CustomFields", "Tags", "SearchDetails", "LastEditedBy", "ValidFrom", "ValidTo",
+            ),
+            key_columns=("StockItemID",),
+            column_types=typed(
+                ID, "StockItemID", "SupplierID", "ColorID", "UnitPackageID", "OuterPackageID",
+                "LeadTimeDays", "QuantityPerOuter", "LastEditedBy",
+            ) + typed(PRICE, "UnitPrice", "RecommendedRetailPrice") + typed(RATE, "TaxRate", "TypicalWeightPerUnit"),
+            watermark_column="ValidFrom",
+            temporal=True,
+            json_columns=("CustomFields", "Tags"),
+            side_tables=(
+                SideTable("details", ("MarketingComments", "InternalComments", "CustomFields", "Tags", "SearchDetails")),
+                SideTable("photos", ("Photo",), blob=True),
+            ),
+            quality_checks=(
+                ("WARNING", "StockItemID IS NULL", "records with null StockItemID"),
+                ("WARNING", "StockItemName IS NULL", "records with null StockItemName"),
+                ("INFO", "UnitPrice <= 0", "records with zero or negative UnitPrice"),
+            ),
+            stats=(
+                ("Average unit price", "AVG(UnitPrice)", "${:.2f}"),
+                ("Maximum unit price", "MAX(UnitPrice)", "${:.2f}"),
+                ("Chiller stock items", "COUNT_IF(IsChillerStock)", "{}"),
+            ),
+        ),
+        TableSpec(
+            name="stock_item_holdings",
+            source_table="Warehouse.StockItemHoldings",
+            columns=(
+                "StockItemID", "QuantityOnHand", "BinLocation", "LastStocktakeQuantity",
+                "LastCostPrice", "ReorderLevel", "TargetStockLevel", "LastEditedBy",
+                "LastEditedWhen",
+            ),
+            key_columns=("StockItemID",),
+            column_types=typed(
+                ID, "StockItemID", "QuantityOnHand", "LastStocktakeQuantity", "ReorderLevel",
+                "TargetStockLevel", "LastEditedBy",
+            ) + typed(PRICE, "LastCostPrice"),
+            watermark_column="LastEditedWhen",
+            stats=(
+                ("Items with negative stock", "COUNT_IF(QuantityOnHand < 0)", "{}"),
+                ("Items with zero stock", "COUNT_IF(QuantityOnHand = 0)", "{}"),
+                ("Items below reorder level", "COUNT_IF(QuantityOnHand < ReorderLevel)", "{}"),
+                ("Total inventory value", "SUM(QuantityOnHand * LastCostPrice)", "${:.2f}"),
+            ),
+        ),
+        TableSpec(
+            name="stock_groups",
+            source_table="Warehouse.StockGroups",
+            columns=("StockGroupID", "StockGroupName", "LastEditedBy", "ValidFrom", "ValidTo"),
+            key_columns=("StockGroupID",),
+            column_types=typed(ID, "StockGroupID", "LastEditedBy"),
+            watermark_column="ValidFrom",
+            temporal=True,
+            stats=(
+                ("Stock groups found", "CONCAT_WS(', ', SORT_ARRAY(COLLECT_SET(StockGroupName)))", "{}"),
+            ),
+        ),
+        TableSpec(
+            name="stock_item_stock_groups",
+            source_table="Warehouse.StockItemStockGroups",
+            columns=(
+                "StockItemStockGroupID", "StockItemID", "StockGroupID", "LastEditedBy",
+                "LastEditedWhen",
+            ),
+            key_columns=("StockItemStockGroupID",),
+            column_types=typed(ID, "StockItemStockGroupID", "StockItemID", "StockGroupID", "LastEditedBy"),
+            watermark_column="LastEditedWhen",
+            stats=(
+                ("Stock items with group assignments", "COUNT(DISTINCT StockItemID)", "{}"),
+                ("Stock groups with item assignments", "COUNT(DISTINCT StockGroupID)", "{}"),
+            ),
+        ),
+    ]
+}
+
+
+def get_table(name: str) -> TableSpec:
+    """Look up a registered bronze table by name."""
+    try:
+        return BRONZE_TABLES[name]
+    except KeyError:
+        raise KeyError(f"Unknown bronze table '{name}'. Registered tables: {', '.join(BRONZE_TABLES)}") from None
@@ -0,0 +1,65 @@
+"""Summary report metrics that avoid rescanning freshly written bronze tables."""
+
+from typing import Any, Dict, Optional
+
+from delta.tables import DeltaTable
+from pyspark.sql import Column, Row, SparkSession
+
+FULL_REPLACE_OPERATIONS = ("CREATE OR REPLACE TABLE AS SELECT", "REPLACE TABLE AS SELECT", "CREATE TABLE AS SELECT")
+
+
+def replaces_whole_table(commit: Row) -> bool:
+    """Whether a Delta history entry rewrote the entire table."""
+    parameters = commit["operationParameters"] or {}
+    return commit["operation"] in FULL_REPLACE_OPERATIONS or (
+        commit["operation"] == "WRITE"
+        and parameters.get("mode") == "Overwrite"
+        and parameters.get("predicate") in (None, "", "[]")
+    )
+
+
+def replaced_since(spark: SparkSession, table: str, version: int) -> bool:
+    """Whether a commit after `version` rewrote the whole table."""
+    commits = spark.sql(f"DESCRIBE HISTORY {table}").where(f"version > {version}").collect()
+    return any(replaces_whole_table(commit) for commit in commits)
+
+
+def delta_row_count(spark: SparkSession, table: str) -> int:
+    """Return the row count of a Delta table from its metadata.
+
+    Uses the metrics of the last write when it replaced the whole table, and otherwise lets
+    Delta answer COUNT(*) from the per-file statistics in its transaction log.
+    """
+    last_write = DeltaTable.forName(spark, table).history(1).collect()[0]
+    metrics = last_write["operationMetrics"] or {}
+
+    if replaces_whole_table(last_write) and "numOutputRows" in metrics:
+        return int(metrics["numOutputRows"])
+
+    spark.conf.set("spark.databricks.delta.optimizeMetadataQuery.enabled", "true")
+    return spark.sql(f"SELECT COUNT(*) AS count FROM {table}").collect()[0]["count"]
+
+
+def table_report(
+    spark: SparkSession,
+    table: str,
+    metrics: Dict[str, Column],
+    where: Optional[Column] = None,
+) -> Dict[str, Any]:
+    """Build the report metrics for one table in a single aggregation pass.
+
+    `metrics` maps metric names to aggregate Columns. The result also holds `row_count`,
+    taken from Delta metadata rather than a scan.
+    """
+    report: Dict[str, Any] = {"row_count": delta_row_count(spark, table)}
+    if metrics:
+        df = spark.table(table)
+        if where is not None:
+            df = df.filter(where)
+        report.update(df.agg(*[column.alias(name) for name, column in metrics.items()]).collect()[0].asDict())
+    return report
+
+
+def percent(part: int, whole: int) -> str:
+    """Format a share as a percentage, guarding against empty tables."""
+    return f"{part / whole * 100:.1f}%" if whole else "n/a"
@@ -0,0 +1,115 @@
+"""Concurrent extraction of independent tables from a single driver.
+
+Small tables spend most of their time in JDBC round trips and Delta commits, which leaves the
+cluster idle when tables run one after another. The scheduler submits every table to a thread
+pool instead. Each table runs in its own Spark FAIR scheduler pool so a large table can't starve
+the small ones, tables start largest-first so total wall time approaches the longest single
+table, and a shared limiter caps the number of JDBC connections open against SQL Server.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+from .engine import ExtractionEngine, ExtractionResult
+from .registry import TableSpec
+
+
+class ConnectionLimiter:
+    """Caps the number of concurrent JDBC connections opened against the source."""
+
+    def __init__(self, max_connections: int):
+        if max_connections < 1:
+            raise ValueError(f"max_connections must be at least 1, got {max_connections}")
+        self.max_connections = max_connections
+        self._available = max_connections
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def acquire(self, connections: int) -> Iterator[None]:
+        """Hold `connections` slots for the duration of a source read.
+
+        A read can't open more connections than the limit; the engine clamps its partition count
+        to `max_connections` before building the read.
+        """
+        connections = max(connections, 1)
+        if connections > self.max_connections:
+            raise ValueError(f"A read of {connections} connections can't run within the limit of {self.max_connections}")
+        with self._condition:
+            self._condition.wait_for(lambda: self._available >= connections)
+            self._available -= connections
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._available += connections
+                self._condition.notify_all()
+
+
+class ExtractionScheduler:
+    """Runs several registered tables concurrently through one `ExtractionEngine`."""
+
+    def __init__(self, engine: ExtractionEngine, max_source_connections: int = 8, max_concurrent_tables: Optional[int] = None):
+        self.engine = engine
+        self.engine.connection_limiter = ConnectionLimiter(max_source_connections)
+        self.max_concurrent_tables = max_concurrent_tables
+
+    def order_largest_first(self, specs: Sequence[TableSpec]) -> Sequence[TableSpec]:
+        """Order tables by used source bytes, largest first; keep registry order if unknown."""
+        try:
+            sizes = self.engine.source.table_sizes([spec.source_table for spec in specs])
+            # The engine picks its read path from the same statistics
+            self.engine.source_sizes.update(sizes)
+        except Exception as e:
+            print(f"INFO: Could not read source table sizes ({str(e)}), keeping registry order")
+            return list(specs)
+        for spec in specs:
+            size = sizes.get(spec.source_table)
+            if size is not None:
+                print(f"{spec.source_table}: {size.rows:,} rows, {size.bytes / 1024 / 1024:.1f} MB")
+        return sorted(specs, key=lambda spec: sizes[spec.source_table].bytes if spec.source_table in sizes else 0, reverse=True)
+
+    def check_column_types(self, specs: Sequence[TableSpec]) -> None:
+        """Look up the source column types of all tables in one query; the engine checks each table's declarations against them."""
+        try:
+            self.engine.source_columns.update(self.engine.source.column_types([spec.source_table for spec in specs if spec.column_types]))
+        except Exception as e:
+            print(f"INFO: Could not read source column types ({str(e)}), checking them per table")
+
+    def _run_in_pool(self, spec: TableSpec, num_partitions: Optional[int]) -> ExtractionResult:
+        # Local properties are per thread, so each table's Spark jobs land in their own FAIR pool
+        self.engine.spark.sparkContext.setLocalProperty("spark.scheduler.pool", f"bronze_{spec.name}")
+        try:
+            return self.engine.run(spec, num_partitions=num_partitions)
+        finally:
+            self.engine.spark.sparkContext.setLocalProperty("spark.scheduler.pool", None)
+
+    def run(self, specs: Sequence[TableSpec], num_partitions: Optional[Dict[str, int]] = None) -> Dict[str, ExtractionResult]:
+        """Extract all tables concurrently and return their results by table name.
+
+        Every table is attempted even if another one fails; failures are raised together at the end.
+        """
+        num_partitions = num_partitions or {}
+        ordered = self.order_largest_first(specs)
+        self.check_column_types(ordered)
+        print(f"Extracting {len(ordered)} tables concurrently: {', '.join(spec.name for spec in ordered)}")
+
+        results: Dict[str, ExtractionResult] = {}
+        failures: Dict[str, Exception] = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_tables or len(ordered)) as pool:
+            futures = {
+                pool.submit(self._run_in_pool, spec, num_partitions.get(spec.name)): spec.name
+                for spec in ordered
+            }
+            for future in as_completed(futures):
+                table_name = futures[future]
+                try:
+                    results[table_name] = future.result()
+                except Exception as e:
+                    failures[table_name] = e
+
+        if failures:
+            first_error = next(iter(failures.values()))
+            raise RuntimeError(f"Extraction failed for: {', '.join(failures)}") from first_error
+        return results
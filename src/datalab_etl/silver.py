@@ -0,0 +1,77 @@
+"""Incremental bronze-to-silver refresh from the Delta Change Data Feed of the bronze tables.
+
+Silver holds the current row of every key. Each silver table is a Delta Live Tables streaming
+table fed by `APPLY CHANGES` from its bronze table's change feed. A pipeline update reads only
+the bronze commits after the ones it processed last, so its cost follows the churn in bronze
+rather than the size of bronze.
+
+Rows are ordered by bronze commit version, with deletes before inserts of the same commit, so
+a full reload or window replacement (deleting and re-inserting rows in one commit) keeps the
+re-inserted rows. Temporal tables are ordered by `ValidFrom` first: a closed old version never
+overwrites the newer current one, and a key whose newest version is closed was deleted at the
+source and is removed from silver.
+
+The first update of a silver table reads the bronze table's current snapshot as inserts.
+"""
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+from .engine import current_version
+from .registry import TableSpec
+
+CHANGE_TYPE_COLUMN = "_change_type"
+CHANGE_FEED_COLUMNS = ("_change_type", "_commit_version", "_commit_timestamp")
+# Orders the changes of one commit: deletes (0) before inserts and updates (1)
+CHANGE_RANK_COLUMN = "_change_rank"
+
+
+def change_feed(spark: SparkSession, table: str) -> DataFrame:
+    """Stream the inserted, updated and deleted rows of a bronze table, without update pre-images."""
+    return spark.readStream \
+        .option("readChangeFeed", "true") \
+        .table(table) \
+        .where(F.col(CHANGE_TYPE_COLUMN) != "update_preimage") \
+        .withColumn(CHANGE_RANK_COLUMN, F.when(F.col(CHANGE_TYPE_COLUMN) == "delete", 0).otherwise(1))
+
+
+def silver_sequence(spec: TableSpec) -> Column:
+    """Order of the changes to a key; the highest one is the silver row."""
+    columns = ["_commit_version", CHANGE_RANK_COLUMN]
+    if spec.temporal:
+        columns = ["ValidFrom"] + columns
+    return F.struct(*columns)
+
+
+def silver_deletes(spec: TableSpec) -> Column:
+    """Changes that remove the key from silver."""
+    deleted = F.col(CHANGE_TYPE_COLUMN) == "delete"
+    if spec.temporal:
+        return deleted | ~current_version()
+    return deleted
+
+
+def declare_silver_table(spark: SparkSession, spec: TableSpec, bronze_schema: str) -> None:
+    """Declare the silver table of a bronze table in the running Delta Live Tables pipeline."""
+    import dlt
+
+    changes_view = f"{spec.name}_changes"
+
+    @dlt.view(name=changes_view, comment=f"Change feed of {bronze_schema}.{spec.name}")
+    def changes() -> DataFrame:
+        return change_feed(spark, f"{bronze_schema}.{spec.name}")
+
+    dlt.create_streaming_table(
+        name=spec.name,
+        comment=f"Current rows of {spec.source_table}, upserted from the change feed of {bronze_schema}.{spec.name}",
+    )
+    dlt.apply_changes(
+        target=spec.name,
+        source=changes_view,
+        # One silver row per source primary key, also for temporal tables
+        keys=list(spec.key_columns),
+        sequence_by=silver_sequence(spec),
+        apply_as_deletes=silver_deletes(spec),
+        except_column_list=[*CHANGE_FEED_COLUMNS, CHANGE_RANK_COLUMN],
+        stored_as_scd_type=1,
+    )
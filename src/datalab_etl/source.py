@@ -0,0 +1,364 @@
+"""SQL Server access over JDBC: planning queries, single reads and skew-aware range reads."""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pyspark.sql import DataFrame, DataFrameReader, Row, SparkSession
+from pyspark.sql.types import StructType
+
+JDBC_DRIVER = "com.microsoft.sqlserver.jdbc.SQLServerDriver"
+
+
+class TableSize(NamedTuple):
+    """Row count and used storage of a source table, from SQL Server partition statistics."""
+
+    rows: int
+    bytes: int
+
+
+class SourceColumn(NamedTuple):
+    """Type of a source column, from INFORMATION_SCHEMA.COLUMNS."""
+
+    data_type: str
+    precision: Optional[int]
+    scale: Optional[int]
+
+
+# Spark integer types by width, and the narrowest one holding each source integer type
+# (SQL Server's tinyint is unsigned, Spark's TINYINT is not)
+SPARK_INTEGER_RANKS = {"TINYINT": 0, "SMALLINT": 1, "INT": 2, "INTEGER": 2, "BIGINT": 3}
+SOURCE_INTEGER_RANKS = {"tinyint": 1, "smallint": 1, "int": 2, "integer": 2, "bigint": 3}
+SOURCE_INTEGER_DIGITS = {"tinyint": 3, "smallint": 5, "int": 10, "integer": 10, "bigint": 19}
+SOURCE_DECIMAL_TYPES = ("decimal", "numeric", "money", "smallmoney")
+SOURCE_DATETIME_TYPES = ("date", "datetime", "datetime2", "smalldatetime", "timestamp")
+SOURCE_STRING_TYPES = ("char", "varchar", "nchar", "nvarchar", "text", "ntext", "character", "character varying")
+
+
+def narrowing_fits(spark_type: str, column: SourceColumn) -> bool:
+    """Whether every value of the source column can be read as `spark_type` without loss.
+
+    Integers must fit the Spark integer type, decimals must keep their scale and integer
+    digits, and only `date` columns may be read as DATE. Unknown types never fit.
+    """
+    wanted = spark_type.strip().upper()
+    source_type = column.data_type.lower()
+    if wanted in SPARK_INTEGER_RANKS:
+        return source_type in SOURCE_INTEGER_RANKS and SOURCE_INTEGER_RANKS[source_type] <= SPARK_INTEGER_RANKS[wanted]
+    decimal = re.fullmatch(r"DECIMAL\((\d+),\s*(\d+)\)", wanted)
+    if decimal:
+        precision, scale = int(decimal.group(1)), int(decimal.group(2))
+        if source_type in SOURCE_INTEGER_DIGITS:
+            return SOURCE_INTEGER_DIGITS[source_type] <= precision - scale
+        if source_type in SOURCE_DECIMAL_TYPES and column.precision is not None:
+            source_scale = column.scale or 0
+            return source_scale <= scale and column.precision - source_scale <= precision - scale
+        return False
+    if wanted == "DATE":
+        return source_type == "date"
+    if wanted == "TIMESTAMP":
+        return source_type in SOURCE_DATETIME_TYPES
+    if wanted == "BOOLEAN":
+        return source_type in ("bit", "boolean")
+    if wanted == "STRING":
+        return source_type in SOURCE_STRING_TYPES
+    return False
+
+
+def split_histogram(steps: Sequence[Tuple[int, int, int]], num_partitions: int) -> List[int]:
+    """Turn histogram steps into upper-inclusive key boundaries with similar row counts.
+
+    `steps` holds (range_high_key, range_rows, equal_rows) tuples ordered by key. Rows inside
+    a step are assumed to be spread evenly between the previous and the current high key,
+    which is the same assumption SQL Server makes for its cardinality estimates.
+    """
+    total_rows = sum(range_rows + equal_rows for _, range_rows, equal_rows in steps)
+    if num_partitions <= 1 or total_rows == 0:
+        return []
+
+    boundaries: List[int] = []
+    # Estimated rows up to the last boundary
+    assigned_rows = 0
+    cumulative_rows = 0
+    previous_key = None
+    for high_key, range_rows, equal_rows in steps:
+        step_start = cumulative_rows
+        cumulative_rows += range_rows + equal_rows
+        while len(boundaries) < num_partitions - 1:
+            # Spread the rows after the last boundary evenly, so a heavy key doesn't unbalance the later ranges
+            wanted_rows = assigned_rows + (total_rows - assigned_rows) / (num_partitions - len(boundaries))
+            if cumulative_rows < wanted_rows:
+                break
+            if previous_key is None or range_rows == 0 or wanted_rows >= step_start + range_rows:
+                boundary, boundary_rows = high_key, cumulative_rows
+            else:
+                fraction = (wanted_rows - step_start) / range_rows
+                boundary, boundary_rows = previous_key + int((high_key - previous_key) * fraction), wanted_rows
+            if boundaries and boundary <= boundaries[-1]:
+                # The step is too coarse to split further; try again at the next step
+                break
+            boundaries.append(boundary)
+            assigned_rows = boundary_rows
+        previous_key = high_key
+    return boundaries
+
+
+def build_range_predicates(key_column: str, boundaries: Sequence[int]) -> List[str]:
+    """Build one WHERE predicate per key range; NULL keys go to the first range."""
+    predicates = []
+    lower = None
+    for upper in boundaries:
+        if lower is None:
+            predicates.append(f"{key_column} <= {upper} OR {key_column} IS NULL")
+        else:
+            predicates.append(f"{key_column} > {lower} AND {key_column} <= {upper}")
+        lower = upper
+    predicates.append(f"{key_column} > {lower}" if lower is not None else "1 = 1")
+    return predicates
+
+
+class SqlServerSource:
+    """The WorldWideImporters SQL Server database, read through the Spark JDBC data source.
+
+    Reads are lazy: every Spark action on a returned DataFrame runs the query again, so callers
+    should materialise each DataFrame once. Planning queries are counted in `planning_queries`,
+    and every DataFrame read from the source (planning queries included) in `reads`.
+
+    Small results can instead be fetched on the driver with `fetch_arrow`, through pymssql
+    (installed by the cluster init script from the artifact cache) rather than Spark JDBC.
+    """
+
+    def __init__(
+        self,
+        spark: SparkSession,
+        host: str,
+        database: str,
+        user: str,
+        password: str,
+        partition_planning: str = "histogram",
+    ):
+        self.spark = spark
+        self.host = host
+        self.database = database
+        self.jdbc_url = f"jdbc:sqlserver://{host}:1433;database={database};encrypt=true;trustServerCertificate=true"
+        self.driver = JDBC_DRIVER
+        self.user = user
+        self.password = password
+        self.partition_planning = partition_planning
+        self.planning_queries = 0
+        self.reads = 0
+        # Whether `fetch_arrow` can reach this source without Spark
+        self.supports_driver_fetch = True
+
+    @property
+    def connection_properties(self) -> Dict[str, str]:
+        return {
+            "user": self.user,
+            "password": self.password,
+            "driver": self.driver,
+            "encrypt": "true",
+            "trustServerCertificate": "true",
+        }
+
+    def query(self, query: str) -> List[Row]:
+        """Run a small planning query and return its rows on the driver."""
+        self.planning_queries += 1
+        return self.read(query).collect()
+
+    def read(
+        self,
+        query: str,
+        source_table: Optional[str] = None,
+        key_column: Optional[str] = None,
+        num_partitions: int = 1,
+        fetch_size: Optional[int] = None,
+        custom_schema: Optional[str] = None,
+    ) -> DataFrame:
+        """Read a query, with one JDBC connection per planned key range when partitioned.
+
+        `fetch_size` sets the rows fetched per round-trip; None keeps the driver default.
+        `custom_schema` (e.g. `"OrderID INT, OrderDate DATE"`) overrides the default JDBC type
+        mapping of the listed columns; columns the query doesn't return are ignored.
+        """
+        self.reads += 1
+        if num_partitions > 1 and source_table and key_column:
+            predicates = self.range_predicates(source_table, key_column, num_partitions)
+            if predicates:
+                print(f"Reading {source_table} with {len(predicates)} parallel JDBC partitions on {key_column}")
+                properties = self.connection_properties
+                if fetch_size:
+                    properties["fetchsize"] = str(fetch_size)
+                if custom_schema:
+                    properties["customSchema"] = custom_schema
+                return self.spark.read.jdbc(
+                    url=self.jdbc_url,
+                    table=f"({query}) AS src",
+                    predicates=predicates,
+                    properties=properties,
+                )
+            print(f"INFO: Could not split {source_table} into ranges, using a single read")
+
+        return self.reader(query, fetch_size, custom_schema).load()
+
+    def reader(self, query: str, fetch_size: Optional[int] = None, custom_schema: Optional[str] = None) -> DataFrameReader:
+        reader = self.spark.read \
+            .format("jdbc") \
+            .option("url", self.jdbc_url) \
+            .option("query", query) \
+            .option("user", self.user) \
+            .option("password", self.password) \
+            .option("driver", self.driver)
+        if fetch_size:
+            reader = reader.option("fetchsize", fetch_size)
+        if custom_schema:
+            reader = reader.option("customSchema", custom_schema)
+        return reader
+
+    def schema(self, query: str, custom_schema: Optional[str] = None) -> StructType:
+        """Spark schema of a query's result, from the JDBC driver's metadata; no rows are read."""
+        self.reads += 1
+        return self.reader(query, custom_schema=custom_schema).load().schema
+
+    def fetch_arrow(self, query: str, schema: StructType, batch_size: int = 10000):
+        """Fetch a query on the driver into Arrow record batches of `batch_size` rows.
+
+        Rows come through pymssql instead of Spark JDBC, so no Spark job runs. `schema` (see
+        `schema()`) types the Arrow columns like the JDBC path would; timestamps stay wall-clock
+        times, as Spark reads SQL Server `datetime2`. Returns a `pyarrow.Table`.
+        """
+        import pyarrow as pa
+        import pymssql
+        from pyspark.sql.pandas.types import to_arrow_schema
+
+        arrow_schema = pa.schema([
+            pa.field(field.name, pa.timestamp("us") if pa.types.is_timestamp(field.type) else field.type)
+            for field in to_arrow_schema(schema)
+        ])
+        self.reads += 1
+        batches = []
+        with pymssql.connect(server=self.host, user=self.user, password=self.password, database=self.database) as connection:
+            cursor = connection.cursor()
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                batches.append(pa.RecordBatch.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, arrow_schema)],
+                    schema=arrow_schema,
+                ))
+        return pa.Table.from_batches(batches, schema=arrow_schema)
+
+    def change_tracking_versions(self, source_table: str) -> Tuple[int, Optional[int]]:
+        """Current Change Tracking version of the database and the minimum valid version of a table (None if untracked)."""
+        row = self.query(
+            f"SELECT CHANGE_TRACKING_CURRENT_VERSION() AS current_version, "
+            f"CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('{source_table}')) AS min_valid_version"
+        )[0]
+        return row["current_version"], row["min_valid_version"]
+
+    def changes(self, source_table: str, since_version: int) -> str:
+        """Relation of the net Change Tracking changes of a table after `since_version`, for a FROM clause."""
+        return f"CHANGETABLE(CHANGES {source_table}, {since_version})"
+
+    def range_predicates(self, source_table: str, key_column: str, num_partitions: int) -> List[str]:
+        """WHERE predicates of the planned key ranges, or an empty list if the table can't be split."""
+        boundaries = self.plan_key_boundaries(source_table, key_column, num_partitions)
+        return build_range_predicates(key_column, boundaries) if boundaries else []
+
+    def plan_key_boundaries(self, source_table: str, key_column: str, num_partitions: int) -> List[int]:
+        """Plan key boundaries using the configured strategy, falling back to NTILE."""
+        if self.partition_planning == "histogram":
+            try:
+                boundaries = self.histogram_boundaries(source_table, key_column, num_partitions)
+                if boundaries:
+                    print(f"Planned {len(boundaries) + 1} ranges for {source_table} from statistics histogram")
+                    return boundaries
+                print(f"INFO: No usable histogram on {source_table}.{key_column}, falling back to NTILE")
+            except Exception as e:
+                print(f"INFO: Histogram planning failed for {source_table}.{key_column} ({str(e)}), falling back to NTILE")
+
+        boundaries = self.ntile_boundaries(source_table, key_column, num_partitions)
+        print(f"Planned {len(boundaries) + 1} ranges for {source_table} from NTILE sample")
+        return boundaries
+
+    def histogram_boundaries(self, source_table: str, key_column: str, num_partitions: int) -> List[int]:
+        """Plan key boundaries from the statistics histogram whose leading column is the key."""
+        histogram_query = f"""
+        SELECT 
+            h.step_number,
+            CAST(h.range_high_key AS BIGINT) AS range_high_key,
+            CAST(h.range_rows AS BIGINT) AS range_rows,
+            CAST(h.equal_rows AS BIGINT) AS equal_rows
+        FROM (
+            SELECT TOP 1 s.object_id, s.stats_id
+            FROM sys.stats AS s
+            JOIN sys.stats_columns AS sc
+                ON sc.object_id = s.object_id AND sc.stats_id = s.stats_id AND sc.stats_column_id = 1
+            WHERE s.object_id = OBJECT_ID('{source_table}')
+                AND COL_NAME(sc.object_id, sc.column_id) = '{key_column}'
+            ORDER BY s.stats_id
+        ) AS key_stats
+        CROSS APPLY sys.dm_db_stats_histogram(key_stats.object_id, key_stats.stats_id) AS h
+        """
+        rows = sorted(self.query(histogram_query), key=lambda row: row["step_number"])
+        steps = [(row["range_high_key"], row["range_rows"], row["equal_rows"]) for row in rows]
+        return split_histogram(steps, num_partitions)
+
+    def ntile_boundaries(self, source_table: str, key_column: str, num_partitions: int) -> List[int]:
+        """Plan exact equal-count key boundaries with an NTILE pass over the key index."""
+        ntile_query = f"""
+        SELECT MAX({key_column}) AS upper_key
+        FROM (
+            SELECT {key_column}, NTILE({num_partitions}) OVER (ORDER BY {key_column}) AS tile
+            FROM {source_table}
+            WHERE {key_column} IS NOT NULL
+        ) AS tiles
+        GROUP BY tile
+        """
+        upper_keys = sorted(row["upper_key"] for row in self.query(ntile_query))
+        # The last tile is open-ended, so only the first n-1 upper keys are boundaries
+        return upper_keys[:-1]
+
+    def column_types(self, source_tables: Sequence[str]) -> Dict[str, Dict[str, SourceColumn]]:
+        """Look up the declared type of every column of the source tables in INFORMATION_SCHEMA."""
+        table_filter = " OR ".join(
+            f"(UPPER(TABLE_SCHEMA) = UPPER('{table.split('.')[0]}') AND UPPER(TABLE_NAME) = UPPER('{table.split('.')[1]}'))"
+            for table in source_tables
+        )
+        columns_query = f"""
+        SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE,
+            CAST(NUMERIC_PRECISION AS INT) AS NUMERIC_PRECISION,
+            CAST(NUMERIC_SCALE AS INT) AS NUMERIC_SCALE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE {table_filter}
+        """
+        by_name = {table.upper(): table for table in source_tables}
+        types: Dict[str, Dict[str, SourceColumn]] = {table: {} for table in source_tables}
+        for row in self.query(columns_query):
+            table = by_name[f"{row['TABLE_SCHEMA']}.{row['TABLE_NAME']}".upper()]
+            types[table][row["COLUMN_NAME"]] = SourceColumn(row["DATA_TYPE"], row["NUMERIC_PRECISION"], row["NUMERIC_SCALE"])
+        return types
+
+    def table_sizes(self, source_tables: Sequence[str]) -> Dict[str, TableSize]:
+        """Look up row counts and used bytes (including LOB pages) for source tables."""
+        object_ids = ", ".join(f"OBJECT_ID('{table}')" for table in source_tables)
+        sizes_query = f"""
+        SELECT 
+            s.name + '.' + t.name AS source_table,
+            SUM(CASE WHEN ps.index_id IN (0, 1) THEN ps.row_count ELSE 0 END) AS row_count,
+            CAST(SUM(ps.used_page_count) AS BIGINT) * 8192 AS used_bytes
+        FROM sys.dm_db_partition_stats AS ps
+        JOIN sys.tables AS t ON t.object_id = ps.object_id
+        JOIN sys.schemas AS s ON s.schema_id = t.schema_id
+        WHERE ps.object_id IN ({object_ids})
+        GROUP BY s.name, t.name
+        """
+        return {
+            row["source_table"]: TableSize(int(row["row_count"]), int(row["used_bytes"]))
+            for row in self.query(sizes_query)
+        }
+
+    def clear_credentials(self) -> None:
+        """Drop the SQL password from memory once the run is done."""
+        self.password = None
@@ -0,0 +1,230 @@
+"""Near-real-time ingestion of SQL Server Change Tracking changes into bronze as a micro-batch stream.
+
+Spark has no streaming JDBC source, so each stream is driven by a `rate` source ticking at the
+trigger interval: every micro-batch polls `CHANGETABLE(CHANGES ...)` from the Change Tracking
+version stored in `_etl_cdc_offsets` and MERGEs the changed rows into bronze in `foreachBatch`.
+
+Applying a batch is idempotent (deletes and upserts on the merge keys), and the offset only
+advances after the MERGEs committed. A micro-batch that Spark replays from its checkpoint after
+the offset was stored is skipped, so every change is applied once.
+
+Change Tracking must be enabled on the database and on each streamed table:
+
+    ALTER DATABASE WorldWideImporters SET CHANGE_TRACKING = ON (CHANGE_RETENTION = 2 DAYS, AUTO_CLEANUP = ON);
+    ALTER TABLE Sales.Orders ENABLE CHANGE_TRACKING;
+
+The stream and the nightly batch write the same bronze tables and `_etl_watermarks`, so they must
+never run together: the nightly job pauses the stream's continuous job first
+(`pause_continuous_job`) and resumes it when its bronze loads are done (`resume_continuous_job`).
+"""
+
+import datetime
+import time
+from typing import Optional, Tuple
+
+from delta.tables import DeltaTable
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+from pyspark.sql.streaming import StreamingQuery
+
+from .control import ChangeOffsetStore
+from .engine import ExtractionEngine
+from .registry import TableSpec
+
+CHANGE_VERSION_COLUMN = "_change_version"
+CHANGE_OPERATION_COLUMN = "_change_operation"
+
+
+def change_tracking_query(spec: TableSpec, changes: str, until_version: int) -> str:
+    """SELECT the net change per key in `changes` up to a Change Tracking version, with the current row values.
+
+    `changes` is the source's change relation after the stored version (`SqlServerSource.changes`).
+    Deleted rows only carry their key columns; the other columns are NULL.
+    """
+    join = " AND ".join(f"t.{key} = ct.{key}" for key in spec.key_columns)
+    column_list = ",\n    ".join(f"ct.{column}" if column in spec.key_columns else f"t.{column}" for column in spec.columns)
+    return f"""SELECT
+    ct.SYS_CHANGE_VERSION AS {CHANGE_VERSION_COLUMN},
+    ct.SYS_CHANGE_OPERATION AS {CHANGE_OPERATION_COLUMN},
+    {column_list}
+FROM {changes} AS ct
+LEFT JOIN {spec.source_table} AS t ON {join}
+WHERE ct.SYS_CHANGE_VERSION <= {until_version}"""
+
+
+def next_version_query(changes: str, max_rows: int) -> str:
+    """Highest Change Tracking version covering at most `max_rows` changed keys in `changes`.
+
+    A batch always ends on a whole version, so it can exceed `max_rows` by the keys of the last one.
+    """
+    return f"""SELECT MAX(SYS_CHANGE_VERSION) AS until_version
+FROM (
+    SELECT TOP ({max_rows}) SYS_CHANGE_VERSION
+    FROM {changes} AS ct
+    ORDER BY SYS_CHANGE_VERSION
+) AS next_changes"""
+
+
+class ChangeStream:
+    """Streams the Change Tracking changes of one registered table into its bronze table.
+
+    - `checkpoint_location`: streaming checkpoint of this table's stream
+    - `trigger_interval`: how often SQL Server is polled, e.g. `"1 minute"`
+    - `max_rows_per_batch`: back-pressure; changed keys applied per micro-batch, larger
+      backlogs are worked off over several batches
+
+    The first batch, and any batch after the stored version fell behind the Change Tracking
+    retention, takes a full snapshot through the engine and continues from the version read
+    before it. Changes made during the snapshot are applied again, which the MERGE tolerates.
+    """
+
+    def __init__(
+        self,
+        engine: ExtractionEngine,
+        spec: TableSpec,
+        checkpoint_location: str,
+        trigger_interval: str = "1 minute",
+        max_rows_per_batch: int = 50000,
+    ):
+        if spec.temporal:
+            raise ValueError(f"{spec.name} is a temporal table; its SCD2 history is captured by incremental loads, not streamed")
+        if engine.load_mode != "full":
+            raise ValueError("ChangeStream takes its snapshots through the engine, which must run with load_mode='full'")
+        self.engine = engine
+        self.spec = spec
+        self.checkpoint_location = checkpoint_location
+        self.trigger_interval = trigger_interval
+        self.max_rows_per_batch = max_rows_per_batch
+        self.store = ChangeOffsetStore(engine.spark, engine.qualify("_etl_cdc_offsets"))
+
+    def versions(self) -> Tuple[int, int]:
+        """Current and minimum valid Change Tracking version of the source table."""
+        current_version, min_valid_version = self.engine.source.change_tracking_versions(self.spec.source_table)
+        if min_valid_version is None:
+            raise ValueError(f"Change Tracking is not enabled on {self.spec.source_table}")
+        return current_version, min_valid_version
+
+    def snapshot(self, batch_id: int) -> None:
+        """Load the whole table and store the Change Tracking version read just before it."""
+        current_version, _ = self.versions()
+        print(f"Taking a snapshot of {self.spec.name} at Change Tracking version {current_version}")
+        result = self.engine.run(self.spec)
+        self.store.set({
+            "table_name": self.spec.name,
+            "change_version": current_version,
+            "checkpoint_location": self.checkpoint_location,
+            "stream_batch_id": batch_id,
+            "rows_applied": result.records,
+        })
+        self.drop_snapshot(self.spec.name)
+
+    def apply(self, df: DataFrame, batch_tag: str) -> None:
+        """Apply staged changes: deleted keys are removed from bronze and its side tables, the rest MERGEd."""
+        engine, spec = self.engine, self.spec
+        operation = F.col(CHANGE_OPERATION_COLUMN)
+        deletes = df.where(operation == "D").select(*spec.merge_keys)
+        if deletes.head(1):
+            tables = [spec.name] + [engine.side_name(spec, side) for side in spec.side_tables if engine.splits(spec) and not side.blob]
+            merge_condition = " AND ".join(f"t.{key} = s.{key}" for key in spec.merge_keys)
+            for table_name in tables:
+                DeltaTable.forName(engine.spark, engine.qualify(table_name)).alias("t") \
+                    .merge(deletes.alias("s"), merge_condition) \
+                    .whenMatchedDelete() \
+                    .execute()
+
+        upserts = engine.with_metadata(df.where(operation != "D").drop(CHANGE_VERSION_COLUMN, CHANGE_OPERATION_COLUMN), spec, batch_tag)
+        upserts = engine.json_projector.project(upserts, spec)
+        engine.write(upserts, spec, is_incremental=True)
+        engine.update_watermark(spec, batch_tag)
+
+    def process_batch(self, _: DataFrame, batch_id: int) -> None:
+        """foreachBatch handler: apply the next changes after the stored version, then advance it."""
+        offset = self.store.get(self.spec.name)
+        _, min_valid_version = self.versions()
+        if offset is None or offset["change_version"] < min_valid_version:
+            if offset is not None:
+                print(f"WARNING: {self.spec.name} is behind the Change Tracking retention, taking a new snapshot")
+            self.snapshot(batch_id)
+            return
+        if offset["checkpoint_location"] == self.checkpoint_location and offset["stream_batch_id"] >= batch_id:
+            print(f"{self.spec.name}: micro-batch {batch_id} was already applied, skipping")
+            return
+
+        since_version = offset["change_version"]
+        changes = self.engine.source.changes(self.spec.source_table, since_version)
+        until_version: Optional[int] = self.engine.source.query(next_version_query(changes, self.max_rows_per_batch))[0]["until_version"]
+        if until_version is None:
+            return
+
+        batch_tag = f"{self.spec.name}_cdc_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        df = self.engine.source.read(change_tracking_query(self.spec, changes, until_version), custom_schema=self.engine.custom_schema(self.spec))
+        df = self.engine.stage(df, f"{self.spec.name}_cdc")
+        rows = df.count()
+        self.apply(df, batch_tag)
+        self.store.set({
+            "table_name": self.spec.name,
+            "change_version": until_version,
+            "checkpoint_location": self.checkpoint_location,
+            "stream_batch_id": batch_id,
+            "rows_applied": rows,
+        })
+        self.drop_snapshot(f"{self.spec.name}_cdc")
+        print(f"✅ {self.spec.name}: applied {rows} changed rows (Change Tracking versions {since_version + 1}-{until_version})")
+
+    def drop_snapshot(self, table_name: str) -> None:
+        """Drop a staged snapshot once its batch is applied; a stream never reaches the engine's end-of-run cleanup."""
+        self.engine.drop_snapshot(table_name)
+        self.engine.source_round_trips.pop(table_name, None)
+
+    def start(self) -> StreamingQuery:
+        """Start polling in the background, in the table's own FAIR scheduler pool."""
+        self.store.ensure()
+        sc = self.engine.spark.sparkContext
+        # Streams keep the local properties of the thread that started them
+        sc.setLocalProperty("spark.scheduler.pool", f"cdc_{self.spec.name}")
+        try:
+            return self.engine.spark.readStream \
+                .format("rate") \
+                .option("rowsPerSecond", 1) \
+                .load() \
+                .writeStream \
+                .queryName(f"cdc_{self.spec.name}") \
+                .foreachBatch(self.process_batch) \
+                .trigger(processingTime=self.trigger_interval) \
+                .option("checkpointLocation", self.checkpoint_location) \
+                .start()
+        finally:
+            sc.setLocalProperty("spark.scheduler.pool", None)
+
+
+def pause_continuous_job(job_id: int, timeout_seconds: int = 900, poll_seconds: int = 15) -> bool:
+    """Pause a continuous job and wait until its active runs ended.
+
+    Active runs are cancelled; a stream cancelled mid-batch replays the batch when resumed,
+    because its offset only advances after the MERGEs committed. Returns whether the job was
+    unpaused, i.e. whether `resume_continuous_job` should unpause it again.
+    """
+    from databricks.sdk import WorkspaceClient
+    from databricks.sdk.service.jobs import Continuous, JobSettings, PauseStatus
+
+    client = WorkspaceClient()
+    continuous = client.jobs.get(job_id=job_id).settings.continuous
+    was_unpaused = continuous is not None and continuous.pause_status != PauseStatus.PAUSED
+    if was_unpaused:
+        client.jobs.update(job_id=job_id, new_settings=JobSettings(continuous=Continuous(pause_status=PauseStatus.PAUSED)))
+    client.jobs.cancel_all_runs(job_id=job_id)
+
+    deadline = time.monotonic() + timeout_seconds
+    while any(True for _ in client.jobs.list_runs(job_id=job_id, active_only=True)):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Runs of job {job_id} still active {timeout_seconds}s after cancelling them")
+        time.sleep(poll_seconds)
+    return was_unpaused
+
+
+def resume_continuous_job(job_id: int) -> None:
+    """Unpause a continuous job paused by `pause_continuous_job`."""
+    from databricks.sdk import WorkspaceClient
+    from databricks.sdk.service.jobs import Continuous, JobSettings, PauseStatus
+
+    WorkspaceClient().jobs.update(job_id=job_id, new_settings=JobSettings(continuous=Continuous(pause_status=PauseStatus.UNPAUSED)))
@@ -0,0 +1,183 @@
+"""Summary tables maintained incrementally from the Change Data Feed of their bronze tables.
+
+A summary is a set of SUMs grouped by key columns, so counts, totals and averages can be
+updated from the rows that changed instead of rescanning bronze: inserted rows and update
+post-images add their contribution, deleted rows and update pre-images subtract theirs. A full
+reload of a bronze table shows up in its change feed as every old row deleted and every new row
+inserted, so it is handled the same way.
+
+The bronze version a summary covers is stored as the `userMetadata` of the summary's own
+write, so the summary and its version advance in the same commit and a failed refresh is simply
+re-run. A summary without a stored version, or whose bronze changes can no longer be read (e.g.
+vacuumed, or written before Change Data Feed was enabled), is rebuilt from the bronze table.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from delta.tables import DeltaTable
+from pyspark.sql import Column, DataFrame, Row
+from pyspark.sql import functions as F
+
+from .engine import OPEN_VALID_TO, ExtractionEngine
+from .metrics import table_version
+from .report import replaced_since
+
+
+@dataclass(frozen=True)
+class SummaryTable:
+    """An aggregate over one bronze table, kept up to date from its changed rows.
+
+    - `source`: bronze table aggregated
+    - `keys`: group-by columns; no keys gives a single-row summary
+    - `measures`: (column, SQL expression summed over the rows, SQL type); the first measure
+      must count rows, and keyed groups whose count drops to zero are removed
+    - `where`: SQL predicate selecting the rows that contribute, e.g. current SCD2 versions
+    - `label_table`, `label_columns`, `label_where`: descriptive columns looked up by the keys on
+      every refresh, so renames show up without a change to the source table
+    """
+
+    name: str
+    source: str
+    measures: Tuple[Tuple[str, str, str], ...]
+    keys: Tuple[str, ...] = ()
+    where: Optional[str] = None
+    label_table: Optional[str] = None
+    label_columns: Tuple[str, ...] = ()
+    label_where: Optional[str] = None
+
+
+CURRENT_VERSION = f"ValidTo >= '{OPEN_VALID_TO[:10]}'"
+
+STOCK_SUMMARIES: Dict[str, SummaryTable] = {
+    summary.name: summary
+    for summary in [
+        SummaryTable(
+            name="stock_inventory_summary",
+            source="stock_item_holdings",
+            measures=(
+                ("item_count", "1", "BIGINT"),
+                ("total_quantity", "QuantityOnHand", "BIGINT"),
+                ("total_value", "QuantityOnHand * LastCostPrice", "DECIMAL(38, 6)"),
+                ("zero_stock_items", "CASE WHEN QuantityOnHand = 0 THEN 1 ELSE 0 END", "BIGINT"),
+                ("below_reorder_items", "CASE WHEN QuantityOnHand < ReorderLevel THEN 1 ELSE 0 END", "BIGINT"),
+            ),
+        ),
+        # One row per distinct price; min, max, mean and standard deviation follow from it
+        SummaryTable(
+            name="stock_price_distribution",
+            source="stock_items",
+            keys=("UnitPrice",),
+            measures=(("item_count", "1", "BIGINT"),),
+            where=f"{CURRENT_VERSION} AND UnitPrice > 0",
+        ),
+        SummaryTable(
+            name="stock_group_item_counts",
+            source="stock_item_stock_groups",
+            keys=("StockGroupID",),
+            measures=(("item_count", "1", "BIGINT"),),
+            label_table="stock_groups",
+            label_columns=("StockGroupName",),
+            label_where=CURRENT_VERSION,
+        ),
+    ]
+}
+
+
+def change_sign() -> Column:
+    """+1 for rows a change adds, -1 for rows it removes."""
+    return F.when(F.col("_change_type").isin("delete", "update_preimage"), -1).otherwise(1)
+
+
+class SummaryRefresher:
+    """Brings summary tables, kept in the engine's schema, up to date with the bronze versions they aggregate."""
+
+    def __init__(self, engine: ExtractionEngine):
+        self.engine = engine
+        self.spark = engine.spark
+
+    def covered_version(self, table: str) -> Optional[int]:
+        """Bronze version the summary table was last refreshed to, or None if it has none."""
+        if not self.spark.catalog.tableExists(table):
+            return None
+        for commit in DeltaTable.forName(self.spark, table).history(10).collect():
+            if commit["userMetadata"]:
+                return json.loads(commit["userMetadata"]).get("source_version")
+        return None
+
+    def aggregate(self, summary: SummaryTable, rows: DataFrame, sign: Column) -> DataFrame:
+        """Sum the signed contribution of each row per key."""
+        if summary.where:
+            rows = rows.where(summary.where)
+        return rows.groupBy(*summary.keys).agg(*[
+            F.coalesce(F.sum(sign * F.expr(expression)), F.lit(0)).cast(data_type).alias(column)
+            for column, expression, data_type in summary.measures
+        ])
+
+    def refresh(self, summary: SummaryTable) -> bool:
+        """Apply the bronze changes since the covered version; returns False if the summary was rebuilt.
+
+        The summary is rebuilt from its source table when it has no covered version, the source was
+        replaced as a whole since (a full load), or the changes since can't be read.
+        """
+        table = self.engine.qualify(summary.name)
+        source_table = self.engine.qualify(summary.source)
+        label_table = self.engine.qualify(summary.label_table) if summary.label_table else None
+        target_version = table_version(self.spark, source_table)
+        covered = self.covered_version(table)
+        if covered == target_version and label_table is None:
+            print(f"{table} is up to date with version {target_version} of {source_table}")
+            return True
+
+        state: Optional[List[Row]] = None
+        if covered is not None and covered <= target_version and not replaced_since(self.spark, source_table, covered):
+            try:
+                current = self.spark.table(table).drop(*summary.label_columns)
+                if covered < target_version:
+                    changes = self.spark.read \
+                        .option("readChangeFeed", "true") \
+                        .option("startingVersion", covered + 1) \
+                        .option("endingVersion", target_version) \
+                        .table(source_table)
+                    current = current.unionByName(self.aggregate(summary, changes, change_sign()))
+                state = current.groupBy(*summary.keys).agg(*[
+                    F.sum(column).cast(data_type).alias(column) for column, _, data_type in summary.measures
+                ]).collect()
+            except Exception as e:
+                print(f"INFO: Could not read the changes of {source_table} since version {covered}, rebuilding {table} ({str(e)})")
+        incremental = state is not None
+        if state is None:
+            state = self.aggregate(summary, self.spark.table(source_table), F.lit(1)).collect()
+
+        if summary.keys:
+            count_column = summary.measures[0][0]
+            state = [row for row in state if row[count_column]]
+        key_fields = self.spark.table(source_table).select(*summary.keys).schema.fields
+        schema = ", ".join(
+            [f"{field.name} {field.dataType.simpleString()}" for field in key_fields]
+            + [f"{column} {data_type}" for column, _, data_type in summary.measures]
+        )
+        df = self.spark.createDataFrame(state, schema)
+        if label_table is not None:
+            labels = self.spark.table(label_table)
+            if summary.label_where:
+                labels = labels.where(summary.label_where)
+            df = df.join(labels.select(*summary.keys, *summary.label_columns), list(summary.keys), "left")
+
+        # The covered version is committed together with the summary rows
+        df.write \
+            .mode("overwrite") \
+            .option("overwriteSchema", "true") \
+            .option("userMetadata", json.dumps({"source": source_table, "source_version": target_version})) \
+            .saveAsTable(table)
+        print(f"✅ {table} {'updated' if incremental else 'rebuilt'} to version {target_version} of {source_table}")
+        return incremental
+
+    def refresh_all(self, summaries: Iterable[SummaryTable]) -> None:
+        """Refresh every summary; a failed summary is reported and left for the next run."""
+        for summary in summaries:
+            try:
+                self.refresh(summary)
+            except Exception as e:
+                print(f"WARNING: Could not refresh {summary.name}: {str(e)}")
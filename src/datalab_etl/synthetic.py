@@ -0,0 +1,216 @@
+"""Synthetic WorldWideImporters data for benchmarking the extraction at different scales.
+
+Every table has the columns the registry selects, with SQL Server-like types. Values are
+derived from the row ID with hash functions, so the same scale always produces the same data
+and a second generation with `edit_fraction` only changes `LastEditedWhen` of the edited rows.
+"""
+
+import datetime
+from typing import Dict, Optional
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+from .engine import OPEN_VALID_TO
+from .registry import BRONZE_TABLES
+
+# Row counts of the WorldWideImporters sample database, i.e. scale factor 1
+BASE_ROWS = {
+    "Sales.Customers": 663,
+    "Sales.Orders": 73595,
+    "Sales.OrderLines": 231412,
+    "Warehouse.StockItems": 227,
+    "Warehouse.StockItemHoldings": 227,
+    "Warehouse.StockGroups": 10,
+    "Warehouse.StockItemStockGroups": 442,
+}
+
+# Reference data that does not grow with the business
+FIXED_SIZE_TABLES = ("Warehouse.StockGroups",)
+
+FIRST_ORDER_DATE = "2013-01-01"
+ORDER_DAYS = 4 * 365
+COUNTRIES = ("China", "USA", "Japan", "Germany", "Mexico")
+TAGS = ("Radio Control", "Realistic Sound", "Vintage", "Limited Stock", "USB Powered", "Comfortable")
+STOCK_GROUPS = (
+    "Novelty Items", "Clothing", "Mugs", "T-Shirts", "Airline Novelties",
+    "Computing Novelties", "USB Novelties", "Furry Footwear", "Toys", "Packaging Materials",
+)
+
+
+def scaled_rows(source_table: str, scale: float) -> int:
+    if source_table in FIXED_SIZE_TABLES:
+        return BASE_ROWS[source_table]
+    return max(1, int(BASE_ROWS[source_table] * scale))
+
+
+def pick(row_id: Column, salt: int, modulo: int) -> Column:
+    """Deterministic pseudo-random integer in [0, modulo) for a row."""
+    return F.pmod(F.hash(row_id, F.lit(salt)), F.lit(modulo))
+
+
+def choice(row_id: Column, salt: int, values) -> Column:
+    return F.element_at(F.array(*[F.lit(value) for value in values]), (pick(row_id, salt, len(values)) + 1).cast("int"))
+
+
+def money(row_id: Column, salt: int, max_cents: int) -> Column:
+    return ((pick(row_id, salt, max_cents) + 1) / 100).cast("decimal(18,2)")
+
+
+def days_after(start: str, days: Column) -> Column:
+    return F.date_add(F.lit(start).cast("date"), days.cast("int"))
+
+
+def last_edited(row_id: Column, base: Column, edit_fraction: float, edited_at: Optional[datetime.datetime]) -> Column:
+    """`base` as the edit time, except for the `edit_fraction` of rows edited at `edited_at`."""
+    if not edit_fraction or edited_at is None:
+        return base
+    return F.when(pick(row_id, 99, 10000) < int(edit_fraction * 10000), F.lit(edited_at)).otherwise(base)
+
+
+def generate_wwi(
+    spark: SparkSession,
+    scale: float = 1.0,
+    edit_fraction: float = 0.0,
+    edited_at: Optional[datetime.datetime] = None,
+) -> Dict[str, DataFrame]:
+    """Generate every registered source table at `scale` times the sample database size.
+
+    With `edit_fraction`, that share of the rows in tables tracked by `LastEditedWhen` get
+    `edited_at` as their edit time, so an incremental load has changes to pick up.
+    """
+    customers = scaled_rows("Sales.Customers", scale)
+    orders = scaled_rows("Sales.Orders", scale)
+    order_lines = scaled_rows("Sales.OrderLines", scale)
+    stock_items = scaled_rows("Warehouse.StockItems", scale)
+    stock_groups = scaled_rows("Warehouse.StockGroups", scale)
+    item_groups = scaled_rows("Warehouse.StockItemStockGroups", scale)
+
+    def rows(count: int) -> DataFrame:
+        return spark.range(1, count + 1).withColumnRenamed("id", "row_id")
+
+    row_id = F.col("row_id")
+    valid_from = F.timestamp_seconds(F.unix_timestamp(F.lit(f"{FIRST_ORDER_DATE} 00:00:00")) + pick(row_id, 50, 60 * 24 * 30) * 60)
+    open_valid_to = F.lit(OPEN_VALID_TO[:26]).cast("timestamp")
+
+    tables = {
+        "Sales.Customers": rows(customers).select(
+            row_id.cast("int").alias("CustomerID"),
+            F.concat(F.lit("Customer "), row_id).alias("CustomerName"),
+            row_id.cast("int").alias("BillToCustomerID"),
+            (pick(row_id, 1, 7) + 1).cast("int").alias("CustomerCategoryID"),
+            (pick(row_id, 2, 3000) + 1).cast("int").alias("PrimaryContactPersonID"),
+            F.lit(3).alias("DeliveryMethodID"),
+            (pick(row_id, 3, 38000) + 1).cast("int").alias("DeliveryCityID"),
+            (pick(row_id, 3, 38000) + 1).cast("int").alias("PostalCityID"),
+            days_after(FIRST_ORDER_DATE, pick(row_id, 4, ORDER_DAYS)).alias("AccountOpenedDate"),
+            F.lit(0).cast("decimal(18,3)").alias("StandardDiscountPercentage"),
+            F.lit(False).alias("IsStatementSent"),
+            (pick(row_id, 5, 20) == 0).alias("IsOnCreditHold"),
+            F.lit(7).alias("PaymentDays"),
+            F.format_string("(%03d) 555-%04d", pick(row_id, 6, 1000), pick(row_id, 7, 10000)).alias("PhoneNumber"),
+            F.format_string("(%03d) 555-%04d", pick(row_id, 6, 1000), pick(row_id, 8, 10000)).alias("FaxNumber"),
+            F.concat(F.lit("http://www.customer"), row_id, F.lit(".com")).alias("WebsiteURL"),
+            F.concat(F.lit("Shop "), pick(row_id, 9, 500)).alias("DeliveryAddressLine1"),
+            F.format_string("%05d", pick(row_id, 10, 100000)).alias("DeliveryPostalCode"),
+            F.concat(F.lit("PO Box "), pick(row_id, 11, 10000)).alias("PostalAddressLine1"),
+            F.format_string("%05d", pick(row_id, 10, 100000)).alias("PostalPostalCode"),
+            F.lit(1).alias("LastEditedBy"),
+            valid_from.alias("ValidFrom"),
+            open_valid_to.alias("ValidTo"),
+        ),
+        "Sales.Orders": rows(orders).select(
+            row_id.cast("int").alias("OrderID"),
+            (pick(row_id, 12, customers) + 1).cast("int").alias("CustomerID"),
+            (pick(row_id, 13, 20) + 1).cast("int").alias("SalespersonPersonID"),
+            F.when(pick(row_id, 14, 10) > 0, (pick(row_id, 15, 20) + 1).cast("int")).alias("PickedByPersonID"),
+            (pick(row_id, 16, 3000) + 1).cast("int").alias("ContactPersonID"),
+            F.when(pick(row_id, 17, 10) == 0, (row_id + 1).cast("int")).alias("BackorderOrderID"),
+            days_after(FIRST_ORDER_DATE, row_id * ORDER_DAYS / orders).alias("OrderDate"),
+            days_after(FIRST_ORDER_DATE, row_id * ORDER_DAYS / orders + 1).alias("ExpectedDeliveryDate"),
+            F.format_string("%05d", pick(row_id, 18, 100000)).alias("CustomerPurchaseOrderNumber"),
+            F.lit(True).alias("IsUndersupplyBackordered"),
+            F.when(pick(row_id, 19, 5) == 0, F.concat(F.lit("Comment for order "), row_id)).alias("Comments"),
+            F.when(pick(row_id, 20, 5) == 0, F.lit("Leave at the back door")).alias("DeliveryInstructions"),
+            F.when(pick(row_id, 21, 10) == 0, F.lit("Internal note")).alias("InternalComments"),
+            F.to_timestamp(days_after(FIRST_ORDER_DATE, row_id * ORDER_DAYS / orders + 1)).alias("PickingCompletedWhen"),
+            F.lit(1).alias("LastEditedBy"),
+            last_edited(row_id, F.to_timestamp(days_after(FIRST_ORDER_DATE, row_id * ORDER_DAYS / orders + 1)), edit_fraction, edited_at).alias("LastEditedWhen"),
+        ),
+        "Sales.OrderLines": rows(order_lines).select(
+            row_id.cast("int").alias("OrderLineID"),
+            (F.floor((row_id - 1) * orders / order_lines) + 1).cast("int").alias("OrderID"),
+            (pick(row_id, 22, stock_items) + 1).cast("int").alias("StockItemID"),
+            F.concat(F.lit("Stock item "), pick(row_id, 22, stock_items) + 1).alias("Description"),
+            (pick(row_id, 23, 14) + 1).cast("int").alias("PackageTypeID"),
+            (pick(row_id, 24, 100) + 1).cast("int").alias("Quantity"),
+            money(row_id, 25, 10000).alias("UnitPrice"),
+            F.lit(15).cast("decimal(18,3)").alias("TaxRate"),
+            (pick(row_id, 24, 100) + 1).cast("int").alias("PickedQuantity"),
+            F.to_timestamp(days_after(FIRST_ORDER_DATE, (row_id - 1) * ORDER_DAYS / order_lines + 1)).alias("PickingCompletedWhen"),
+            F.lit(1).alias("LastEditedBy"),
+            last_edited(row_id, F.to_timestamp(days_after(FIRST_ORDER_DATE, (row_id - 1) * ORDER_DAYS / order_lines + 1)), edit_fraction, edited_at).alias("LastEditedWhen"),
+        ),
+        "Warehouse.StockItems": rows(stock_items).select(
+            row_id.cast("int").alias("StockItemID"),
+            F.concat(F.lit("Stock item "), row_id).alias("StockItemName"),
+            (pick(row_id, 26, 13) + 1).cast("int").alias("SupplierID"),
+            F.when(pick(row_id, 27, 3) == 0, (pick(row_id, 28, 36) + 1).cast("int")).alias("ColorID"),
+            F.lit(7).alias("UnitPackageID"),
+            F.lit(7).alias("OuterPackageID"),
+            F.when(pick(row_id, 29, 4) == 0, F.lit("Northwind")).alias("Brand"),
+            F.when(pick(row_id, 30, 3) == 0, choice(row_id, 31, ("S", "M", "L", "XL"))).alias("Size"),
+            (pick(row_id, 32, 20) + 1).cast("int").alias("LeadTimeDays"),
+            (pick(row_id, 33, 100) + 1).cast("int").alias("QuantityPerOuter"),
+            (pick(row_id, 34, 20) == 0).alias("IsChillerStock"),
+            F.format_string("%013d", row_id).alias("Barcode"),
+            F.lit(15).cast("decimal(18,3)").alias("TaxRate"),
+            money(row_id, 35, 50000).alias("UnitPrice"),
+            money(row_id, 35, 50000).alias("RecommendedRetailPrice"),
+            ((pick(row_id, 36, 5000) + 1) / 1000).cast("decimal(18,3)").alias("TypicalWeightPerUnit"),
+            F.when(pick(row_id, 37, 2) == 0, F.concat(F.lit("Marketing copy for item "), row_id)).alias("MarketingComments"),
+            F.lit(None).cast("string").alias("InternalComments"),
+            # A few distinct ~16 KB images shared by many items, like product photos
+            F.when(pick(row_id, 38, 4) > 0, F.encode(F.repeat(F.sha2(pick(row_id, 39, 20).cast("string"), 256), 256), "UTF-8")).alias("Photo"),
+            F.to_json(F.struct(
+                choice(row_id, 40, COUNTRIES).alias("CountryOfManufacture"),
+                F.array(choice(row_id, 41, TAGS), choice(row_id, 42, TAGS)).alias("Tags"),
+            )).alias("CustomFields"),
+            F.to_json(F.array(choice(row_id, 41, TAGS), choice(row_id, 42, TAGS))).alias("Tags"),
+            F.concat(F.lit("Stock item "), row_id, F.lit(" "), choice(row_id, 40, COUNTRIES)).alias("SearchDetails"),
+            F.lit(1).alias("LastEditedBy"),
+            valid_from.alias("ValidFrom"),
+            open_valid_to.alias("ValidTo"),
+        ),
+        "Warehouse.StockItemHoldings": rows(stock_items).select(
+            row_id.cast("int").alias("StockItemID"),
+            pick(row_id, 43, 100000).cast("int").alias("QuantityOnHand"),
+            F.concat(F.lit("L-"), pick(row_id, 44, 100)).alias("BinLocation"),
+            pick(row_id, 45, 100000).cast("int").alias("LastStocktakeQuantity"),
+            money(row_id, 46, 10000).alias("LastCostPrice"),
+            pick(row_id, 47, 100).cast("int").alias("ReorderLevel"),
+            pick(row_id, 48, 1000).cast("int").alias("TargetStockLevel"),
+            F.lit(1).alias("LastEditedBy"),
+            last_edited(row_id, F.lit(f"{FIRST_ORDER_DATE} 00:00:00").cast("timestamp"), edit_fraction, edited_at).alias("LastEditedWhen"),
+        ),
+        "Warehouse.StockGroups": rows(stock_groups).select(
+            row_id.cast("int").alias("StockGroupID"),
+            F.element_at(F.array(*[F.lit(name) for name in STOCK_GROUPS]), row_id.cast("int")).alias("StockGroupName"),
+            F.lit(1).alias("LastEditedBy"),
+            valid_from.alias("ValidFrom"),
+            open_valid_to.alias("ValidTo"),
+        ),
+        "Warehouse.StockItemStockGroups": rows(item_groups).select(
+            row_id.cast("int").alias("StockItemStockGroupID"),
+            (F.pmod(row_id - 1, F.lit(stock_items)) + 1).cast("int").alias("StockItemID"),
+            (pick(row_id, 49, stock_groups) + 1).cast("int").alias("StockGroupID"),
+            F.lit(1).alias("LastEditedBy"),
+            last_edited(row_id, F.lit(f"{FIRST_ORDER_DATE} 00:00:00").cast("timestamp"), edit_fraction, edited_at).alias("LastEditedWhen"),
+        ),
+    }
+
+    # Same columns, in the same order, as the registry selects from SQL Server
+    return {
+        spec.source_table: tables[spec.source_table].select(*spec.columns)
+        for spec in BRONZE_TABLES.values()
+    }
@@ -0,0 +1,192 @@
+"""Self-tuning of JDBC fetch size and read parallelism per table."""
+
+import datetime
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import reduce
+from operator import add
+from typing import Callable, Optional, Sequence
+
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import BinaryType, StringType
+
+from .control import JdbcTuningStore
+from .registry import TableSpec
+from .source import SqlServerSource
+
+# off: driver defaults and registry partition counts; auto: use the stored settings, tuning tables
+# that have none or whose throughput regressed; tune: re-tune every table on this run
+TUNING_MODES = ("off", "auto", "tune")
+
+
+@dataclass(frozen=True)
+class JdbcSettings:
+    """JDBC read settings for one table."""
+
+    fetch_size: int
+    num_partitions: int
+
+
+@dataclass
+class TrialResult:
+    """Throughput of one candidate setting."""
+
+    settings: JdbcSettings
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+
+def value_bytes(df: DataFrame) -> Column:
+    """Approximate bytes received per row: the length of every value as string or binary."""
+    sizes = [
+        F.coalesce(F.octet_length(F.col(field.name) if isinstance(field.dataType, (StringType, BinaryType)) else F.col(field.name).cast("string")), F.lit(0))
+        for field in df.schema.fields
+    ]
+    return reduce(add, sizes)
+
+
+class JdbcTuner:
+    """Measures candidate fetch sizes and partition counts per table and keeps the fastest.
+
+    Every trial reads the full table, so fetch sizes are tried from small to large and stop at
+    the first one gaining less than `plateau_gain` over the best so far for that partition
+    count; partition counts stop the same way. `auto` mode only tunes tables that were never
+    tuned or whose throughput regressed. Full loads record their staging throughput:
+    the first full load after tuning sets the baseline, and a later one below
+    `regression_threshold` times that baseline flags the table for re-tuning on the next run.
+    """
+
+    def __init__(
+        self,
+        spark: SparkSession,
+        source: SqlServerSource,
+        store: JdbcTuningStore,
+        fetch_sizes: Sequence[int] = (1000, 5000, 10000, 50000),
+        partition_counts: Sequence[int] = (1, 4, 8, 16),
+        regression_threshold: float = 0.7,
+        plateau_gain: float = 0.05,
+    ):
+        self.spark = spark
+        self.source = source
+        self.store = store
+        self.fetch_sizes = fetch_sizes
+        self.partition_counts = partition_counts
+        self.regression_threshold = regression_threshold
+        self.plateau_gain = plateau_gain
+        # Source reads spent on tuning trials in this run
+        self.trial_reads = 0
+
+    def stored(self, spec: TableSpec) -> Optional[JdbcSettings]:
+        """Settings stored by an earlier tuning run, or None."""
+        row = self.store.get(spec.name)
+        return JdbcSettings(row["fetch_size"], row["num_partitions"]) if row else None
+
+    def due(self, spec: TableSpec) -> bool:
+        """Whether the table has never been tuned or was flagged after a throughput regression."""
+        row = self.store.get(spec.name)
+        return row is None or bool(row["needs_retune"])
+
+    def measure(
+        self,
+        spec: TableSpec,
+        query: str,
+        settings: JdbcSettings,
+        slot: Callable = nullcontext,
+        custom_schema: Optional[str] = None,
+    ) -> TrialResult:
+        """Read the whole query with the given settings and measure rows and bytes per second.
+
+        `custom_schema` is the table's declared column types, so trials fetch what the load does.
+        """
+        df = self.source.read(query, spec.source_table, spec.partition_column, settings.num_partitions, settings.fetch_size, custom_schema)
+        with slot(settings.num_partitions):
+            start = time.perf_counter()
+            # Summing every value's length makes Spark fetch all columns, like the staging write
+            row = df.agg(F.count(F.lit(1)).alias("rows"), F.sum(value_bytes(df)).alias("bytes")).collect()[0]
+            seconds = time.perf_counter() - start
+        self.trial_reads += 1
+        return TrialResult(settings, row["rows"], row["bytes"] or 0, seconds)
+
+    def plateaued(self, trial: TrialResult, best: Optional[TrialResult]) -> bool:
+        """Whether `trial` gained less than `plateau_gain` over `best`."""
+        return best is not None and trial.rows_per_sec < best.rows_per_sec * (1 + self.plateau_gain)
+
+    def tune(
+        self,
+        spec: TableSpec,
+        query: str,
+        slot: Callable = nullcontext,
+        custom_schema: Optional[str] = None,
+        max_connections: Optional[int] = None,
+    ) -> JdbcSettings:
+        """Try candidate settings until throughput plateaus, store the fastest and return it.
+
+        Partition counts above `max_connections` (the scheduler's connection cap) are not tried,
+        as loads could never run with them.
+        """
+        partition_counts = self.partition_counts if spec.partition_column else (1,)
+        if max_connections is not None:
+            partition_counts = [count for count in partition_counts if count <= max_connections] or [max_connections]
+        best = None
+        for num_partitions in sorted(partition_counts):
+            best_for_count = None
+            for fetch_size in sorted(self.fetch_sizes):
+                trial = self.measure(spec, query, JdbcSettings(fetch_size, num_partitions), slot, custom_schema)
+                print(f"Tuning {spec.name}: fetchsize={fetch_size}, partitions={num_partitions}: "
+                      f"{trial.rows_per_sec:,.0f} rows/s, {trial.bytes_per_sec / 1024 / 1024:,.1f} MB/s")
+                plateaued = self.plateaued(trial, best_for_count)
+                if best_for_count is None or trial.rows_per_sec > best_for_count.rows_per_sec:
+                    best_for_count = trial
+                if plateaued:
+                    break
+            # More connections that don't pay off end the search as well
+            plateaued = self.plateaued(best_for_count, best)
+            if best is None or best_for_count.rows_per_sec > best.rows_per_sec:
+                best = best_for_count
+            if plateaued:
+                break
+
+        self.store.set({
+            "table_name": spec.name,
+            "fetch_size": best.settings.fetch_size,
+            "num_partitions": best.settings.num_partitions,
+            "trial_rows_per_sec": best.rows_per_sec,
+            "trial_bytes_per_sec": best.bytes_per_sec,
+            "baseline_rows_per_sec": None,
+            "last_rows_per_sec": None,
+            "needs_retune": False,
+            "tuned_at": datetime.datetime.now(),
+        })
+        print(f"✅ Tuned {spec.name}: fetchsize={best.settings.fetch_size}, partitions={best.settings.num_partitions}")
+        return best.settings
+
+    def record_run(self, spec: TableSpec, records: int, seconds: float) -> None:
+        """Record the staging throughput of a full load and flag the table if it regressed.
+
+        Only complete reads are recorded; the engine skips full loads resumed from checkpoints.
+        """
+        row = self.store.get(spec.name)
+        if row is None or not seconds:
+            return
+
+        rows_per_sec = records / seconds
+        baseline = row["baseline_rows_per_sec"]
+        if baseline is None:
+            row["baseline_rows_per_sec"] = rows_per_sec
+        elif rows_per_sec < baseline * self.regression_threshold:
+            row["needs_retune"] = True
+            print(f"WARNING: {spec.name} read at {rows_per_sec:,.0f} rows/s, below {self.regression_threshold:.0%} "
+                  f"of the {baseline:,.0f} rows/s baseline; it will be re-tuned on the next full load")
+        row["last_rows_per_sec"] = rows_per_sec
+        self.store.set(row)
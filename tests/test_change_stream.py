@@ -0,0 +1,154 @@
+"""ChangeStream against the local H2 Change Tracking stand-in.
+
+Needs Java, PySpark and delta-spark (`pip install pyspark==3.4.1 delta-spark==2.4.0`); the H2
+driver is fetched by Spark on first use. Micro-batches are driven by calling `process_batch`
+directly instead of starting the stream.
+
+    python -m pytest tests/test_change_stream.py
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+pytest.importorskip("pyspark")
+pytest.importorskip("delta")
+if shutil.which("java") is None:
+    pytest.skip("Spark needs Java", allow_module_level=True)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pyspark.sql import functions as F  # noqa: E402
+
+from datalab_etl import BRONZE_TABLES  # noqa: E402
+from datalab_etl.local import H2Source, LocalExtractionEngine, local_spark, local_spec  # noqa: E402
+from datalab_etl.streaming import ChangeStream  # noqa: E402
+from datalab_etl.synthetic import generate_wwi  # noqa: E402
+
+SCALE = 0.01
+
+
+@pytest.fixture(scope="module")
+def spark(tmp_path_factory):
+    spark = local_spark(str(tmp_path_factory.mktemp("warehouse")), "datalab-tests")
+    yield spark
+    spark.stop()
+
+
+def load_orders(stream: ChangeStream, comments=None, deleted=()) -> None:
+    """Replace the source orders with the synthetic ones, with new `Comments` and without `deleted` orders."""
+    orders = generate_wwi(stream.engine.spark, SCALE)["Sales.Orders"].where(~F.col("OrderID").isin(list(deleted) or [0]))
+    for order_id, comment in (comments or {}).items():
+        orders = orders.withColumn("Comments", F.when(F.col("OrderID") == order_id, F.lit(comment)).otherwise(F.col("Comments")))
+    stream.engine.source.load({stream.spec.source_table: orders})
+
+
+@pytest.fixture
+def stream(spark, tmp_path, request):
+    spec = local_spec(BRONZE_TABLES["orders"])
+    source = H2Source(spark, str(tmp_path / "wwi"))
+    schema_name = f"cdc_{request.node.name}".lower()
+    engine = LocalExtractionEngine(spark, source, schema_name=schema_name, vertical_split=True, collect_metrics=False)
+    engine.setup()
+    stream = ChangeStream(engine, spec, str(tmp_path / "checkpoint"))
+    stream.store.ensure()
+    load_orders(stream)
+    source.track_changes(spec.source_table, spec.key_columns)
+    yield stream
+    spark.sql(f"DROP SCHEMA IF EXISTS {engine.catalog_name}.{schema_name} CASCADE")
+
+
+def bronze(stream: ChangeStream, table_name: str = None):
+    return stream.engine.spark.table(stream.engine.qualify(table_name or stream.spec.name))
+
+
+def comment(stream: ChangeStream, order_id: int):
+    return bronze(stream, "orders_notes").where(F.col("OrderID") == order_id).first()["Comments"]
+
+
+def test_snapshot_without_offset_and_behind_retention(stream):
+    source_rows = generate_wwi(stream.engine.spark, SCALE)["Sales.Orders"].count()
+
+    stream.process_batch(None, 0)
+    offset = stream.store.get("orders")
+    assert offset["change_version"] == 0
+    assert offset["rows_applied"] == source_rows
+    assert bronze(stream).count() == source_rows
+
+    # Changes the stream never read are cleaned up, so it has to start over from a snapshot
+    load_orders(stream, comments={1: "after cleanup"})
+    stream.engine.source.record_changes("Sales.Orders", [(1, 1, "U"), (2, 2, "U")])
+    stream.engine.source.expire_changes("Sales.Orders", 2)
+    stream.process_batch(None, 1)
+    offset = stream.store.get("orders")
+    assert offset["change_version"] == 2
+    assert offset["stream_batch_id"] == 1
+    assert bronze(stream).where(F.col("_batch_id").contains("_cdc_")).count() == 0
+    assert comment(stream, 1) == "after cleanup"
+
+
+def test_replayed_batch_is_skipped(stream):
+    stream.process_batch(None, 0)
+    load_orders(stream, comments={1: "first"})
+    stream.engine.source.record_changes("Sales.Orders", [(1, 1, "U")])
+    stream.process_batch(None, 1)
+    assert comment(stream, 1) == "first"
+
+    # Spark replays batch 1 from its checkpoint after the offset was stored
+    load_orders(stream, comments={1: "second"})
+    stream.engine.source.record_changes("Sales.Orders", [(1, 2, "U")])
+    stream.process_batch(None, 1)
+    assert stream.store.get("orders")["change_version"] == 1
+    assert comment(stream, 1) == "first"
+
+    stream.process_batch(None, 2)
+    assert stream.store.get("orders")["change_version"] == 2
+    assert comment(stream, 1) == "second"
+
+
+def test_stage_tables_are_dropped_after_each_batch(stream):
+    engine = stream.engine
+    stream.process_batch(None, 0)
+    assert not engine.spark.catalog.tableExists(engine.qualify("_stage_orders"))
+
+    load_orders(stream, comments={1: "changed"})
+    engine.source.record_changes("Sales.Orders", [(1, 1, "U")])
+    stream.process_batch(None, 1)
+    assert not engine.spark.catalog.tableExists(engine.qualify("_stage_orders_cdc"))
+    assert "orders_cdc" not in engine.source_round_trips
+
+
+def test_deletes_reach_side_tables(stream):
+    stream.process_batch(None, 0)
+    assert bronze(stream).where(F.col("OrderID") == 5).count() == 1
+    assert bronze(stream, "orders_notes").where(F.col("OrderID") == 5).count() == 1
+
+    load_orders(stream, deleted=[5])
+    stream.engine.source.record_changes("Sales.Orders", [(5, 1, "D")])
+    stream.process_batch(None, 1)
+    assert bronze(stream).where(F.col("OrderID") == 5).count() == 0
+    assert bronze(stream, "orders_notes").where(F.col("OrderID") == 5).count() == 0
+
+
+def test_offset_advances_only_after_merges_commit(stream, monkeypatch):
+    stream.process_batch(None, 0)
+    load_orders(stream, comments={1: "changed"})
+    stream.engine.source.record_changes("Sales.Orders", [(1, 1, "U")])
+
+    def failing_write(*args, **kwargs):
+        raise RuntimeError("MERGE failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(stream.engine, "write", failing_write)
+        with pytest.raises(RuntimeError):
+            stream.process_batch(None, 1)
+    offset = stream.store.get("orders")
+    assert offset["change_version"] == 0
+    assert offset["stream_batch_id"] == 0
+
+    # The retried batch applies the same changes
+    stream.process_batch(None, 1)
+    assert stream.store.get("orders")["change_version"] == 1
+    assert comment(stream, 1) == "changed"
@@ -0,0 +1,117 @@
+"""Declared column types: which narrowings hold every source value, and JSON type widening.
+
+A wrong answer here silently truncates data, so the boundaries are spelled out. No Spark
+session is needed.
+
+    python -m pytest tests/test_column_types.py
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyspark")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pyspark.sql.types import ArrayType, DoubleType, LongType, NullType, StringType, StructField, StructType  # noqa: E402
+
+from datalab_etl.engine import ExtractionEngine  # noqa: E402
+from datalab_etl.json_projection import merge_types  # noqa: E402
+from datalab_etl.source import SourceColumn, narrowing_fits  # noqa: E402
+
+
+def column(data_type, precision=None, scale=None):
+    return SourceColumn(data_type, precision, scale)
+
+
+@pytest.mark.parametrize("spark_type, source_type, fits", [
+    ("SMALLINT", "smallint", True),
+    ("SMALLINT", "int", False),
+    ("SMALLINT", "tinyint", True),
+    # SQL Server's tinyint goes up to 255, Spark's TINYINT to 127
+    ("TINYINT", "tinyint", False),
+    ("INT", "int", True),
+    ("INT", "bigint", False),
+    ("BIGINT", "int", True),
+    ("smallint ", "SMALLINT", True),
+])
+def test_integer_narrowing(spark_type, source_type, fits):
+    assert narrowing_fits(spark_type, column(source_type)) is fits
+
+
+@pytest.mark.parametrize("spark_type, source, fits", [
+    ("DECIMAL(18,2)", column("decimal", 18, 2), True),
+    ("DECIMAL(20,4)", column("decimal", 18, 2), True),
+    # One integer digit short
+    ("DECIMAL(17,2)", column("decimal", 18, 2), False),
+    # Same precision, but a scale that drops a fractional digit
+    ("DECIMAL(18,1)", column("decimal", 18, 2), False),
+    # More scale at the same precision costs an integer digit
+    ("DECIMAL(18,3)", column("decimal", 18, 2), False),
+    ("DECIMAL(19,4)", column("money", 19, 4), True),
+    ("DECIMAL(18,2)", column("money", 19, 4), False),
+    ("DECIMAL(10, 0)", column("int"), True),
+    ("DECIMAL(9,0)", column("int"), False),
+    ("DECIMAL(5,0)", column("smallint"), True),
+    ("DECIMAL(18,2)", column("decimal"), False),
+    ("DECIMAL(18,2)", column("float", 53), False),
+])
+def test_decimal_narrowing(spark_type, source, fits):
+    assert narrowing_fits(spark_type, source) is fits
+
+
+@pytest.mark.parametrize("spark_type, source_type, fits", [
+    # nvarchar(max) reports no length in INFORMATION_SCHEMA; only STRING holds it
+    ("STRING", "nvarchar", True),
+    ("VARCHAR(4000)", "nvarchar", False),
+    ("STRING", "varbinary", False),
+    ("DATE", "date", True),
+    ("DATE", "datetime2", False),
+    ("TIMESTAMP", "datetime2", True),
+    ("BOOLEAN", "bit", True),
+    ("INT", "nvarchar", False),
+])
+def test_other_narrowing(spark_type, source_type, fits):
+    assert narrowing_fits(spark_type, column(source_type)) is fits
+
+
+def test_declarations_that_do_not_fit_keep_the_default_mapping():
+    engine = SimpleNamespace(
+        custom_schemas={},
+        source_columns={"Sales.Orders": {
+            "OrderID": column("int", 10, 0),
+            "PickedByPersonID": column("int", 10, 0),
+            "Amount": column("decimal", 18, 2),
+            "Comments": column("nvarchar"),
+        }},
+    )
+    spec = SimpleNamespace(name="orders", source_table="Sales.Orders", column_types=[
+        ("OrderID", "INT"),
+        ("PickedByPersonID", "SMALLINT"),
+        ("Amount", "DECIMAL(18,1)"),
+        ("Comments", "STRING"),
+        ("Missing", "INT"),
+    ])
+    assert ExtractionEngine.custom_schema(engine, spec) == "OrderID INT, Comments STRING"
+    assert engine.custom_schemas["orders"] == "OrderID INT, Comments STRING"
+
+
+@pytest.mark.parametrize("current, new, merged", [
+    (NullType(), LongType(), LongType()),
+    (LongType(), NullType(), LongType()),
+    (LongType(), DoubleType(), DoubleType()),
+    (DoubleType(), LongType(), DoubleType()),
+    (LongType(), StringType(), StringType()),
+    (ArrayType(LongType()), ArrayType(DoubleType()), ArrayType(DoubleType())),
+    (ArrayType(LongType()), LongType(), StringType()),
+    (
+        StructType([StructField("a", LongType()), StructField("b", StringType())]),
+        StructType([StructField("a", DoubleType()), StructField("c", LongType())]),
+        StructType([StructField("a", DoubleType()), StructField("b", StringType()), StructField("c", LongType())]),
+    ),
+])
+def test_json_type_widening(current, new, merged):
+    assert merge_types(current, new) == merged
@@ -0,0 +1,100 @@
+"""Feature files: publishing, memory-mapped lookups and picking up a re-export.
+
+`feature_store` is imported as the single file the serving model ships, so only NumPy is needed.
+
+    python -m pytest tests/test_feature_store.py
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "datalab_etl"))
+
+from feature_store import FeatureLookup, write_feature_file  # noqa: E402
+
+DTYPE = np.dtype([("CustomerID", "<i8"), ("order_count", "<i4"), ("total_spend", "<f8")])
+
+
+def records(rows):
+    return np.array(rows, dtype=DTYPE)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "features" / "customer_features.npy")
+    write_feature_file(path, records([(1, 3, 10.5), (5, 1, 2.0), (9, 7, 99.25)]), {"version": 12})
+    return path
+
+
+def test_sidecar_describes_the_file(path):
+    with open(f"{path}.json") as f:
+        sidecar = json.load(f)
+    assert sidecar == {
+        "version": 12,
+        "key": "CustomerID",
+        "columns": {"CustomerID": "<i8", "order_count": "<i4", "total_spend": "<f8"},
+        "count": 3,
+    }
+    assert sorted(os.listdir(os.path.dirname(path))) == ["customer_features.npy", "customer_features.npy.json"]
+
+
+def test_lookup_of_present_and_missing_keys(path):
+    lookup = FeatureLookup(path)
+    assert isinstance(lookup.records, np.memmap)
+    assert lookup.key_field == "CustomerID"
+    assert lookup.feature_names == ("order_count", "total_spend")
+    assert lookup.metadata["version"] == 12
+
+    found_records, found = lookup.lookup([9, 0, 5, 10, 1, -3])
+    assert found.tolist() == [True, False, True, False, True, False]
+    assert found_records["CustomerID"].tolist() == [9, 0, 5, 0, 1, 0]
+    assert found_records["total_spend"].tolist() == [99.25, 0.0, 2.0, 0.0, 10.5, 0.0]
+
+    assert lookup.get(5) == {"order_count": 1, "total_spend": 2.0}
+    assert lookup.get(6) is None
+    assert lookup.get(100) is None
+
+
+def test_empty_file(tmp_path):
+    path = str(tmp_path / "empty.npy")
+    write_feature_file(path, records([]), {})
+    lookup = FeatureLookup(path)
+    found_records, found = lookup.lookup([1, 2])
+    assert found.tolist() == [False, False]
+    assert lookup.get(1) is None
+
+
+def test_unsorted_or_duplicate_keys_are_rejected(tmp_path):
+    path = str(tmp_path / "bad.npy")
+    with pytest.raises(ValueError):
+        write_feature_file(path, records([(5, 1, 2.0), (1, 3, 10.5)]), {})
+    with pytest.raises(ValueError):
+        write_feature_file(path, records([(1, 1, 2.0), (1, 3, 10.5)]), {})
+    assert not os.path.exists(path)
+
+
+def test_reload_picks_up_a_re_export(path):
+    lookup = FeatureLookup(path)
+    assert not lookup.reload()
+    old_records = lookup.records
+    stat = os.stat(path)
+
+    # Same size and, as on file systems with coarse timestamps, the same modification time
+    write_feature_file(path, records([(1, 4, 20.0), (5, 1, 2.0), (7, 2, 8.0)]), {"version": 13})
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert lookup.reload()
+    assert lookup.metadata["version"] == 13
+    assert lookup.get(1) == {"order_count": 4, "total_spend": 20.0}
+    assert lookup.get(7) == {"order_count": 2, "total_spend": 8.0}
+    assert lookup.get(9) is None
+    assert not lookup.reload()
+
+    # Arrays taken before the re-export still read the file they were mapped from
+    assert old_records["CustomerID"].tolist() == [1, 5, 9]
+    assert not os.path.exists(f"{path}.tmp")
@@ -0,0 +1,91 @@
+"""Key range planning: histogram boundaries and the range predicates built from them.
+
+Pure calculations, no Spark session needed. The predicates are evaluated with SQLite, which
+reads them like SQL Server does.
+
+    python -m pytest tests/test_range_planning.py
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+pytest.importorskip("pyspark")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from datalab_etl.source import build_range_predicates, split_histogram  # noqa: E402
+
+
+def ranges_of(predicates, keys):
+    """Index of every range predicate that selects each key."""
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (OrderID INTEGER)")
+    connection.executemany("INSERT INTO t VALUES (?)", [(key,) for key in keys])
+    matches = {key: [] for key in keys}
+    for i, predicate in enumerate(predicates):
+        for (key,) in connection.execute(f"SELECT OrderID FROM t WHERE {predicate}"):
+            matches[key].append(i)
+    return matches
+
+
+def assert_each_key_in_one_range(boundaries, keys):
+    matches = ranges_of(build_range_predicates("OrderID", boundaries), keys)
+    assert {key: len(ranges) for key, ranges in matches.items()} == {key: 1 for key in keys}
+
+
+def test_uniform_histogram_splits_evenly():
+    steps = [(100, 99, 1), (200, 99, 1), (300, 99, 1), (400, 99, 1)]
+    assert split_histogram(steps, 4) == [100, 200, 300]
+
+
+def test_boundaries_interpolate_inside_a_step():
+    boundaries = split_histogram([(0, 0, 1), (1000, 999, 1)], 4)
+    assert [round(boundary, -1) for boundary in boundaries] == [250, 500, 750]
+
+
+def test_heavy_key_ends_its_range_and_the_rest_is_rebalanced():
+    # Half of the rows share OrderID 11
+    steps = [(10, 9, 1), (11, 0, 10000), (1000, 9989, 1)]
+    boundaries = split_histogram(steps, 4)
+    assert boundaries[0] == 11
+    assert boundaries == sorted(set(boundaries))
+    assert len(boundaries) == 3
+
+
+def test_single_value_gives_one_boundary():
+    assert split_histogram([(5, 0, 1000)], 4) == [5]
+    assert_each_key_in_one_range([5], [4, 5, 6, None])
+
+
+def test_nothing_to_split():
+    assert split_histogram([], 4) == []
+    assert split_histogram([(5, 0, 0)], 4) == []
+    assert split_histogram([(100, 99, 1)], 1) == []
+    assert build_range_predicates("OrderID", []) == ["1 = 1"]
+
+
+def test_null_keys_go_to_the_first_range():
+    matches = ranges_of(build_range_predicates("OrderID", [10, 20]), [None, 1])
+    assert matches == {None: [0], 1: [0]}
+
+
+def test_first_and_last_range_bounds():
+    predicates = build_range_predicates("OrderID", [10, 20])
+    matches = ranges_of(predicates, [-5, 10, 11, 20, 21, 10 ** 12])
+    # Upper bounds are inclusive; keys outside the histogram (e.g. inserted since) still land in the outer ranges
+    assert matches == {-5: [0], 10: [0], 11: [1], 20: [1], 21: [2], 10 ** 12: [2]}
+
+
+@pytest.mark.parametrize("steps, num_partitions", [
+    ([(100, 99, 1), (200, 99, 1), (300, 99, 1), (400, 99, 1)], 4),
+    ([(10, 9, 1), (11, 0, 10000), (1000, 9989, 1)], 4),
+    ([(1, 0, 10), (2, 0, 10), (3, 0, 10), (4, 0, 10)], 8),
+    ([(0, 0, 1), (1000, 999, 1)], 16),
+])
+def test_every_key_lands_in_exactly_one_range(steps, num_partitions):
+    boundaries = split_histogram(steps, num_partitions)
+    assert boundaries == sorted(set(boundaries))
+    assert_each_key_in_one_range(boundaries, [None, *range(-1, 1002)])
@@ -0,0 +1,124 @@
+"""Reconciliation: the bronze row hash against SQL Server's HASHBYTES, and mismatched bucket ranges.
+
+`CONVERT(bigint, SUBSTRING(HASHBYTES('SHA2_256', text), 1, 4))` is the first four bytes of the
+SHA-256 of the `nvarchar` text's UTF-16LE bytes, read as an unsigned big-endian integer;
+`hashbytes_prefix` computes the same in Python. The Spark hash tests need Java.
+
+    python -m pytest tests/test_reconcile.py
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+
+import pytest
+
+pytest.importorskip("pyspark")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pyspark.sql import SparkSession  # noqa: E402
+from pyspark.sql.types import DateType, DecimalType, IntegerType, StringType, TimestampType  # noqa: E402
+
+from datalab_etl.reconcile import bronze_row_hash, bronze_row_text, merge_ranges, range_predicate, source_row_text  # noqa: E402
+from datalab_etl.registry import TableSpec  # noqa: E402
+
+SPEC = TableSpec(
+    name="ledger",
+    source_table="Sales.Ledger",
+    columns=("LedgerID", "Reference", "Amount", "LastEditedWhen"),
+    key_columns=("LedgerID", "Reference", "Amount"),
+    watermark_column="LastEditedWhen",
+)
+
+TYPES = {"LedgerID": IntegerType(), "Reference": StringType(), "Amount": DecimalType(18, 2), "LastEditedWhen": TimestampType()}
+
+# Version column values and the text SQL Server's CONVERT gives for them
+ROWS = [
+    ((1, "abc", "12.50", "2024-01-05 13:04:05.123456"), "1|abc|12.50|2024-01-05 13:04:05.123456"),
+    ((2, None, "-0.05", None), "2||-0.05|"),
+    ((3, "Ünïcødé – 東京 😀", "0.00", "2024-02-29 00:00:00"), "3|Ünïcødé – 東京 😀|0.00|2024-02-29 00:00:00.000000"),
+    ((-4, "", "9999999999999999.99", "1999-12-31 23:59:59.999999"), "-4||9999999999999999.99|1999-12-31 23:59:59.999999"),
+]
+
+
+def hashbytes_prefix(text):
+    """What the source query sums per row for the `nvarchar` text."""
+    return int.from_bytes(hashlib.sha256(text.encode("utf-16-le")).digest()[:4], "big")
+
+
+def test_hashbytes_prefix_of_empty_text():
+    # SHA-256 of no bytes starts with e3b0c442
+    assert hashbytes_prefix("") == 0xE3B0C442
+
+
+def test_source_row_text():
+    assert source_row_text(SPEC, TYPES) == (
+        "ISNULL(CONVERT(nvarchar(4000), LedgerID), N'') + N'|' + "
+        "ISNULL(CONVERT(nvarchar(4000), Reference), N'') + N'|' + "
+        "ISNULL(CONVERT(nvarchar(4000), Amount), N'') + N'|' + "
+        "ISNULL(LEFT(CONVERT(nvarchar(27), CAST(LastEditedWhen AS datetime2(7)), 121), 26), N'')"
+    )
+
+
+def test_source_row_text_of_dates_and_single_columns():
+    spec = TableSpec(name="days", source_table="Sales.Days", columns=("DayID", "Day"), key_columns=("DayID",), watermark_column="Day")
+    assert source_row_text(spec, {"DayID": IntegerType(), "Day": DateType()}).endswith(
+        "ISNULL(LEFT(CONVERT(nvarchar(27), CAST(Day AS datetime2(7)), 121), 26), N'')"
+    )
+    spec = TableSpec(name="keys", source_table="Sales.Keys", columns=("KeyID",), key_columns=("KeyID",))
+    assert source_row_text(spec, {"KeyID": IntegerType()}) == "ISNULL(CONVERT(nvarchar(4000), KeyID), N'')"
+
+
+@pytest.fixture(scope="module")
+def spark():
+    if shutil.which("java") is None:
+        pytest.skip("Spark needs Java")
+    spark = SparkSession.builder.master("local[1]").appName("datalab-tests").config("spark.sql.session.timeZone", "UTC").getOrCreate()
+    yield spark
+    spark.stop()
+
+
+def bronze(spark):
+    rows = [(key, reference, amount, edited) for (key, reference, amount, edited), _ in ROWS]
+    return spark.createDataFrame(rows, "LedgerID INT, Reference STRING, Amount STRING, LastEditedWhen STRING").selectExpr(
+        "LedgerID", "Reference", "CAST(Amount AS DECIMAL(18,2)) AS Amount", "CAST(LastEditedWhen AS TIMESTAMP) AS LastEditedWhen"
+    )
+
+
+def test_bronze_row_text_matches_source_text(spark):
+    df = bronze(spark)
+    texts = {row["LedgerID"]: row["text"] for row in df.select("LedgerID", bronze_row_text(SPEC, df).alias("text")).collect()}
+    assert texts == {values[0]: text for values, text in ROWS}
+
+
+def test_bronze_row_hash_matches_hashbytes(spark):
+    df = bronze(spark)
+    hashes = {row["LedgerID"]: row["row_hash"] for row in df.select("LedgerID", bronze_row_hash(SPEC, df).alias("row_hash")).collect()}
+    assert hashes == {values[0]: hashbytes_prefix(text) for values, text in ROWS}
+
+
+def test_date_versions_hash_as_midnight(spark):
+    spec = TableSpec(name="days", source_table="Sales.Days", columns=("DayID", "Day"), key_columns=("DayID",), watermark_column="Day")
+    df = spark.createDataFrame([(1, "2024-01-05"), (2, None)], "DayID INT, Day STRING").selectExpr("DayID", "CAST(Day AS DATE) AS Day")
+    hashes = {row["DayID"]: row["row_hash"] for row in df.select("DayID", bronze_row_hash(spec, df).alias("row_hash")).collect()}
+    assert hashes == {1: hashbytes_prefix("1|2024-01-05 00:00:00.000000"), 2: hashbytes_prefix("2|")}
+
+
+def test_adjacent_buckets_merge_into_one_range():
+    assert merge_ranges([3, 1, 2, 7], low=100, width=10) == [(110, 139), (170, 179)]
+    assert merge_ranges([0], low=-5, width=1) == [(-5, -5)]
+    assert merge_ranges([], low=0, width=10) == []
+
+
+def test_ranges_cover_exactly_the_keys_of_their_buckets():
+    low, width, buckets = 7, 3, [0, 2, 3, 5]
+    ranges = merge_ranges(buckets, low, width)
+    covered = {key for key in range(low - 10, low + 10 * width) if any(start <= key <= end for start, end in ranges)}
+    # Same bucket arithmetic as the checksum queries, for keys from `low` on
+    assert covered == {key for key in range(low, low + 10 * width) if (key - low) // width in buckets}
+
+
+def test_range_predicate():
+    assert range_predicate("OrderID", [(1, 10), (21, 30)]) == "(OrderID BETWEEN 1 AND 10) OR (OrderID BETWEEN 21 AND 30)"
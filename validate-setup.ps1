@@ -29,9 +29,13 @@ function Test-FileStructure {
         "notebooks/bronze/extract_customers.ipynb",
         "notebooks/bronze/extract_orders.py", 
         "notebooks/bronze/extract_stock_items.py",
+        "src/datalab_etl/__init__.py",
+        "src/datalab_etl/registry.py",
+        "src/datalab_etl/engine.py",
         "resources/jobs.yml",
         "resources/clusters.yml",
-        "resources/init-scripts/install-sql-driver.sh"
+        "resources/init-scripts/install-sql-driver.sh",
+        "resources/init-scripts/artifacts.manifest"
     )
     
     $missing = @()